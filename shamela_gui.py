@@ -3,29 +3,1479 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
 import queue
 import json
+import hashlib
 import os
+import sqlite3
 from datetime import datetime, timedelta
 import pyodbc
 import pymysql
 from pathlib import Path
 import uuid
 import re
-from typing import Dict, List, Optional, Tuple
+import time
+from array import array
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+# إصدار هيكل قاعدة البيانات الذي يتوقعه المحول، يُرفع عند تعديل check_and_fix_database_schema
+CONVERTER_SCHEMA_VERSION = 5
+
+# سجل الملفات المستوردة، بجوار ملف إعدادات قاعدة البيانات
+IMPORT_REGISTRY_FILE = "import_registry.db"
+
+# مجلد أرشيف سجل الأحداث: الرسائل القديمة تُنقل من الذاكرة إلى ملف JSONL لكل جلسة
+LOG_ARCHIVE_DIR = "logs"
+# عدد ملفات الجلسات التي تبقى في مجلد الأرشيف، والأقدم منها يُحذف عند بدء أرشيف جديد
+LOG_ARCHIVE_KEEP = 20
+
+
+class SchemaSnapshot:
+    """لقطة لقدرات هيكل قاعدة البيانات (الأعمدة والفهارس) تُقرأ مرة واحدة لكل جلسة"""
+    
+    TABLES = ('pages', 'chapters', 'volumes', 'import_progress', 'authors', 'publishers')
+    
+    def __init__(self, version: int, columns: Dict = None, indexes: Dict = None):
+        self.version = version
+        self.columns = columns or {}  # {table: [column, ...]}
+        self.indexes = indexes or {}  # {table: {index: {'unique': bool, 'columns': [...]}}}
+        self.column_sets = {table: set(cols) for table, cols in self.columns.items()}
+    
+    def has_column(self, table: str, column: str) -> bool:
+        """هل يحتوي الجدول على العمود المحدد"""
+        return column in self.column_sets.get(table, ())
+    
+    def has_table(self, table: str) -> bool:
+        """هل الجدول موجود"""
+        return bool(self.column_sets.get(table))
+    
+    def has_unique_index(self, table: str, *columns: str) -> bool:
+        """هل على هذه الأعمدة بالضبط فهرس فريد (شرط الإدراج بـ ON DUPLICATE KEY)"""
+        return any(index['unique'] and index['columns'] == list(columns)
+                   for index in self.indexes.get(table, {}).values())
+    
+    @classmethod
+    def load(cls, cursor, database: str, version: int) -> 'SchemaSnapshot':
+        """قراءة اللقطة من INFORMATION_SCHEMA"""
+        tables = cls.TABLES
+        placeholders = ", ".join(["%s"] * len(tables))
+        
+        columns = {table: [] for table in tables}
+        cursor.execute(f"""
+            SELECT TABLE_NAME, COLUMN_NAME
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ({placeholders})
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """, (database, *tables))
+        for table_name, column_name in cursor.fetchall():
+            columns[table_name].append(column_name)
+        
+        indexes = {table: {} for table in tables}
+        cursor.execute(f"""
+            SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ({placeholders})
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """, (database, *tables))
+        for table_name, index_name, non_unique, column_name in cursor.fetchall():
+            index = indexes[table_name].setdefault(index_name, {'unique': not non_unique, 'columns': []})
+            index['columns'].append(column_name)
+        
+        return cls(version, columns, indexes)
+    
+    def to_json(self) -> str:
+        return json.dumps({
+            'version': self.version,
+            'columns': self.columns,
+            'indexes': self.indexes
+        }, ensure_ascii=False)
+    
+    @classmethod
+    def from_json(cls, data: str) -> 'SchemaSnapshot':
+        values = json.loads(data)
+        return cls(values['version'], values.get('columns'), values.get('indexes'))
+
+
+class ChapterIntervalIndex:
+    """فهرس مرتب لنطاقات الفصول (ID من Access) يحدد فصل كل صفحة بالبحث الثنائي"""
+    
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.values = []
+    
+    def add(self, start_id: int, end_id: int, value):
+        """إضافة نطاق؛ يجب أن تضاف النطاقات بترتيب تصاعدي لنقطة البداية"""
+        if end_id < start_id:
+            return  # نطاق فارغ لا يحتوي أي صفحة
+        if self.starts and start_id == self.starts[-1]:
+            # بداية مكررة: النطاق الأحدث يحل محل السابق
+            self.ends[-1] = end_id
+            self.values[-1] = value
+            return
+        self.starts.append(start_id)
+        self.ends.append(end_id)
+        self.values.append(value)
+    
+    def find(self, content_id: int):
+        """إرجاع قيمة النطاق الذي يحتوي المعرف أو None"""
+        position = bisect_right(self.starts, content_id) - 1
+        if position >= 0 and content_id <= self.ends[position]:
+            return self.values[position]
+        return None
+    
+    def __len__(self):
+        return len(self.starts)
+
+
+class DimensionCache:
+    """ذاكرة مؤقتة للمؤلفين والناشرين مشتركة بين الكتب، مفتاحها الاسم بعد التطبيع
+    
+    يمكن مشاركتها بين عدة خيوط تحويل: الإدخالات الجديدة تبقى خاصة بالخيط الذي أنشأها
+    حتى يثبّت معاملته، فلا يستخدم خيط آخر معرفاً قد يُلغى مع التراجع
+    """
+    
+    # الجدول -> عمود الاسم
+    DIMENSIONS = {'authors': 'full_name', 'publishers': 'name'}
+    
+    def __init__(self):
+        self.ids = {table: {} for table in self.DIMENSIONS}
+        self.warmed = set()
+        self.pending = {}  # الخيط -> إدخالات جديدة لم تُثبّت بعد في قاعدة البيانات
+        # القفل يحمي القواميس فقط ولا يُمسك أثناء أي استعلام، فانتظار قفل صف في InnoDB لا يوقف بقية الخيوط
+        self.lock = threading.Lock()
+        self.warm_lock = threading.Lock()
+        # اتصال autocommit اختياري للأسماء الجديدة (الحفظ الجماعي): تُثبت فوراً ولا تبقى أقفال صفوفها
+        # طوال معاملة مجموعة الكتب، فلا ينتظرها خيط آخر ولا تسبب deadlock بين الخيوط
+        self.writer = None
+        self.writer_lock = threading.Lock()
+    
+    def open_writer(self, connection_pool: 'MySQLConnectionPool'):
+        """فتح اتصال autocommit خاص بإدراج الأسماء خارج معاملات الكتب (خارج حد المجمع)"""
+        self.close_writer()
+        conn = connection_pool.prepare_connection(connection_pool.create_connection())
+        conn.autocommit(True)
+        self.writer = conn
+    
+    def close_writer(self):
+        """إغلاق اتصال إدراج الأسماء"""
+        conn, self.writer = self.writer, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+    
+    @staticmethod
+    def normalize(name) -> str:
+        """تطبيع الاسم: توحيد المسافات"""
+        return " ".join(str(name).split())
+    
+    def warm(self, cursor, table: str):
+        """تحميل كل الأسماء الموجودة في الجدول باستعلام واحد (مرة واحدة لكل جدول)"""
+        with self.warm_lock:
+            if table in self.warmed:
+                return
+            name_column = self.DIMENSIONS[table]
+            cursor.execute(f"SELECT id, {name_column} FROM {table} ORDER BY id")
+            rows = cursor.fetchall()
+            with self.lock:
+                known = self.ids[table]
+                for row_id, name in rows:
+                    if name is not None:
+                        known.setdefault(self.normalize(name), row_id)
+                self.warmed.add(table)
+    
+    def get_or_create(self, cursor, table: str, name: str, now: datetime, upsert: bool = True) -> Tuple[int, bool]:
+        """إرجاع (المعرف، هل أُنشئ) للاسم مع إدراجه عند الحاجة
+        
+        upsert: على عمود الاسم فهرس فريد فيُدرج بـ ON DUPLICATE KEY، وإلا فالبحث بـ SELECT قبل الإدراج
+        """
+        key = self.normalize(name)
+        if table not in self.warmed:
+            self.warm(cursor, table)
+        
+        owner = threading.get_ident()
+        with self.lock:
+            known = self.ids[table]
+            if key in known:
+                return known[key], False
+            
+            pending = self.pending.get(owner, {})
+            if (table, key) in pending:
+                return pending[(table, key)], False
+        
+        if self.writer is not None:
+            # الاسم يُكتب ويُثبت فوراً على اتصال الأسماء، فلا يرتبط بمعاملة الكتاب ولا يُلغى معها
+            with self.writer_lock:
+                row_id, created = self.insert_name(self.writer.cursor(), table, name, now, upsert)
+            with self.lock:
+                return self.ids[table].setdefault(key, row_id), created
+        
+        # الإدراج خارج القفل: قد ينتظر قفل صف أدرجه خيط آخر ولم يثبّته بعد
+        row_id, created = self.insert_name(cursor, table, name, now, upsert)
+        with self.lock:
+            if created:
+                self.pending.setdefault(owner, {})[(table, key)] = row_id
+            else:
+                self.ids[table].setdefault(key, row_id)
+        return row_id, created
+    
+    def insert_name(self, cursor, table: str, name: str, now: datetime, upsert: bool) -> Tuple[int, bool]:
+        """إدراج الاسم وإرجاع (المعرف، True)، أو (المعرف، False) إذا وُجد محفوظاً بالبحث قبل الإدراج"""
+        name_column = self.DIMENSIONS[table]
+        if upsert:
+            cursor.execute(f"""
+                INSERT INTO {table} ({name_column}, created_at, updated_at)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
+            """, (name, now, now))
+            return cursor.lastrowid, True
+        
+        # دون فهرس فريد لا يمنع ON DUPLICATE KEY التكرار: البحث عن اسم أُضيف بعد التحميل أولاً
+        cursor.execute(f"SELECT id FROM {table} WHERE {name_column} = %s", (name,))
+        existing = cursor.fetchone()
+        if existing:
+            return existing[0], False
+        cursor.execute(f"""
+            INSERT INTO {table} ({name_column}, created_at, updated_at)
+            VALUES (%s, %s, %s)
+        """, (name, now, now))
+        return cursor.lastrowid, True
+    
+    def commit(self, owner: int = None):
+        """تثبيت الإدخالات الجديدة للخيط الحالي (أو الخيط owner) بعد حفظ المعاملة"""
+        with self.lock:
+            for (table, key), row_id in self.pending.pop(owner or threading.get_ident(), {}).items():
+                self.ids[table].setdefault(key, row_id)
+    
+    def rollback(self, owner: int = None):
+        """إزالة الإدخالات التي أُلغيت مع التراجع عن معاملة الخيط الحالي (أو الخيط owner)"""
+        with self.lock:
+            self.pending.pop(owner or threading.get_ident(), None)
+    
+    def mark(self, owner: int = None) -> int:
+        """موضع الإدخالات الجديدة للخيط عند إنشاء SAVEPOINT"""
+        with self.lock:
+            return len(self.pending.get(owner or threading.get_ident(), {}))
+    
+    def rollback_to(self, mark: int, owner: int = None):
+        """إزالة الإدخالات التي أُنشئت بعد الموضع المحدد (مع ROLLBACK TO SAVEPOINT)"""
+        with self.lock:
+            pending = self.pending.get(owner or threading.get_ident())
+            if pending:
+                for key in list(pending)[mark:]:
+                    del pending[key]
+
+
+class MySQLConnectionPool:
+    """مجمع اتصالات MySQL على مستوى الجلسة مع فحص الاتصال وإعادة الاتصال عند انقطاعه"""
+    
+    def __init__(self, mysql_config: dict, size: int = 4):
+        self.mysql_config = mysql_config
+        self.size = max(1, int(size))
+        self.idle = []  # الاتصالات الجاهزة لإعادة الاستخدام
+        self.created = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        # عبارات SET SESSION تُطبق على كل اتصال عند حجزه (مثل وضع التحميل الكثيف)
+        self.session_statements = []
+    
+    def create_connection(self):
+        """فتح اتصال جديد بإعدادات الجلسة"""
+        # إعداد معاملات الاتصال
+        connection_params = self.mysql_config.copy()
+        
+        # إزالة كلمة المرور إذا كانت فارغة
+        if not connection_params.get('password'):
+            connection_params.pop('password', None)
+        
+        return pymysql.connect(**connection_params)
+    
+    def acquire(self, timeout: float = None):
+        """الحصول على اتصال سليم من المجمع أو فتح اتصال جديد ضمن الحد المسموح"""
+        with self.condition:
+            while True:
+                if self.closed:
+                    raise RuntimeError("مجمع الاتصالات مغلق")
+                if self.idle:
+                    conn = self.idle.pop()
+                    break
+                if self.created < self.size:
+                    self.created += 1
+                    conn = None
+                    break
+                if not self.condition.wait(timeout):
+                    raise TimeoutError("انتهت مهلة انتظار اتصال متاح من المجمع")
+        
+        try:
+            if conn is None:
+                return self.prepare_connection(self.create_connection())
+            
+            # فحص الاتصال وإعادة فتحه إذا انقطع
+            try:
+                conn.ping(reconnect=True)
+            except Exception:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = self.create_connection()
+            return self.prepare_connection(conn)
+        except Exception:
+            with self.condition:
+                self.created -= 1
+                self.condition.notify()
+            raise
+    
+    def prepare_connection(self, conn):
+        """تطبيق متغيرات الجلسة الحالية على الاتصال (إعادة الاتصال تفقدها)"""
+        if self.session_statements:
+            try:
+                cursor = conn.cursor()
+                for statement in self.session_statements:
+                    cursor.execute(statement)
+            except Exception:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                raise
+        return conn
+    
+    def release(self, conn):
+        """إعادة الاتصال للمجمع بعد التراجع عن أي معاملة غير محفوظة"""
+        if conn is None:
+            return
+        try:
+            conn.rollback()
+        except Exception:
+            self.discard(conn)
+            return
+        
+        with self.condition:
+            if self.closed:
+                self.created -= 1
+                close_now = True
+            else:
+                self.idle.append(conn)
+                close_now = False
+            self.condition.notify()
+        
+        if close_now:
+            try:
+                conn.close()
+            except Exception:
+                pass
+    
+    def discard(self, conn):
+        """إغلاق اتصال تالف وإخراجه من المجمع"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self.condition:
+            self.created -= 1
+            self.condition.notify()
+    
+    def close_all(self):
+        """إغلاق كل الاتصالات في نهاية الجلسة"""
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.created -= len(idle)
+            self.condition.notify_all()
+        for conn in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+class CommitPolicy:
+    """متى تُحفظ المعاملات: كل عدد من الصفحات، أو مرة لكل كتاب، أو حفظ جماعي لعدة كتب صغيرة"""
+    
+    ROWS = 'rows'    # حفظ كل rows صفحة مع نقطة استئناف، ثم في نهاية الكتاب
+    BOOK = 'book'    # حفظ واحد في نهاية كل كتاب
+    GROUP = 'group'  # حفظ واحد كل books كتاب أو seconds ثانية، وكل كتاب داخل SAVEPOINT
+    
+    LABELS = {ROWS: 'كل عدد من الصفحات', BOOK: 'مرة لكل كتاب', GROUP: 'جماعي لعدة كتب'}
+    
+    def __init__(self, mode: str = ROWS, rows: int = 5000, books: int = 20, seconds: float = 5.0):
+        self.mode = mode if mode in self.LABELS else self.ROWS
+        self.rows = max(1, int(rows))
+        self.books = max(1, int(books))
+        self.seconds = max(0.0, float(seconds))
+    
+    def checkpoint_rows(self) -> int:
+        """عدد الصفحات بين كل حفظين داخل الكتاب (0 لعدم الحفظ قبل نهاية الكتاب)"""
+        return self.rows if self.mode == self.ROWS else 0
+
+
+class CommitSession:
+    """اتصال MySQL يبقى مع خيط تحويل واحد عبر عدة كتب للحفظ الجماعي
+    
+    كل كتاب داخل SAVEPOINT فيُلغى الكتاب الفاشل وحده دون الكتب المنتظرة معه في نفس المعاملة
+    """
+    
+    SAVEPOINT = 'shamela_book'
+    # أخطاء MySQL التي تعني أن الخادم ألغى معاملة المجموعة كاملة لا الكتاب وحده:
+    # 1213 اختيار المعاملة ضحية deadlock، و 1305 اختفاء SAVEPOINT بعد إلغاء المعاملة
+    TRANSACTION_LOST_ERRORS = (1213, 1305)
+    
+    def __init__(self, connection_pool: 'MySQLConnectionPool', policy: CommitPolicy, dimension_cache: DimensionCache):
+        self.connection_pool = connection_pool
+        self.policy = policy
+        self.dimension_cache = dimension_cache
+        self.conn = None
+        self.pending_books = 0
+        self.pending_since = None
+        self.after_commit = []  # دوال تُنفذ بعد الحفظ الفعلي للكتب المنتظرة
+        self.after_discard = []  # دوال تُنفذ إذا ضاعت الكتب المنتظرة مع فشل الحفظ
+        self.book_mark = 0
+        # الخيط الذي تُسجل باسمه إدخالات المؤلفين والناشرين الجديدة (قد يُغلق الجلسة خيط آخر)
+        self.owner = threading.get_ident()
+    
+    @classmethod
+    def transaction_lost(cls, error: Exception) -> bool:
+        """هل الخطأ يعني ضياع معاملة المجموعة كلها (فلا يفيد ROLLBACK TO SAVEPOINT)"""
+        return bool(error.args) and error.args[0] in cls.TRANSACTION_LOST_ERRORS
+    
+    def connection(self):
+        """اتصال الجلسة (يُحجز من المجمع عند أول كتاب)"""
+        if self.conn is None:
+            self.conn = self.connection_pool.acquire()
+        return self.conn
+    
+    def begin_book(self):
+        """بدء كتاب جديد داخل SAVEPOINT"""
+        self.connection().cursor().execute(f"SAVEPOINT {self.SAVEPOINT}")
+        self.book_mark = self.dimension_cache.mark(self.owner)
+    
+    def end_book(self, success: bool, on_commit: Callable[[], None] = None, on_discard: Callable[[], None] = None):
+        """إنهاء الكتاب: إبقاؤه مع المجموعة المنتظرة أو التراجع عنه وحده، ثم الحفظ إذا حان وقته"""
+        try:
+            cursor = self.conn.cursor()
+            if not success:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {self.SAVEPOINT}")
+                self.dimension_cache.rollback_to(self.book_mark, self.owner)
+                return
+            
+            cursor.execute(f"RELEASE SAVEPOINT {self.SAVEPOINT}")
+        except Exception:
+            self.discard()
+            raise
+        
+        self.pending_books += 1
+        if self.pending_since is None:
+            self.pending_since = time.monotonic()
+        if on_commit is not None:
+            self.after_commit.append(on_commit)
+        if on_discard is not None:
+            self.after_discard.append(on_discard)
+        
+        if self.pending_books >= self.policy.books or time.monotonic() - self.pending_since >= self.policy.seconds:
+            self.commit()
+    
+    def commit(self):
+        """حفظ الكتب المنتظرة ثم تنفيذ ما ينتظر الحفظ"""
+        if self.conn is not None and self.pending_books:
+            try:
+                self.conn.commit()
+            except Exception:
+                self.discard()
+                raise
+            self.dimension_cache.commit(self.owner)
+        
+        callbacks, self.after_commit = self.after_commit, []
+        self.after_discard = []
+        self.pending_books = 0
+        self.pending_since = None
+        for callback in callbacks:
+            callback()
+    
+    def discard(self):
+        """التخلي عن الاتصال والكتب المنتظرة بعد فشل لا يمكن التراجع عنه جزئياً"""
+        conn, self.conn = self.conn, None
+        discarded, self.after_discard = self.after_discard, []
+        self.pending_books = 0
+        self.pending_since = None
+        self.after_commit = []
+        self.dimension_cache.rollback(self.owner)
+        if conn is not None:
+            self.connection_pool.release(conn)
+        for callback in discarded:
+            callback()
+    
+    def close(self):
+        """حفظ ما تبقى وإعادة الاتصال إلى المجمع"""
+        try:
+            self.commit()
+        finally:
+            self.discard()
+
+
+class ImportRegistry:
+    """سجل محلي (SQLite) لبصمات ملفات Access المستوردة بنجاح لتخطي الملفات التي لم تتغير"""
+    
+    HASH_BLOCK_SIZE = 1024 * 1024
+    
+    def __init__(self, path: str = IMPORT_REGISTRY_FILE, hash_workers: int = 2):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS imports (
+                path TEXT NOT NULL,
+                target TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                sha256 TEXT NOT NULL,
+                book_id INTEGER,
+                imported_at TEXT NOT NULL,
+                PRIMARY KEY (path, target)
+            )
+        """)
+        self.conn.commit()
+        # حساب البصمات في الخلفية بالتوازي مع التحويل
+        self.hash_executor = ThreadPoolExecutor(max_workers=max(1, hash_workers))
+        self.hash_futures = {}
+    
+    @staticmethod
+    def target_key(mysql_config: dict) -> str:
+        """تعريف قاعدة البيانات الهدف (الخادم والمنفذ واسم القاعدة)"""
+        return f"{mysql_config.get('host', '')}:{mysql_config.get('port', '')}/{mysql_config.get('database', '')}"
+    
+    @staticmethod
+    def file_stat(path: str) -> Tuple[int, float]:
+        """الحجم ووقت التعديل للفحص السريع"""
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime
+    
+    @classmethod
+    def file_sha256(cls, path: str) -> str:
+        """بصمة SHA-256 للملف بقراءته على أجزاء"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(cls.HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def submit_hash(self, path: str):
+        """بدء حساب بصمة الملف في الخلفية (مرة واحدة لكل ملف)"""
+        path = os.path.abspath(path)
+        with self.lock:
+            future = self.hash_futures.get(path)
+            if future is None:
+                future = self.hash_executor.submit(self.file_sha256, path)
+                self.hash_futures[path] = future
+            return future
+    
+    def lookup(self, path: str, target: str) -> Optional[Tuple]:
+        """آخر استيراد ناجح للملف: (الحجم، وقت التعديل، البصمة، معرف الكتاب)"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT size, mtime, sha256, book_id FROM imports WHERE path = ? AND target = ?",
+                (os.path.abspath(path), target)).fetchone()
+    
+    def quick_match(self, path: str, target: str) -> bool:
+        """الفحص السريع: نفس الحجم ووقت التعديل المسجلين، دون قراءة الملف"""
+        entry = self.lookup(path, target)
+        if entry is None:
+            return False
+        try:
+            return self.file_stat(path) == (entry[0], entry[1])
+        except OSError:
+            return False
+    
+    def is_unchanged(self, path: str, target: str) -> bool:
+        """هل الملف مطابق لاستيراد ناجح سابق إلى نفس القاعدة"""
+        entry = self.lookup(path, target)
+        if entry is None:
+            return False
+        try:
+            size, mtime = self.file_stat(path)
+        except OSError:
+            return False
+        if size != entry[0]:
+            return False
+        # الفحص السريع: نفس الحجم ووقت التعديل يكفي دون قراءة الملف
+        if mtime == entry[1]:
+            return True
+        if self.submit_hash(path).result() != entry[2]:
+            return False
+        # المحتوى لم يتغير رغم تغير وقت التعديل: تحديث الوقت لتفادي إعادة الحساب لاحقاً
+        with self.lock:
+            self.conn.execute("UPDATE imports SET mtime = ? WHERE path = ? AND target = ?",
+                              (mtime, os.path.abspath(path), target))
+            self.conn.commit()
+        return True
+    
+    def record(self, path: str, target: str, book_id: Optional[int], size: int, mtime: float):
+        """تسجيل استيراد ناجح ببصمة الملف كما كان عند بدء التحويل"""
+        sha256 = self.submit_hash(path).result()
+        with self.lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO imports (path, target, size, mtime, sha256, book_id, imported_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (os.path.abspath(path), target, size, mtime, sha256, book_id, datetime.now().isoformat()))
+            self.conn.commit()
+    
+    def forget(self, path: str, target: str):
+        """حذف تسجيل الملف (مثلاً بعد حذف كتابه من قاعدة البيانات) ليُستورد من جديد"""
+        with self.lock:
+            self.conn.execute("DELETE FROM imports WHERE path = ? AND target = ?", (os.path.abspath(path), target))
+            self.conn.commit()
+    
+    def close(self):
+        """إيقاف حساب البصمات وإغلاق السجل"""
+        self.hash_executor.shutdown(wait=True, cancel_futures=True)
+        with self.lock:
+            self.conn.close()
+
+
+class TimedMessageQueue(queue.Queue):
+    """قائمة رسائل تسجل وقت إدخال كل رسالة لقياس تأخر الواجهة عن المحول"""
+    
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self.last_lag = 0.0
+    
+    def _put(self, item):
+        self.queue.append((time.monotonic(), item))
+    
+    def _get(self):
+        enqueued, item = self.queue.popleft()
+        self.last_lag = time.monotonic() - enqueued
+        return item
+
+
+class LogEntry(NamedTuple):
+    """رسالة واحدة في سجل الأحداث"""
+    timestamp: str
+    message: str
+    category: str
+    tag: str
+    
+    @property
+    def full_message(self) -> str:
+        return f"[{self.timestamp}] {self.message}"
+
+
+class LogStore:
+    """مخزن سجل الأحداث: حلقة محدودة في الذاكرة، وآخر الرسائل لكل نوع للتصفية،
+    وما يخرج من الحلقة يُلحق بملف JSONL على القرص"""
+    
+    def __init__(self, capacity: int = 5000, view_limit: int = 2000, archive_dir: str = LOG_ARCHIVE_DIR,
+                 keep_sessions: int = LOG_ARCHIVE_KEEP):
+        self.capacity = max(1, capacity)
+        self.view_limit = max(1, view_limit)
+        self.keep_sessions = max(1, keep_sessions)
+        self.archive_path = os.path.join(archive_dir, f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        self.entries = deque()
+        # آخر view_limit رسالة من كل نوع، حتى لو خرجت من الحلقة، فلا تحتاج التصفية لمسح كل السجل
+        self.by_category = {}
+        self.archive = None
+        self.archived = 0
+    
+    def __len__(self) -> int:
+        return self.archived + len(self.entries)
+    
+    def append(self, entry: LogEntry):
+        """إضافة رسالة ونقل الأقدم إلى الأرشيف عند امتلاء الحلقة"""
+        self.entries.append(entry)
+        category_entries = self.by_category.get(entry.category)
+        if category_entries is None:
+            category_entries = self.by_category[entry.category] = deque(maxlen=self.view_limit)
+        category_entries.append(entry)
+        if len(self.entries) > self.capacity:
+            self.spill(self.entries.popleft())
+    
+    def spill(self, entry: LogEntry):
+        """إلحاق رسالة بملف الأرشيف (يُنشأ عند أول حاجة)"""
+        if self.archive is None:
+            os.makedirs(os.path.dirname(self.archive_path) or '.', exist_ok=True)
+            self.archive = open(self.archive_path, 'a', encoding='utf-8')
+            self.prune()
+        self.archive.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.archived += 1
+    
+    def prune(self):
+        """حذف أقدم ملفات الجلسات السابقة بحيث يبقى keep_sessions ملفاً مع ملف الجلسة الحالية"""
+        archive_dir = os.path.dirname(self.archive_path) or '.'
+        current = os.path.basename(self.archive_path)
+        try:
+            # الاسم session_YYYYmmdd_HHMMSS يُرتب زمنياً
+            sessions = sorted(name for name in os.listdir(archive_dir)
+                              if name.startswith('session_') and name.endswith('.jsonl') and name != current)
+        except OSError:
+            return
+        for name in sessions[:max(0, len(sessions) - (self.keep_sessions - 1))]:
+            try:
+                os.remove(os.path.join(archive_dir, name))
+            except OSError:
+                pass
+    
+    def tail(self, category: Optional[str] = None, limit: Optional[int] = None) -> List[LogEntry]:
+        """آخر الرسائل (كلها أو من نوع واحد) بحد أقصى limit"""
+        limit = min(limit or self.view_limit, self.view_limit)
+        source = self.entries if category is None else self.by_category.get(category, ())
+        count = len(source)
+        if count <= limit:
+            return list(source)
+        return [source[i] for i in range(count - limit, count)]
+    
+    def __iter__(self) -> Iterator[LogEntry]:
+        """كل رسائل الجلسة بالترتيب: المؤرشفة أولاً ثم ما في الذاكرة"""
+        if self.archive is not None:
+            self.archive.flush()
+            with open(self.archive_path, encoding='utf-8') as f:
+                for line in f:
+                    yield LogEntry(*json.loads(line))
+        yield from list(self.entries)
+    
+    def clear(self):
+        """مسح السجل من الذاكرة وحذف ملف الأرشيف"""
+        self.entries.clear()
+        self.by_category.clear()
+        self.close()
+        if self.archived:
+            try:
+                os.remove(self.archive_path)
+            except OSError:
+                pass
+        self.archived = 0
+    
+    def close(self):
+        """إغلاق ملف الأرشيف (يبقى على القرص كسجل للجلسة)"""
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+
+class ColumnPlan:
+    """خطة أعمدة جدول المحتوى لكتاب واحد: ما يُقرأ من Access وما يُحتفظ به لكل صفحة
+    
+    تُبنى الخطة مرة واحدة لكل كتاب، وتستخدمها القراءة لاختيار الأعمدة في SELECT
+    ويستخدمها الإدراج لقراءة المعرف والجزء من كل صف
+    """
+    
+    def __init__(self, table_name: str, columns: List[str], text_column: str, id_column: str,
+                 page_column: str, part_column: str, fallback_text_columns: List[str] = None,
+                 render_html: bool = True):
+        self.table_name = table_name
+        self.columns = columns
+        self.text_column = text_column
+        self.id_column = id_column
+        self.page_column = page_column
+        self.part_column = part_column
+        self.fallback_text_columns = fallback_text_columns or []
+        self.render_html = render_html  # توليد nass_html فقط إذا كان جدول الوجهة سيحفظه
+        
+        # الأعمدة المقروءة لكل صفحة: المعرف والنص والصفحة والجزء وما يعتمد عليه الإدراج بالاسم
+        wanted = [col for col in columns if col in ('id', 'nass', 'Part')]
+        wanted += [id_column, text_column, page_column, part_column] + self.fallback_text_columns
+        self.select_columns = [col for col in columns if col in wanted]
+        
+        # الأعمدة المقروءة للهيكل الخفيف: المعرف والجزء فقط
+        skeleton = [col for col in columns if col in ('id', 'Part') or col == part_column]
+        self.skeleton_columns = skeleton or [id_column]
+    
+    @staticmethod
+    def content_id(row_data: Dict):
+        """معرف الصفحة في Access"""
+        return row_data.get('id', 0)
+    
+    @staticmethod
+    def page_part(row_data: Dict):
+        """قيمة الجزء الخام للصفحة (قد تكون None)"""
+        return row_data.get('part') or row_data.get('Part')
+
+
+class PageBatch:
+    """صفحات بأعمدة متوازية بدل قاموس لكل صفحة: المعرف والجزء في مصفوفات أعداد، والنص و HTML في قوائم
+    
+    يستخدم للهيكل الخفيف (بدون نصوص) ولدفعات الصفحات الكاملة
+    """
+    
+    __slots__ = ('ids', 'parts', 'texts', 'htmls')
+    
+    NONE_VALUE = -2 ** 63  # تمثيل None في مصفوفة الأعداد
+    
+    def __init__(self, ids=(), parts=(), texts: List[str] = None, htmls: List[str] = None):
+        self.ids = self.compact(ids)
+        self.parts = self.compact(parts)
+        self.texts = texts
+        self.htmls = htmls
+    
+    @classmethod
+    def compact(cls, values):
+        """تخزين عمود في array('q') إذا كانت كل قيمه أعداداً صحيحة أو None، وإلا في قائمة عادية"""
+        values = list(values)
+        if all(value is None or (type(value) is int and cls.NONE_VALUE < value < 2 ** 63) for value in values):
+            return array('q', [cls.NONE_VALUE if value is None else value for value in values])
+        return values
+    
+    @classmethod
+    def column_values(cls, column) -> Iterator:
+        """قيم العمود مع إرجاع None لقيم التمثيل الخاصة"""
+        if isinstance(column, array):
+            return (None if value == cls.NONE_VALUE else value for value in column)
+        return iter(column)
+    
+    @classmethod
+    def from_rows(cls, rows: List[Dict]) -> 'PageBatch':
+        """بناء دفعة من قائمة صفوف بصيغة القواميس"""
+        return cls([ColumnPlan.content_id(row) for row in rows],
+                   [ColumnPlan.page_part(row) for row in rows],
+                   [row.get('nass', '') for row in rows],
+                   [row.get('nass_html', '') for row in rows])
+    
+    @classmethod
+    def concat(cls, batches: List['PageBatch']) -> 'PageBatch':
+        """دمج عدة دفعات في دفعة واحدة"""
+        ids, parts, texts, htmls = [], [], [], []
+        for batch in batches:
+            ids.extend(batch.column_values(batch.ids))
+            parts.extend(batch.column_values(batch.parts))
+            texts.extend(batch.texts or [])
+            htmls.extend(batch.htmls or [])
+        return cls(ids, parts, texts, htmls)
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def keys(self) -> Iterator[Tuple]:
+        """(المعرف، الجزء) لكل صفحة"""
+        return zip(self.column_values(self.ids), self.column_values(self.parts))
+    
+    def pages(self) -> Iterator[Tuple]:
+        """(المعرف، الجزء، النص، HTML) لكل صفحة"""
+        return zip(self.column_values(self.ids), self.column_values(self.parts), self.texts, self.htmls)
+
+
+class BookContentStream:
+    """محتوى كتاب يُقرأ على دفعات: هيكل خفيف (المعرف والجزء لكل صفحة) ومولّد لدفعات الصفحات الكاملة"""
+    
+    def __init__(self, plan: ColumnPlan, skeleton: PageBatch, chunks: Callable[[int], Iterator[PageBatch]]):
+        self.plan = plan
+        self.skeleton = skeleton
+        self.chunks = chunks  # chunks(skip_rows) يبدأ القراءة بعد تجاوز عدد من الصفوف
+    
+    def __len__(self):
+        return len(self.skeleton)
+    
+    def pages(self, skip_rows: int = 0) -> Iterator[Tuple]:
+        """المرور على الصفحات الكاملة (المعرف، الجزء، النص، HTML) دفعة بعد دفعة
+        
+        أول skip_rows صفحة تُعاد من الهيكل بدون نص ولا HTML ودون قراءة نصوصها أو معالجتها
+        """
+        for position, (content_id, part_value) in zip(range(skip_rows), self.skeleton.keys()):
+            yield content_id, part_value, None, None
+        for chunk in self.chunks(skip_rows):
+            yield from chunk.pages()
+
+
+class TextNormalizer:
+    """تنظيف النصوص العربية بأنماط مترجمة مسبقاً، يُنشأ مرة واحدة للجلسة
+    
+    الحذف يتم بـ sub على فئات أحرف مترجمة: محرك re يمسح النص بسرعة ولا ينسخه إلا عند وجود ما يُحذف،
+    وهذا أسرع من str.translate بجدول قاموس على النصوص العربية (انظر tests/test_text_normalizer.py)
+    """
+    
+    # وجود حرف عربي في النص
+    ARABIC_PATTERN = r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]'
+    # الأحرف المسموحة في نص الصفحة: الأحرف العربية، التشكيل، علامات الترقيم، الأرقام، الرموز الخاصة مثل === و « » و ¬
+    ALLOWED_PATTERN = r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF\u064B-\u065F\u0670\u06D6-\u06ED0-9\s\n\r.,;:!?()\[\]{}"\'-=«»¬_]'
+    
+    # أحرف التحكم المحذوفة في clean_text و preserve_arabic_diacritics
+    CLEAN_CONTROL_PATTERN = r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]'
+    DIACRITICS_CONTROL_PATTERN = r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]'
+    
+    def __init__(self):
+        self.arabic_re = re.compile(self.ARABIC_PATTERN)
+        self.spaces_re = re.compile(r'[ \t]+')
+        self.blank_lines_re = re.compile(r'\n\s*\n')
+        self.extra_blank_lines_re = re.compile(r'\n\s*\n\s*\n+')
+        
+        self.clean_control_re = re.compile(self.CLEAN_CONTROL_PATTERN)
+        self.diacritics_control_re = re.compile(self.DIACRITICS_CONTROL_PATTERN)
+        # نفي فئة الأحرف المسموحة: كل ما يُحذف في extract_arabic_text
+        self.disallowed_re = re.compile('[^' + self.ALLOWED_PATTERN[1:])
+    
+    def clean_text(self, text) -> str:
+        """تنظيف النص من أحرف التحكم والمسافات الزائدة مع الحفاظ على فواصل الأسطر"""
+        if not text:
+            return ""
+        text = self.clean_control_re.sub('', str(text))
+        text = self.spaces_re.sub(' ', text)
+        text = self.blank_lines_re.sub('\n\n', text)
+        return text.strip()
+    
+    def preserve_arabic_diacritics(self, text: str) -> str:
+        """حذف أحرف التحكم من النصوص العربية مع الحفاظ على التشكيل"""
+        if not text:
+            return ""
+        if not self.arabic_re.search(text):
+            return text
+        return self.diacritics_control_re.sub('', text)
+    
+    def extract_arabic_text(self, text: str) -> str:
+        """الإبقاء على الأحرف المسموحة فقط وتنظيف المسافات"""
+        if not text:
+            return ""
+        
+        # أحرف التحكم تُحذف فقط إذا احتوى النص على حرف عربي (كما في preserve_arabic_diacritics)
+        text = self.preserve_arabic_diacritics(text)
+        text = self.disallowed_re.sub('', text)
+        
+        # تنظيف المسافات مع الحفاظ على بنية النص
+        text = self.spaces_re.sub(' ', text)
+        text = self.extra_blank_lines_re.sub('\n\n', text)
+        return text.strip()
+
+
+# منظف النصوص المشترك بين المحولات في الجلسة
+TEXT_NORMALIZER = TextNormalizer()
+
+
+class HtmlFormatter:
+    """تحويل نص الصفحة إلى HTML بفقرات <p> وأسطر <br> وخطوط فاصلة في أسطر منفصلة
+    
+    يعطي نفس مخرجات سلسلة التعابير النمطية السابقة: الخطوط الفاصلة (¬__________ و === و ـــــ)
+    تُعزل بماسح خطي يحاكي النمط (?<!\n)\s*X\s*(?!\n) دون تراجع، ولا يعمل إلا إذا وُجد الفاصل في النص،
+    ثم تُبنى الفقرات بمرور واحد على الأسطر. يمكن لأي محول استخدامه عبر format
+    """
+    
+    SPECIAL_SEPARATOR = '¬' + '_' * 10
+    TATWEEL_SEPARATOR = 'ـ' * 20
+    
+    def __init__(self, normalizer: TextNormalizer = None):
+        self.normalizer = normalizer or TEXT_NORMALIZER
+        self.special_separator_re = re.compile(r'¬_{3,}')
+    
+    @staticmethod
+    def isolate_separator(text: str, find_separator: Callable[[str, int], Tuple[int, int]], replacement: str) -> str:
+        """استبدال كل فاصل مع المسافات المحيطة به بـ replacement في سطر منفصل
+        
+        find_separator(text, start) يعيد (البداية، النهاية) لأول فاصل بعد start أو (-1, -1)
+        """
+        parts = []
+        length = len(text)
+        position = 0
+        search_from = 0
+        while True:
+            start, end = find_separator(text, search_from)
+            if start < 0:
+                break
+            
+            # بداية المطابقة: أول المسافات السابقة للفاصل، بشرط ألا يسبقها سطر جديد
+            match_start = start
+            while match_start > position and text[match_start - 1].isspace():
+                match_start -= 1
+            while 0 < match_start <= start and text[match_start - 1] == '\n':
+                match_start += 1
+            if match_start > start:
+                search_from = start + 1
+                continue
+            
+            # نهاية المطابقة: كل المسافات اللاحقة للفاصل
+            while end < length and text[end].isspace():
+                end += 1
+            parts.append(text[position:match_start])
+            parts.append(replacement)
+            position = search_from = end
+        
+        if not parts:
+            return text
+        parts.append(text[position:])
+        return ''.join(parts)
+    
+    @staticmethod
+    def find_literal(separator: str) -> Callable[[str, int], Tuple[int, int]]:
+        def find(text, start):
+            index = text.find(separator, start)
+            return (index, index + len(separator)) if index >= 0 else (-1, -1)
+        return find
+    
+    @staticmethod
+    def find_tatweel_run(text: str, start: int) -> Tuple[int, int]:
+        """أول تتابع من 5 أحرف تطويل أو أكثر"""
+        while True:
+            index = text.find('ـ', start)
+            if index < 0:
+                return -1, -1
+            end = index + 1
+            while end < len(text) and text[end] == 'ـ':
+                end += 1
+            if end - index >= 5:
+                return index, end
+            start = end
+    
+    @staticmethod
+    def is_separator_line(line: str) -> bool:
+        """هل السطر (بعد التقليم) خط فاصل: === أو ___ أو ـــ أو ¬___"""
+        if line == '===':
+            return True
+        first = line[:1]
+        if first == '_' or first == 'ـ':
+            return len(line) >= 3 and not line.strip(first)
+        if first == '¬':
+            return len(line) >= 4 and not line[1:].strip('_')
+        return False
+    
+    def format(self, text: str) -> str:
+        """تحويل النص إلى تنسيق HTML مع وسوم <p> و <br>"""
+        if not text:
+            return ""
+        
+        # الحفاظ على التشكيل أولاً
+        text = self.normalizer.preserve_arabic_diacritics(text)
+        
+        # عزل الخطوط الفاصلة في أسطر منفصلة (فقط إذا وُجدت في النص)
+        if '¬' in text:
+            text = self.special_separator_re.sub(self.SPECIAL_SEPARATOR, text)
+            text = self.isolate_separator(text, self.find_literal(self.SPECIAL_SEPARATOR),
+                                          '\n' + self.SPECIAL_SEPARATOR + '\n')
+        if '===' in text:
+            text = self.isolate_separator(text, self.find_literal('==='), '\n===\n')
+        if 'ـــــ' in text:
+            text = self.isolate_separator(text, self.find_tatweel_run, '\n' + self.TATWEEL_SEPARATOR + '\n')
+        
+        # بناء الفقرات بمرور واحد على الأسطر
+        html_content = []
+        current_paragraph = []
+        for line in text.split('\n'):
+            line = line.strip()
+            
+            # إذا كان السطر فارغ أو خطاً فاصلاً، إنهاء الفقرة الحالية
+            if not line or self.is_separator_line(line):
+                if current_paragraph:
+                    html_content.append('<p>' + '<br>\n'.join(current_paragraph) + '</p>')
+                    current_paragraph = []
+                if line:
+                    # إضافة الخط الفاصل في سطر منفصل
+                    html_content.append(f'<p style="text-align: center; margin: 10px 0;">{line}</p>')
+            else:
+                # إضافة السطر للفقرة الحالية
+                current_paragraph.append(line)
+        
+        # إضافة آخر فقرة إن وجدت
+        if current_paragraph:
+            html_content.append('<p>' + '<br>\n'.join(current_paragraph) + '</p>')
+        
+        # ربط الفقرات
+        return '\n'.join(html_content)
+
+
+# منسق HTML المشترك بين المحولات في الجلسة
+HTML_FORMATTER = HtmlFormatter(TEXT_NORMALIZER)
+
+
+def render_page_texts(pages: List[Tuple[int, str]], render_html: bool = True) -> List[Tuple[str, str]]:
+    """تنظيف نصوص دفعة صفحات وتحويلها إلى HTML في عملية فرعية: (المعرف، النص الخام) -> (النص، HTML) بنفس الترتيب"""
+    rendered = []
+    for content_id, raw_text in pages:
+        if raw_text:
+            # استخراج النص العربي مع الحفاظ على التشكيل ثم تحويله إلى HTML إذا كان سيُحفظ
+            enhanced_text = TEXT_NORMALIZER.extract_arabic_text(raw_text)
+            rendered.append((enhanced_text, HTML_FORMATTER.format(enhanced_text) if render_html else ''))
+        else:
+            rendered.append(('', ''))
+    return rendered
+
+
+class PipelineCancelled(Exception):
+    """إيقاف خط المعالجة بطلب من المستخدم أو بسبب فشل إحدى مراحله"""
+
+
+class ConversionPipeline:
+    """خط معالجة لمحتوى كتاب واحد: خيط يقرأ الدفعات من Access وخيط يعالج نصوصها، والكتابة في الخيط المستدعي
+    
+    تمر الدفعات بين المراحل عبر طوابير محدودة الحجم، فتتوقف القراءة إذا تأخرت الكتابة (ضغط عكسي)
+    وتتداخل قراءة ODBC مع الكتابة في MySQL بدل أن تنتظر كل منهما الأخرى. تبقى الكتابة في الخيط
+    المستدعي لأن اتصال MySQL ومعاملته مرتبطان به
+    """
+    
+    STOP = object()  # علامة نهاية الدفعات في الطابور
+    
+    def __init__(self, read_chunks: Callable[[], Iterator[List]], process_chunk: Callable[[List], List],
+                 queue_size: int = 4, cancel_event: threading.Event = None):
+        self.read_chunks = read_chunks
+        self.process_chunk = process_chunk
+        self.raw_queue = queue.Queue(maxsize=queue_size)
+        self.ready_queue = queue.Queue(maxsize=queue_size)
+        self.cancel_event = cancel_event
+        self.stop_event = threading.Event()
+        self.error = None
+        self.threads = []
+        self.timings = {'read': 0.0, 'process': 0.0, 'write': 0.0}
+        self.started_at = None
+        self.finished_at = None
+    
+    def cancelled(self) -> bool:
+        return self.stop_event.is_set() or bool(self.cancel_event and self.cancel_event.is_set())
+    
+    def put(self, target: queue.Queue, item) -> bool:
+        """وضع عنصر في الطابور مع الانتظار حتى يتوفر مكان أو يُطلب الإيقاف"""
+        while not self.cancelled():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def get(self, source: queue.Queue):
+        """أخذ عنصر من الطابور مع الانتظار حتى يتوفر أو يُطلب الإيقاف"""
+        while not self.cancelled():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        raise PipelineCancelled("تم إيقاف التحويل بطلب من المستخدم")
+    
+    def fail(self, error: Exception):
+        """تسجيل خطأ المرحلة الأولى التي فشلت وإيقاف بقية المراحل"""
+        if self.error is None:
+            self.error = error
+        self.stop_event.set()
+    
+    def read_stage(self):
+        try:
+            chunks = iter(self.read_chunks())
+            while not self.cancelled():
+                started = time.perf_counter()
+                chunk = next(chunks, self.STOP)
+                self.timings['read'] += time.perf_counter() - started
+                if not self.put(self.raw_queue, chunk) or chunk is self.STOP:
+                    break
+        except Exception as e:
+            self.fail(e)
+    
+    def process_stage(self):
+        try:
+            while True:
+                chunk = self.get(self.raw_queue)
+                if chunk is not self.STOP:
+                    started = time.perf_counter()
+                    chunk = self.process_chunk(chunk)
+                    self.timings['process'] += time.perf_counter() - started
+                if not self.put(self.ready_queue, chunk) or chunk is self.STOP:
+                    break
+        except PipelineCancelled:
+            pass
+        except Exception as e:
+            self.fail(e)
+    
+    def chunks(self) -> Iterator[List]:
+        """تشغيل المراحل وإرجاع الدفعات الجاهزة للكتابة بالترتيب"""
+        self.started_at = time.perf_counter()
+        for stage in (self.read_stage, self.process_stage):
+            thread = threading.Thread(target=stage, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        
+        try:
+            while True:
+                try:
+                    chunk = self.get(self.ready_queue)
+                except PipelineCancelled:
+                    if self.error is not None:
+                        raise self.error
+                    raise
+                if chunk is self.STOP:
+                    break
+                # الوقت الذي يقضيه المستدعي قبل طلب الدفعة التالية هو وقت الكتابة
+                started = time.perf_counter()
+                yield chunk
+                self.timings['write'] += time.perf_counter() - started
+        finally:
+            self.stop_event.set()
+            for thread in self.threads:
+                thread.join()
+            self.finished_at = time.perf_counter()
+    
+    def timing_summary(self) -> str:
+        total = (self.finished_at or time.perf_counter()) - (self.started_at or time.perf_counter())
+        return (f"أزمنة مراحل المحتوى: القراءة {self.timings['read']:.2f} ث، "
+                f"معالجة النصوص {self.timings['process']:.2f} ث، الكتابة {self.timings['write']:.2f} ث، "
+                f"الإجمالي {total:.2f} ث")
+
+
+# أحداث التحويل: تُنشر من المحول للواجهة والتقارير بدلاً من تحليل نصوص السجل
+class BookStarted(NamedTuple):
+    source_file: str
+
+
+class VolumeCreated(NamedTuple):
+    book_id: int
+    volume_id: int
+    number: int
+    title: str
+
+
+class ChapterRangeResolved(NamedTuple):
+    book_id: int
+    chapter_id: int
+    start_id: int
+    end_id: int
+    volume_id: int
+
+
+class PagesBatchWritten(NamedTuple):
+    book_id: int
+    pages: int
+
+
+class BookStats(NamedTuple):
+    volumes: int = 0
+    chapters: int = 0
+    pages: int = 0
+
+
+class BookFinished(NamedTuple):
+    source_file: str
+    book_id: Optional[int]
+    success: bool
+    stats: BookStats
+    profile: Optional[Dict] = None
+
+
+class EventBus:
+    """ناقل أحداث خفيف: المشتركون يُستدعون في خيط الناشر حسب نوع الحدث
+    
+    on_error(message) يستقبل أخطاء المشتركين (المحول يمرر سجله بمستوى ERROR)
+    """
+    
+    def __init__(self, on_error: Callable[[str], None] = None):
+        self.handlers = {}
+        self.on_error = on_error
+    
+    def subscribe(self, event_type: type, handler: Callable):
+        self.handlers.setdefault(event_type, []).append(handler)
+    
+    def unsubscribe(self, event_type: type, handler: Callable):
+        handlers = self.handlers.get(event_type)
+        if handlers and handler in handlers:
+            handlers.remove(handler)
+    
+    def publish(self, event):
+        """إرسال الحدث لمشتركي نوعه (خطأ أحد المشتركين لا يوقف التحويل)"""
+        for handler in self.handlers.get(type(event), ()):
+            try:
+                handler(event)
+            except Exception as e:
+                message = f"خطأ في معالجة الحدث {type(event).__name__}: {e}"
+                if self.on_error is not None:
+                    self.on_error(message)
+                else:
+                    print(message)
+
+
+class ConversionProfiler:
+    """مقاييس أداء كتاب واحد: زمن وعدد مرات كل مرحلة، رحلات MySQL وتوزيع زمنها، والبايتات المقروءة والمكتوبة"""
+    
+    STAGE_LABELS = {
+        'access_read': "قراءة Access (ODBC)",
+        'text_cleanup': "تنظيف النصوص",
+        'html_format': "تنسيق HTML",
+        'text_processes': "معالجة النصوص في العمليات الفرعية",
+        'pages_write': "إدراج الصفحات والفصول (يشمل انتظار القراءة)",
+        'commit': "الحفظ (commit)",
+    }
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}  # المرحلة -> [الثواني، العدد]
+        self.round_trips = array('d')
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+    
+    @staticmethod
+    def estimate_bytes(values) -> int:
+        """تقدير تقريبي لحجم القيم بترميز UTF-8 (الحرف العربي بايتان)"""
+        if values is None:
+            return 0
+        if isinstance(values, dict):
+            values = values.values()
+        elif isinstance(values, (str, bytes)):
+            values = (values,)
+        total = 0
+        for value in values:
+            if isinstance(value, str):
+                total += 2 * len(value)
+            elif isinstance(value, (bytes, bytearray)):
+                total += len(value)
+            elif value is not None:
+                total += 8
+        return total
+    
+    def add(self, stage: str, seconds: float, count: int = 1, bytes_read: int = 0):
+        with self.lock:
+            totals = self.stages.get(stage)
+            if totals is None:
+                self.stages[stage] = [seconds, count]
+            else:
+                totals[0] += seconds
+                totals[1] += count
+            self.bytes_read += bytes_read
+    
+    def record_round_trip(self, seconds: float, bytes_written: int):
+        with self.lock:
+            self.round_trips.append(seconds)
+            self.bytes_written += bytes_written
+    
+    def finish(self):
+        self.finished_at = time.perf_counter()
+    
+    @staticmethod
+    def percentile(sorted_values, fraction: float) -> float:
+        """النسبة المئوية بطريقة أقرب رتبة"""
+        if not sorted_values:
+            return 0.0
+        rank = -(-fraction * len(sorted_values) // 1)
+        return sorted_values[max(0, min(len(sorted_values), int(rank)) - 1)]
+    
+    def summary(self) -> Dict:
+        """ملخص قابل للتحويل إلى JSON (الأزمنة بالثواني وزمن الرحلات بالملي ثانية)"""
+        with self.lock:
+            latencies = sorted(self.round_trips)
+            stages = {stage: {'seconds': round(seconds, 4), 'count': count}
+                      for stage, (seconds, count) in self.stages.items()}
+            bytes_read, bytes_written = self.bytes_read, self.bytes_written
+        return {
+            'wall_seconds': round((self.finished_at or time.perf_counter()) - self.started_at, 4),
+            'stages': stages,
+            'db': {
+                'round_trips': len(latencies),
+                'seconds': round(sum(latencies), 4),
+                'p50_ms': round(self.percentile(latencies, 0.50) * 1000, 3),
+                'p95_ms': round(self.percentile(latencies, 0.95) * 1000, 3),
+                'p99_ms': round(self.percentile(latencies, 0.99) * 1000, 3),
+                'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+            },
+            'bytes_read': bytes_read,
+            'bytes_written': bytes_written,
+        }
+    
+    @classmethod
+    def report_lines(cls, profile: Dict) -> List[str]:
+        """أسطر تقرير الأداء لملخص summary()"""
+        lines = [f"⏱️ الزمن الكلي: {profile['wall_seconds']:.2f} ث"]
+        for stage, totals in sorted(profile['stages'].items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"   {cls.STAGE_LABELS.get(stage, stage)}: {totals['seconds']:.2f} ث ({totals['count']} مرة)")
+        db = profile['db']
+        lines.append(f"🗄️ رحلات MySQL: {db['round_trips']} بإجمالي {db['seconds']:.2f} ث "
+                     f"(p50 {db['p50_ms']:.1f} / p95 {db['p95_ms']:.1f} / p99 {db['p99_ms']:.1f} / أقصى {db['max_ms']:.1f} ملي ثانية)")
+        lines.append(f"📥 مقروء من Access: {profile['bytes_read'] / (1024 * 1024):.1f} MB | "
+                     f"📤 مرسل إلى MySQL: {profile['bytes_written'] / (1024 * 1024):.1f} MB")
+        return lines
+
+
+class ProfiledCursor:
+    """غلاف لمؤشر MySQL يسجل زمن كل رحلة إلى الخادم وحجم ما يُرسل فيها"""
+    
+    def __init__(self, cursor, profiler: ConversionProfiler):
+        self.cursor = cursor
+        self.profiler = profiler
+    
+    def execute(self, query, params=None):
+        started = time.perf_counter()
+        try:
+            if params is None:
+                return self.cursor.execute(query)
+            return self.cursor.execute(query, params)
+        finally:
+            self.profiler.record_round_trip(time.perf_counter() - started,
+                                            len(query) + ConversionProfiler.estimate_bytes(params))
+    
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
 
 
 class ShamelaConverter:
-    def __init__(self, mysql_config: dict, message_callback=None):
+    def __init__(self, mysql_config: dict, message_callback=None, connection_pool: MySQLConnectionPool = None,
+                 events: EventBus = None):
         """
         إنشاء محول جديد
         mysql_config: قاموس يحتوي على إعدادات اتصال MySQL
         message_callback: دالة لإرسال الرسائل إلى الواجهة
+        connection_pool: مجمع اتصالات مشترك للجلسة (يُنشأ مجمع خاص إذا لم يُمرر)
+        events: ناقل أحداث التحويل (يُنشأ ناقل خاص إذا لم يُمرر)
         """
         self.mysql_config = mysql_config
         self.mysql_conn = None
+        self.connection_pool = connection_pool
+        self.owns_connection_pool = connection_pool is None
+        self.pool_size = 4
         self.access_conn = None
+        self.schema_snapshot = None
+        self.dimension_cache = DimensionCache()
+        self.text_normalizer = TEXT_NORMALIZER
+        self.html_formatter = HTML_FORMATTER
         self.conversion_log = []
         self.message_callback = message_callback
-        
+        self.events = events if events is not None else EventBus()
+        if self.events.on_error is None:
+            # أخطاء مشتركي الأحداث تظهر في سجل التحويل بدلاً من stdout
+            self.events.on_error = lambda message: self.log_message(message, "ERROR")
+        
+        # إعدادات الإدراج المجمّع للصفحات (عدد الصفوف والحجم التقريبي بالبايت لكل دفعة)
+        self.page_batch_rows = 500
+        self.page_batch_bytes = 2 * 1024 * 1024
+        
+        # عدد الصفوف المقروءة من Access في كل دفعة عند القراءة المتدفقة
+        self.content_chunk_rows = 1000
+        
+        # خط المعالجة المتوازي للمحتوى: عدد الدفعات المنتظرة بين كل مرحلتين، وإشارة الإيقاف من الواجهة
+        self.pipeline_enabled = True
+        self.pipeline_queue_size = 4
+        self.cancel_event = threading.Event()
+        
+        # وضع النص فقط: عدم توليد HTML للصفحات حتى لو كان جدول pages يحتوي على content_html
+        self.text_only = False
+        
+        # المزامنة التزايدية: تحديث الكتاب الموجود بنفس shamela_id بدل إنشاء نسخة جديدة
+        self.sync_mode = False
+        
+        # معرف آخر كتاب تم تحويله (لتسجيله في سجل الاستيراد) وإحصائياته لحدث BookFinished
+        self.last_book_id = None
+        self.last_book_stats = BookStats()
+        
+        # مقاييس أداء الكتاب الجاري (تُنشأ في convert_file وتُرسل مع حدث BookFinished)
+        self.profiler: Optional[ConversionProfiler] = None
+        
+        # سياسة الحفظ: كل عدد من الصفحات (مع نقاط استئناف في import_progress) أو لكل كتاب أو جماعياً
+        self.commit_policy = CommitPolicy()
+        # جلسة الحفظ الجماعي المشتركة بين كتب نفس الخيط (None: اتصال من المجمع لكل كتاب)
+        self.commit_session: Optional[CommitSession] = None
+        
+        # وضع التحميل الكثيف لـ convert_multiple_files: تخفيف فحوص الجلسة وتأجيل الفهارس الثانوية اختيارياً
+        self.bulk_load = False
+        self.bulk_drop_indexes = False
+        
+        # مجمع عمليات اختياري لتنظيف النصوص وتحويلها إلى HTML (None للمعالجة في خيط المحول)
+        self.text_executor = None
+        self.text_workers = 1
+        self.owns_text_executor = False
+        
+    def mysql_cursor(self):
+        """مؤشر MySQL على الاتصال الحالي، مع قياس رحلاته إذا كان قياس الأداء مفعلاً"""
+        cursor = self.mysql_conn.cursor()
+        if self.profiler is not None:
+            return ProfiledCursor(cursor, self.profiler)
+        return cursor
+    
+    def profile(self, stage: str, started: float, count: int = 1, bytes_read: int = 0):
+        """إضافة الزمن المنقضي منذ started إلى مرحلة في مقاييس الكتاب الجاري"""
+        if self.profiler is not None:
+            self.profiler.add(stage, time.perf_counter() - started, count, bytes_read)
+    
     def log_message(self, message: str, level: str = "INFO"):
         """تسجيل رسالة في السجل"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -38,26 +1488,56 @@ class ShamelaConverter:
             self.message_callback(message, level)
     
     def connect_mysql(self) -> bool:
-        """الاتصال بقاعدة بيانات MySQL"""
+        """الاتصال بقاعدة بيانات MySQL عبر مجمع الاتصالات"""
         try:
-            # إعداد معاملات الاتصال
-            connection_params = self.mysql_config.copy()
-            
-            # إزالة كلمة المرور إذا كانت فارغة
-            if not connection_params.get('password'):
-                connection_params.pop('password', None)
+            if self.connection_pool is None:
+                self.connection_pool = MySQLConnectionPool(self.mysql_config, self.pool_size)
+                self.owns_connection_pool = True
             
-            self.mysql_conn = pymysql.connect(**connection_params)
+            if self.mysql_conn is not None:
+                # إعادة استخدام الاتصال الحالي بدلاً من فتح اتصال جديد
+                self.mysql_conn.ping(reconnect=True)
+            else:
+                self.mysql_conn = self.connection_pool.acquire()
             self.log_message("تم الاتصال بقاعدة بيانات MySQL بنجاح")
             
-            # التحقق من هيكل قاعدة البيانات وإصلاحها
-            self.check_and_fix_database_schema()
+            # التحقق من هيكل قاعدة البيانات وإصلاحها (مرة واحدة حتى يتغير إصدار الهيكل المسجل)
+            self.ensure_schema_snapshot()
             
             return True
         except Exception as e:
             self.log_message(f"خطأ في الاتصال بقاعدة بيانات MySQL: {str(e)}", "ERROR")
             return False
     
+    def release_mysql(self):
+        """إعادة اتصال MySQL الحالي إلى المجمع"""
+        # أي مؤلف أو ناشر لم يُحفظ يُزال من الذاكرة المؤقتة لأن إعادة الاتصال تلغي المعاملة
+        self.dimension_cache.rollback()
+        if self.mysql_conn is not None:
+            conn, self.mysql_conn = self.mysql_conn, None
+            if self.connection_pool is not None:
+                self.connection_pool.release(conn)
+            else:
+                conn.close()
+    
+    def book_exists(self, book_id: int) -> bool:
+        """هل الكتاب ما زال في قاعدة البيانات (باتصال مستقل من المجمع، فيصلح من أي خيط)"""
+        conn = self.connection_pool.acquire()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM books WHERE id = %s", (book_id,))
+            return cursor.fetchone() is not None
+        finally:
+            self.connection_pool.release(conn)
+    
+    def close(self):
+        """إغلاق اتصالات المحول ومجمع الاتصالات ومجمع العمليات الخاصين به"""
+        self.release_mysql()
+        self.stop_text_processes()
+        if self.connection_pool is not None and self.owns_connection_pool:
+            self.connection_pool.close_all()
+            self.connection_pool = None
+    
     def check_and_fix_database_schema(self):
         """التحقق من هيكل قاعدة البيانات وإصلاحها للنظام الجديد"""
         try:
@@ -125,11 +1605,323 @@ class ShamelaConverter:
                 cursor.execute("ALTER TABLE chapters ADD COLUMN internal_index_end INT")
                 self.log_message("تم إضافة عمود internal_index_end لجدول chapters")
             
+            # التحقق من عمود content_hash المستخدم في المزامنة التزايدية
+            cursor.execute("""
+                SELECT COLUMN_NAME 
+                FROM INFORMATION_SCHEMA.COLUMNS 
+                WHERE TABLE_SCHEMA = %s 
+                AND TABLE_NAME = 'pages' 
+                AND COLUMN_NAME = 'content_hash'
+            """, (self.mysql_config['database'],))
+            
+            if not cursor.fetchone():
+                cursor.execute("ALTER TABLE pages ADD COLUMN content_hash CHAR(40) NULL")
+                self.log_message("تم إضافة عمود content_hash لجدول pages")
+            
+            # فهارس فريدة على أسماء المؤلفين والناشرين وعلى أرقام مجلدات كل كتاب،
+            # حتى لا يكرر الإدراج المتزامن أو المزامنة والاستئناف نفس الصف
+            unique_keys = [(table, (name_column,)) for table, name_column in DimensionCache.DIMENSIONS.items()]
+            unique_keys.append(('volumes', ('book_id', 'number')))
+            for table, key_columns in unique_keys:
+                cursor.execute("""
+                    SELECT INDEX_NAME
+                    FROM INFORMATION_SCHEMA.STATISTICS
+                    WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND NON_UNIQUE = 0
+                    GROUP BY INDEX_NAME
+                    HAVING GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) = %s
+                """, (self.mysql_config['database'], table, ",".join(key_columns)))
+                if cursor.fetchone():
+                    continue
+                key_name = f"{table}.({', '.join(key_columns)})"
+                try:
+                    cursor.execute(f"ALTER TABLE {table} ADD UNIQUE INDEX uniq_{table}_{'_'.join(key_columns)} "
+                                   f"({', '.join(key_columns)})")
+                    self.log_message(f"تم إضافة فهرس فريد على {key_name}")
+                except Exception as index_error:
+                    # غالباً صفوف مكررة موجودة مسبقاً: يُستخدم البحث قبل الإدراج بدلاً من ON DUPLICATE KEY
+                    self.log_message(f"تحذير: تعذر إضافة فهرس فريد على {key_name}، "
+                                     f"سيتم البحث عن الصف قبل إدراجه: {str(index_error)}", "WARNING")
+            
+            # جدول نقاط الاستئناف: آخر صفحة تم حفظها لكل كتاب قيد الاستيراد
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS import_progress (
+                    book_id INT NOT NULL PRIMARY KEY,
+                    shamela_id VARCHAR(64),
+                    source_file VARCHAR(255),
+                    source_fingerprint VARCHAR(64),
+                    pages_committed INT NULL,
+                    last_internal_index VARCHAR(64) NULL,
+                    status VARCHAR(16) NOT NULL DEFAULT 'in_progress',
+                    updated_at DATETIME,
+                    INDEX idx_import_progress_source (shamela_id, source_file, status)
+                ) DEFAULT CHARSET=utf8mb4
+            """)
+            
             self.mysql_conn.commit()
             self.log_message("تم التحقق من هيكل قاعدة البيانات وإصلاحها للنظام الجديد")
+            return True
             
         except Exception as e:
             self.log_message(f"خطأ في فحص/إصلاح هيكل قاعدة البيانات: {str(e)}", "ERROR")
+            return False
+    
+    def read_converter_meta(self, keys: List[str]) -> Dict[str, str]:
+        """قراءة قيم من جدول converter_meta (قاموس فارغ إذا لم يكن الجدول موجوداً)"""
+        try:
+            cursor = self.mysql_conn.cursor()
+            placeholders = ", ".join(["%s"] * len(keys))
+            cursor.execute(f"SELECT meta_key, meta_value FROM converter_meta WHERE meta_key IN ({placeholders})", tuple(keys))
+            return {key: value for key, value in cursor.fetchall()}
+        except Exception:
+            return {}
+    
+    def write_converter_meta(self, values: Dict[str, str]):
+        """حفظ قيم في جدول converter_meta مع إنشائه عند الحاجة"""
+        cursor = self.mysql_conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS converter_meta (
+                meta_key VARCHAR(64) NOT NULL PRIMARY KEY,
+                meta_value MEDIUMTEXT,
+                updated_at DATETIME
+            ) DEFAULT CHARSET=utf8mb4
+        """)
+        now = datetime.now()
+        for key, value in values.items():
+            cursor.execute("""
+                INSERT INTO converter_meta (meta_key, meta_value, updated_at)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE meta_value = VALUES(meta_value), updated_at = VALUES(updated_at)
+            """, (key, value, now))
+        self.mysql_conn.commit()
+    
+    def ensure_schema_snapshot(self) -> Optional[SchemaSnapshot]:
+        """تحميل لقطة الهيكل من الذاكرة أو من converter_meta، وإعادة الفحص فقط عند تغير الإصدار المسجل"""
+        meta = self.read_converter_meta(['schema_version', 'schema_snapshot'])
+        try:
+            recorded_version = int(meta.get('schema_version') or 0)
+        except ValueError:
+            recorded_version = 0
+        
+        if recorded_version == CONVERTER_SCHEMA_VERSION:
+            # اللقطة الموجودة في الذاكرة ما زالت صالحة
+            if self.schema_snapshot and self.schema_snapshot.version == recorded_version:
+                return self.schema_snapshot
+            
+            # جلسة جديدة: قراءة اللقطة المحفوظة بدلاً من INFORMATION_SCHEMA
+            if meta.get('schema_snapshot'):
+                try:
+                    self.schema_snapshot = SchemaSnapshot.from_json(meta['schema_snapshot'])
+                    self.log_message(f"تم تحميل لقطة هيكل قاعدة البيانات (الإصدار {recorded_version})")
+                    return self.schema_snapshot
+                except Exception as e:
+                    self.log_message(f"تحذير: لقطة الهيكل المحفوظة غير صالحة، سيعاد الفحص: {str(e)}", "WARNING")
+        
+        # الإصدار المسجل مختلف أو غير موجود: فحص الهيكل وإصلاحه ثم تسجيل لقطة جديدة
+        schema_ok = self.check_and_fix_database_schema()
+        try:
+            cursor = self.mysql_conn.cursor()
+            self.schema_snapshot = SchemaSnapshot.load(cursor, self.mysql_config['database'], CONVERTER_SCHEMA_VERSION)
+            if schema_ok:
+                self.write_converter_meta({
+                    'schema_version': str(CONVERTER_SCHEMA_VERSION),
+                    'schema_snapshot': self.schema_snapshot.to_json()
+                })
+                self.log_message(f"تم تسجيل لقطة هيكل قاعدة البيانات (الإصدار {CONVERTER_SCHEMA_VERSION})")
+        except Exception as e:
+            self.log_message(f"تحذير: تعذر تسجيل لقطة هيكل قاعدة البيانات: {str(e)}", "WARNING")
+        
+        return self.schema_snapshot
+    
+    def invalidate_schema_snapshot(self):
+        """إلغاء لقطة الهيكل بعد تعديل الجداول ليعاد فحصها عند الاتصال التالي"""
+        self.schema_snapshot = None
+        try:
+            cursor = self.mysql_conn.cursor()
+            cursor.execute("DELETE FROM converter_meta WHERE meta_key IN ('schema_version', 'schema_snapshot')")
+            self.mysql_conn.commit()
+        except Exception as e:
+            self.log_message(f"تحذير: تعذر إلغاء لقطة هيكل قاعدة البيانات: {str(e)}", "WARNING")
+    
+    # الجداول التي تؤجل فهارسها الثانوية في وضع التحميل الكثيف
+    BULK_LOAD_TABLES = ('pages', 'chapters')
+    # unique_checks يبقى مفعلاً: إدراج المؤلفين والناشرين والمجلدات يعتمد على ON DUPLICATE KEY لكشف التكرار
+    BULK_LOAD_RELAXED = "SET SESSION foreign_key_checks = 0"
+    BULK_LOAD_RESTORE = "SET SESSION foreign_key_checks = DEFAULT"
+    
+    def deferrable_indexes(self, cursor) -> Dict[str, Dict[str, Dict]]:
+        """الفهارس الثانوية غير الفريدة التي يمكن حذفها وإعادة بنائها بأمان
+        
+        تُستثنى الفهارس التي يحتاجها مفتاح أجنبي (أول عمود فيها عمود مفتاح أجنبي)
+        """
+        tables = self.BULK_LOAD_TABLES
+        placeholders = ", ".join(["%s"] * len(tables))
+        database = self.mysql_config['database']
+        
+        cursor.execute(f"""
+            SELECT TABLE_NAME, COLUMN_NAME
+            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ({placeholders}) AND REFERENCED_TABLE_NAME IS NOT NULL
+        """, (database, *tables))
+        foreign_key_columns = {}
+        for table_name, column_name in cursor.fetchall():
+            foreign_key_columns.setdefault(table_name, set()).add(column_name)
+        
+        cursor.execute(f"""
+            SELECT TABLE_NAME, INDEX_NAME, INDEX_TYPE, COLUMN_NAME, SUB_PART
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ({placeholders})
+              AND INDEX_NAME <> 'PRIMARY' AND NON_UNIQUE = 1 AND INDEX_TYPE IN ('BTREE', 'FULLTEXT')
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """, (database, *tables))
+        indexes = {}
+        for table_name, index_name, index_type, column_name, sub_part in cursor.fetchall():
+            index = indexes.setdefault(table_name, {}).setdefault(
+                index_name, {'fulltext': index_type == 'FULLTEXT', 'columns': []})
+            index['columns'].append(f"`{column_name}`({sub_part})" if sub_part else f"`{column_name}`")
+        
+        for table_name, table_indexes in indexes.items():
+            for index_name in list(table_indexes):
+                first_column = table_indexes[index_name]['columns'][0].split('`')[1]
+                if first_column in foreign_key_columns.get(table_name, ()):
+                    del table_indexes[index_name]
+        return {table_name: table_indexes for table_name, table_indexes in indexes.items() if table_indexes}
+    
+    def read_bulk_load_state(self) -> Optional[Dict]:
+        """حالة التحميل الكثيف المسجلة في converter_meta (الفهارس المحذوفة) أو None"""
+        state = self.read_converter_meta(['bulk_load_state']).get('bulk_load_state')
+        if not state:
+            return None
+        try:
+            return json.loads(state)
+        except ValueError:
+            return None
+    
+    def begin_bulk_load(self, drop_indexes: bool = False):
+        """بدء وضع التحميل الكثيف على كل اتصالات المجمع مع حذف الفهارس الثانوية اختيارياً
+        
+        تعريفات الفهارس تُسجل في converter_meta قبل حذفها لتُعاد حتى بعد توقف مفاجئ
+        """
+        self.connection_pool.session_statements = [self.BULK_LOAD_RELAXED]
+        cursor = self.mysql_conn.cursor()
+        cursor.execute(self.BULK_LOAD_RELAXED)
+        self.log_message("وضع التحميل الكثيف: تم تعطيل foreign_key_checks للجلسة")
+        
+        if not drop_indexes:
+            return
+        
+        state = self.read_bulk_load_state()
+        if state:
+            # توقف سابق أثناء التحميل الكثيف: الفهارس ما زالت محذوفة ولا داعي لإعادة بنائها الآن
+            self.log_message("وضع التحميل الكثيف: متابعة جلسة سابقة لم تُعد فهارسها بعد")
+            return
+        
+        indexes = self.deferrable_indexes(cursor)
+        if not indexes:
+            return
+        self.write_converter_meta({'bulk_load_state': json.dumps({
+            'indexes': indexes,
+            'started_at': datetime.now().isoformat()
+        }, ensure_ascii=False)})
+        
+        for table_name, table_indexes in indexes.items():
+            drops = ", ".join(f"DROP INDEX `{index_name}`" for index_name in table_indexes)
+            cursor.execute(f"ALTER TABLE {table_name} {drops}")
+            self.log_message(f"وضع التحميل الكثيف: تم تأجيل {len(table_indexes)} فهرس في جدول {table_name}")
+        
+        # الفهارس تغيرت: إعادة قراءة لقطة الهيكل قبل أن تنسخها محولات الكتب
+        self.invalidate_schema_snapshot()
+        self.ensure_schema_snapshot()
+    
+    def rebuild_deferred_indexes(self, state: Dict) -> bool:
+        """إعادة بناء الفهارس المؤجلة الناقصة ثم التحقق من وجودها جميعاً"""
+        cursor = self.mysql_conn.cursor()
+        database = self.mysql_config['database']
+        ok = True
+        rebuilt = False
+        
+        for table_name, table_indexes in state.get('indexes', {}).items():
+            cursor.execute("""
+                SELECT DISTINCT INDEX_NAME FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+            """, (database, table_name))
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = {name: index for name, index in table_indexes.items() if name not in existing}
+            
+            # فهارس BTREE في عبارة واحدة لكل جدول، وكل فهرس FULLTEXT في عبارة مستقلة
+            additions = [f"ADD INDEX `{name}` ({', '.join(index['columns'])})"
+                         for name, index in missing.items() if not index['fulltext']]
+            statements = [f"ALTER TABLE {table_name} {', '.join(additions)}"] if additions else []
+            statements += [f"ALTER TABLE {table_name} ADD FULLTEXT INDEX `{name}` ({', '.join(index['columns'])})"
+                           for name, index in missing.items() if index['fulltext']]
+            for statement in statements:
+                try:
+                    cursor.execute(statement)
+                except Exception as e:
+                    self.log_message(f"خطأ في إعادة بناء فهارس جدول {table_name}: {str(e)}", "ERROR")
+            if missing:
+                rebuilt = True
+                self.log_message(f"تمت إعادة بناء {len(missing)} فهرس في جدول {table_name}")
+            
+            # التحقق
+            cursor.execute("""
+                SELECT DISTINCT INDEX_NAME FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+            """, (database, table_name))
+            existing = {row[0] for row in cursor.fetchall()}
+            still_missing = sorted(name for name in table_indexes if name not in existing)
+            if still_missing:
+                ok = False
+                self.log_message(f"فهارس لم تُعد في جدول {table_name}: {', '.join(still_missing)}", "ERROR")
+        
+        if ok:
+            self.write_converter_meta({'bulk_load_state': ''})
+        if rebuilt:
+            self.invalidate_schema_snapshot()
+            self.ensure_schema_snapshot()
+        return ok
+    
+    def end_bulk_load(self) -> bool:
+        """إنهاء وضع التحميل الكثيف: استعادة فحوص الجلسة وإعادة بناء الفهارس المؤجلة مع التحقق"""
+        self.connection_pool.session_statements = [self.BULK_LOAD_RESTORE]
+        cursor = self.mysql_conn.cursor()
+        cursor.execute(self.BULK_LOAD_RESTORE)
+        
+        state = self.read_bulk_load_state()
+        ok = self.rebuild_deferred_indexes(state) if state else True
+        if ok:
+            self.log_message("انتهى وضع التحميل الكثيف وتمت استعادة الفحوص والفهارس")
+        return ok
+    
+    def recover_bulk_load(self) -> bool:
+        """إعادة الفهارس التي بقيت محذوفة بعد توقف مفاجئ أثناء التحميل الكثيف"""
+        state = self.read_bulk_load_state()
+        if not state:
+            return True
+        self.log_message(f"تم العثور على تحميل كثيف لم يكتمل (بدأ {state.get('started_at', '?')})، جارٍ إعادة الفهارس", "WARNING")
+        return self.rebuild_deferred_indexes(state)
+    
+    def read_throughput(self, mode: str) -> Optional[float]:
+        """معدل الصفحات في الثانية المسجل لجلسات سابقة بنفس الوضع (normal أو bulk)"""
+        value = self.read_converter_meta([f'throughput_{mode}']).get(f'throughput_{mode}')
+        try:
+            totals = json.loads(value) if value else None
+            return totals['pages'] / totals['seconds'] if totals and totals['seconds'] > 0 else None
+        except (ValueError, KeyError, TypeError):
+            return None
+    
+    def record_throughput(self, mode: str, pages: int, seconds: float):
+        """إضافة صفحات ومدة جلسة إلى إجمالي الوضع لمقارنة الأداء بين الوضعين"""
+        if pages <= 0 or seconds <= 0:
+            return
+        value = self.read_converter_meta([f'throughput_{mode}']).get(f'throughput_{mode}')
+        try:
+            totals = json.loads(value) if value else {}
+        except ValueError:
+            totals = {}
+        self.write_converter_meta({f'throughput_{mode}': json.dumps({
+            'pages': totals.get('pages', 0) + pages,
+            'seconds': totals.get('seconds', 0) + seconds
+        })})
     
     def connect_access(self, access_file_path: str) -> bool:
         """الاتصال بقاعدة بيانات Access"""
@@ -152,126 +1944,19 @@ class ShamelaConverter:
     
     def clean_text(self, text: str) -> str:
         """تنظيف النص من الأحرف غير المرغوب فيها مع الحفاظ على التشكيل العربي"""
-        if not text:
-            return ""
-        
-        # إزالة الأحرف الخاصة والتحكم مع الحفاظ على التشكيل العربي
-        # نطاق التشكيل العربي: U+064B إلى U+065F, U+0670, U+06D6-U+06ED
-        text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', str(text))
-        # تنظيف المسافات الزائدة مع الحفاظ على فواصل الأسطر
-        text = re.sub(r'[ \t]+', ' ', text)  # استبدال المسافات والتابات المتعددة بمسافة واحدة
-        text = re.sub(r'\n\s*\n', '\n\n', text)  # تنظيف الأسطر الفارغة المتعددة
-        return text.strip()
+        return self.text_normalizer.clean_text(text)
     
     def preserve_arabic_diacritics(self, text: str) -> str:
         """الحفاظ على التشكيل والحركات العربية"""
-        if not text:
-            return ""
-        
-        # التأكد من أن النص يحتوي على أحرف عربية
-        arabic_pattern = r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]'
-        if not re.search(arabic_pattern, text):
-            return text
-        
-        # الحفاظ على جميع علامات التشكيل العربية
-        # التشكيل الأساسي: الفتحة، الضمة، الكسرة، السكون، الشدة، التنوين
-        diacritics_pattern = r'[\u064B-\u065F\u0670\u06D6-\u06ED]'
-        
-        # إزالة الأحرف غير المرغوب فيها مع الحفاظ على التشكيل
-        # إزالة أحرف التحكم فقط وليس التشكيل
-        control_chars = r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]'
-        text = re.sub(control_chars, '', text)
-        
-        return text
+        return self.text_normalizer.preserve_arabic_diacritics(text)
     
     def format_text_to_html(self, text: str) -> str:
         """تحويل النص إلى تنسيق HTML مع وسوم <p> و <br>"""
-        if not text:
-            return ""
-        
-        # الحفاظ على التشكيل أولاً
-        text = self.preserve_arabic_diacritics(text)
-        
-        # معالجة الخطوط الفاصلة === و __________ و ـــــــــ لتكون في أسطر منفصلة
-        # أولاً: معالجة ¬__________ في أي مكان في النص وتوحيدها
-        text = re.sub(r'¬_{3,}', '¬__________', text)
-        # ثانياً: التأكد من أن ¬__________ في سطر منفصل
-        text = re.sub(r'(?<!\n)\s*¬__________\s*(?!\n)', '\n¬__________\n', text)
-        # إضافة أسطر فارغة قبل وبعد === إذا لم تكن موجودة
-        text = re.sub(r'(?<!\n)\s*===\s*(?!\n)', '\n===\n', text)
-        # إضافة أسطر فارغة قبل وبعد __________ إذا لم تكن موجودة (ولكن ليس إذا كانت جزءاً من ¬__________)
-        # نستخدم negative lookbehind للتأكد من عدم وجود ¬ في السطر السابق
-        lines_temp = text.split('\n')
-        for i, line in enumerate(lines_temp):
-            if re.match(r'^_{3,}$', line.strip()):
-                # تحقق من السطر السابق
-                if i > 0 and lines_temp[i-1].strip() == '¬':
-                    continue  # لا تعالج هذا الخط لأنه جزء من ¬__________
-                # إضافة أسطر فارغة قبل وبعد إذا لم تكن موجودة
-                if i > 0 and lines_temp[i-1].strip() != '':
-                    lines_temp[i] = '\n' + line
-                if i < len(lines_temp) - 1 and lines_temp[i+1].strip() != '':
-                    lines_temp[i] = line + '\n'
-        text = '\n'.join(lines_temp)
-        # إضافة أسطر فارغة قبل وبعد ـــــــــ إذا لم تكن موجودة
-        text = re.sub(r'(?<!\n)\s*ـ{5,}\s*(?!\n)', '\n' + 'ـ' * 20 + '\n', text)
-        
-        # تقسيم النص إلى أسطر للمعالجة
-        lines = text.split('\n')
-        html_content = []
-        current_paragraph = []
-        
-        for line in lines:
-            line = line.strip()
-            
-            # إذا كان السطر فارغ، إنهاء الفقرة الحالية
-            if not line:
-                if current_paragraph:
-                    paragraph_text = '<br>\n'.join(current_paragraph)
-                    html_content.append(f'<p>{paragraph_text}</p>')
-                    current_paragraph = []
-            # إذا كان السطر يحتوي على === أو خط فاصل
-            elif line == '===' or re.match(r'^_{3,}$', line) or re.match(r'^ـ{3,}$', line) or re.match(r'^¬_{3,}$', line):
-                # إنهاء الفقرة الحالية إن وجدت
-                if current_paragraph:
-                    paragraph_text = '<br>\n'.join(current_paragraph)
-                    html_content.append(f'<p>{paragraph_text}</p>')
-                    current_paragraph = []
-                # إضافة الخط الفاصل في سطر منفصل
-                html_content.append(f'<p style="text-align: center; margin: 10px 0;">{line}</p>')
-            else:
-                # إضافة السطر للفقرة الحالية
-                current_paragraph.append(line)
-        
-        # إضافة آخر فقرة إن وجدت
-        if current_paragraph:
-            paragraph_text = '<br>\n'.join(current_paragraph)
-            html_content.append(f'<p>{paragraph_text}</p>')
-        
-        # ربط الفقرات
-        return '\n'.join(html_content)
+        return self.html_formatter.format(text)
     
     def extract_arabic_text_enhanced(self, text: str) -> str:
         """استخراج وتحسين النص العربي مع الحفاظ على التشكيل"""
-        if not text:
-            return ""
-        
-        # تنظيف أولي مع الحفاظ على التشكيل
-        text = self.preserve_arabic_diacritics(text)
-        
-        # إزالة الأحرف غير العربية غير المرغوب فيها مع الحفاظ على علامات الترقيم العربية
-        # الحفاظ على: الأحرف العربية، التشكيل، علامات الترقيم، الأرقام العربية والإنجليزية، الرموز الخاصة مثل === و « » والرمز ¬
-        allowed_pattern = r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF\u064B-\u065F\u0670\u06D6-\u06ED0-9\s\n\r.,;:!?()\[\]{}"\'-=«»¬_]'
-        
-        # استخراج الأحرف المسموحة فقط
-        cleaned_chars = re.findall(allowed_pattern, text)
-        cleaned_text = ''.join(cleaned_chars)
-        
-        # تنظيف المسافات مع الحفاظ على بنية النص
-        cleaned_text = re.sub(r'[ \t]+', ' ', cleaned_text)
-        cleaned_text = re.sub(r'\n\s*\n\s*\n+', '\n\n', cleaned_text)
-        
-        return cleaned_text.strip()
+        return self.text_normalizer.extract_arabic_text(text)
     
     def extract_book_info(self) -> Optional[Dict]:
         """استخراج معلومات الكتاب من جدول Main"""
@@ -417,138 +2102,327 @@ class ShamelaConverter:
             self.log_message(f"خطأ في البحث عن أكبر جدول: {e}", "ERROR")
             return None
     
-    def extract_book_content(self, table_name: str) -> List[Dict]:
-        """استخراج محتوى الكتاب من جدول المحتوى مع معلومات الصفحات والمجلدات"""
+    def build_column_plan(self, table_name: str) -> 'ColumnPlan':
+        """تحديد أعمدة جدول المحتوى (النص، المعرف، الصفحة، الجزء) وبناء خطة الأعمدة للكتاب"""
+        cursor = self.access_conn.cursor()
+        
+        # فحص هيكل الجدول أولاً
+        cursor.execute(f"SELECT * FROM [{table_name}] WHERE 1=0")
+        columns = [column[0] for column in cursor.description]
+        string_columns = [column[0] for column in cursor.description if len(column) > 1 and column[1] is str]
+        self.log_message(f"أعمدة الجدول {table_name}: {columns}")
+        
+        # تحديد أعمدة مهمة
+        text_column = None
+        id_column = None
+        page_column = None
+        part_column = None
+        
+        # البحث عن عمود النص
+        for col in columns:
+            col_lower = col.lower()
+            if 'nass' in col_lower or 'text' in col_lower or 'content' in col_lower or 'متن' in col_lower:
+                text_column = col
+                break
+        
+        # البحث عن عمود المعرف
+        for col in columns:
+            col_lower = col.lower()
+            if col_lower in ['id', 'معرف', 'رقم'] or col_lower.endswith('id'):
+                id_column = col
+                break
+        
+        # البحث عن عمود الصفحة
+        for col in columns:
+            col_lower = col.lower()
+            if 'page' in col_lower or 'sahefa' in col_lower or 'صفحة' in col_lower:
+                page_column = col
+                break
+                
+        # البحث عن عمود الجزء
+        for col in columns:
+            col_lower = col.lower()
+            if 'part' in col_lower or 'juz' in col_lower or 'جزء' in col_lower:
+                part_column = col
+                break
+        
+        # إذا لم نجد عمود النص بالاسم نبحث في كل الأعمدة النصية عن نص طويل
+        fallback_text_columns = []
+        if not text_column:
+            fallback_text_columns = string_columns or columns
+        
+        # إذا لم نجد أعمدة محددة، نأخذ أول عمود كمعرف وثاني عمود كنص
+        if not id_column and len(columns) > 0:
+            id_column = columns[0]
+        if not text_column and len(columns) > 1:
+            text_column = columns[1]
+        
+        self.log_message(f"الأعمدة المحددة - المعرف: {id_column}, النص: {text_column}, الصفحة: {page_column}")
+        
+        render_html = self.should_render_html()
+        if not render_html:
+            self.log_message("وضع النص فقط: لن يتم توليد HTML للصفحات لأن جدول pages لن يحفظه")
+        
+        plan = ColumnPlan(table_name, columns, text_column, id_column, page_column, part_column,
+                          fallback_text_columns, render_html)
+        skipped = [col for col in columns if col not in plan.select_columns]
+        if skipped:
+            self.log_message(f"لن تتم قراءة الأعمدة غير المستخدمة: {skipped}")
+        return plan
+    
+    def should_render_html(self) -> bool:
+        """هل يجب توليد HTML للصفحات: فقط إذا لم يكن وضع النص فقط مفعلاً وكان جدول pages يحتوي على content_html"""
+        if self.text_only:
+            return False
+        schema = self.schema_snapshot
+        if schema is None and self.mysql_conn is not None:
+            schema = self.ensure_schema_snapshot()
+        # بدون لقطة للهيكل (قراءة Access فقط) نولد HTML كما في السابق
+        return schema is None or schema.has_column('pages', 'content_html')
+    
+    def execute_ordered_select(self, cursor, plan: 'ColumnPlan', columns: List[str]):
+        """تنفيذ SELECT للأعمدة المحددة مرتباً بالمعرف مع الرجوع لاستعلام بدون ترتيب عند الفشل"""
+        select_list = ", ".join(f"[{col}]" for col in columns)
         try:
-            cursor = self.access_conn.cursor()
-            
-            # فحص هيكل الجدول أولاً
-            cursor.execute(f"SELECT * FROM [{table_name}] WHERE 1=0")
-            columns = [column[0] for column in cursor.description]
-            self.log_message(f"أعمدة الجدول {table_name}: {columns}")
-            
-            # تحديد أعمدة مهمة
-            text_column = None
-            id_column = None
-            page_column = None
-            part_column = None
-            
-            # البحث عن عمود النص
-            for col in columns:
-                col_lower = col.lower()
-                if 'nass' in col_lower or 'text' in col_lower or 'content' in col_lower or 'متن' in col_lower:
-                    text_column = col
-                    break
-            
-            # البحث عن عمود المعرف
-            for col in columns:
-                col_lower = col.lower()
-                if col_lower in ['id', 'معرف', 'رقم'] or col_lower.endswith('id'):
-                    id_column = col
-                    break
-            
-            # البحث عن عمود الصفحة
-            for col in columns:
-                col_lower = col.lower()
-                if 'page' in col_lower or 'sahefa' in col_lower or 'صفحة' in col_lower:
-                    page_column = col
-                    break
-                    
-            # البحث عن عمود الجزء
-            for col in columns:
-                col_lower = col.lower()
-                if 'part' in col_lower or 'juz' in col_lower or 'جزء' in col_lower:
-                    part_column = col
-                    break
-            
-            # إذا لم نجد أعمدة محددة، نأخذ أول عمود كمعرف وثاني عمود كنص
-            if not id_column and len(columns) > 0:
-                id_column = columns[0]
-            if not text_column and len(columns) > 1:
-                text_column = columns[1]
-            
-            self.log_message(f"الأعمدة المحددة - المعرف: {id_column}, النص: {text_column}, الصفحة: {page_column}")
-            
-            # بناء الاستعلام
+            # محاولة الترتيب بالمعرف أولاً
+            cursor.execute(f"SELECT {select_list} FROM [{plan.table_name}] ORDER BY [{plan.id_column}]")
+        except:
+            # إذا فشل، نأخذ بدون ترتيب
+            cursor.execute(f"SELECT {select_list} FROM [{plan.table_name}]")
+    
+    def resolve_page_and_part(self, row_data: Dict, page_column: str, part_column: str):
+        """تحديد رقمي الصفحة والجزء في بيانات الصف"""
+        # تحديد رقم الصفحة
+        if page_column and page_column in row_data:
             try:
-                # محاولة الترتيب بالمعرف أولاً
-                cursor.execute(f"SELECT * FROM [{table_name}] ORDER BY [{id_column}]")
+                row_data['page'] = int(row_data[page_column])
             except:
-                # إذا فشل، نأخذ بدون ترتيب
-                cursor.execute(f"SELECT * FROM [{table_name}]")
-            
-            content_data = []
-            
-            for row in cursor.fetchall():
-                row_data = dict(zip(columns, row))
-                
-                # استخراج وتحسين النص العربي مع الحفاظ على التشكيل
-                raw_text = ""
-                if text_column and text_column in row_data and row_data[text_column]:
-                    raw_text = str(row_data[text_column])
-                elif 'nass' in row_data and row_data['nass']:
-                    raw_text = str(row_data['nass'])
-                else:
-                    # البحث عن أي عمود يحتوي على نص طويل
-                    for key, value in row_data.items():
-                        if isinstance(value, str) and len(value) > 50:
-                            raw_text = str(value)
-                            break
-                
-                # معالجة النص بالطرق الجديدة
-                if raw_text:
-                    # استخراج النص العربي مع الحفاظ على التشكيل
-                    enhanced_text = self.extract_arabic_text_enhanced(raw_text)
-                    # تحويل إلى HTML
-                    row_data['nass'] = enhanced_text
-                    row_data['nass_html'] = self.format_text_to_html(enhanced_text)
-                else:
-                    row_data['nass'] = ''
-                    row_data['nass_html'] = ''
-                
-                # تحديد رقم الصفحة
-                if page_column and page_column in row_data:
-                    try:
-                        row_data['page'] = int(row_data[page_column])
-                    except:
-                        row_data['page'] = 1
-                elif 'page' not in row_data:
-                    row_data['page'] = 1
-                
-                # تحديد رقم الجزء
-                if part_column and part_column in row_data:
-                    try:
-                        row_data['part'] = int(row_data[part_column])
-                    except:
-                        row_data['part'] = 1
-                elif 'part' not in row_data:
-                    row_data['part'] = 1
-                
-                content_data.append(row_data)
-            
-            self.log_message(f"تم استخراج {len(content_data)} صف من جدول {table_name}")
-            
-            # إظهار عينة من البيانات للتأكد
-            if content_data:
-                sample = content_data[0]
-                self.log_message(f"عينة من البيانات: النص={sample.get('nass', '')[:100]}...")
-            
-            return content_data
+                row_data['page'] = 1
+        elif 'page' not in row_data:
+            row_data['page'] = 1
+        
+        # تحديد رقم الجزء
+        if part_column and part_column in row_data:
+            try:
+                row_data['part'] = int(row_data[part_column])
+            except:
+                row_data['part'] = 1
+        elif 'part' not in row_data:
+            row_data['part'] = 1
+    
+    def content_raw_text(self, row_data: Dict, plan: 'ColumnPlan') -> str:
+        """النص الخام لصف المحتوى من عمود النص أو nass أو أول عمود يحتوي على نص طويل"""
+        raw_text = ""
+        text_column = plan.text_column
+        if text_column and text_column in row_data and row_data[text_column]:
+            raw_text = str(row_data[text_column])
+        elif 'nass' in row_data and row_data['nass']:
+            raw_text = str(row_data['nass'])
+        else:
+            # البحث عن أي عمود يحتوي على نص طويل
+            for key in plan.fallback_text_columns:
+                value = row_data.get(key)
+                if isinstance(value, str) and len(value) > 50:
+                    raw_text = str(value)
+                    break
+        return raw_text
+    
+    def page_key(self, row_data: Dict, plan: 'ColumnPlan') -> Tuple:
+        """تحديد الصفحة والجزء في صف المحتوى وإرجاع (المعرف، الجزء)"""
+        self.resolve_page_and_part(row_data, plan.page_column, plan.part_column)
+        return ColumnPlan.content_id(row_data), ColumnPlan.page_part(row_data)
+    
+    def render_content_text(self, raw_text: str, plan: 'ColumnPlan') -> Tuple[str, str]:
+        """تنظيف النص الخام وتنسيقه: (النص، HTML)"""
+        # معالجة النص بالطرق الجديدة
+        if raw_text:
+            # استخراج النص العربي مع الحفاظ على التشكيل
+            enhanced_text = self.extract_arabic_text_enhanced(raw_text)
+            # تحويل إلى HTML فقط إذا كان سيُحفظ
+            html = self.format_text_to_html(enhanced_text) if plan.render_html else ''
+            return enhanced_text, html
+        return '', ''
+    
+    def render_content_texts_profiled(self, raw_texts: List, plan: 'ColumnPlan') -> List[Tuple[str, str]]:
+        """مثل render_content_text لعدة نصوص مع قياس زمن التنظيف وزمن تنسيق HTML كلٌّ على حدة"""
+        rendered = []
+        cleanup_seconds = html_seconds = 0.0
+        for raw_text in raw_texts:
+            if not raw_text:
+                rendered.append(('', ''))
+                continue
+            started = time.perf_counter()
+            enhanced_text = self.extract_arabic_text_enhanced(raw_text)
+            cleaned = time.perf_counter()
+            html = self.format_text_to_html(enhanced_text) if plan.render_html else ''
+            cleanup_seconds += cleaned - started
+            html_seconds += time.perf_counter() - cleaned
+            rendered.append((enhanced_text, html))
+        self.profiler.add('text_cleanup', cleanup_seconds, len(raw_texts))
+        if plan.render_html:
+            self.profiler.add('html_format', html_seconds, len(raw_texts))
+        return rendered
+    
+    def iter_raw_content_chunks(self, plan: 'ColumnPlan', chunk_size: int = None,
+                                skip_rows: int = 0) -> Iterator[List[Dict]]:
+        """قراءة صفوف المحتوى الخام على دفعات باستخدام fetchmany دون معالجة النصوص"""
+        chunk_size = chunk_size or self.content_chunk_rows
+        cursor = self.access_conn.cursor()
+        
+        # بناء الاستعلام بالأعمدة المستخدمة فقط
+        select_columns = plan.select_columns
+        started = time.perf_counter()
+        self.execute_ordered_select(cursor, plan, select_columns)
+        
+        # تجاوز الصفوف المحفوظة مسبقاً عند الاستئناف
+        while skip_rows > 0:
+            rows = cursor.fetchmany(min(chunk_size, skip_rows))
+            if not rows:
+                break
+            skip_rows -= len(rows)
+        
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if self.profiler is not None:
+                self.profile('access_read', started, bytes_read=sum(ConversionProfiler.estimate_bytes(row) for row in rows))
+            yield [dict(zip(select_columns, row)) for row in rows]
+            started = time.perf_counter()
+    
+    def prepare_content_chunk(self, chunk: List[Dict], plan: 'ColumnPlan') -> PageBatch:
+        """معالجة نصوص دفعة من صفوف المحتوى إلى PageBatch، في عمليات فرعية إذا كان مجمع العمليات مفعلاً"""
+        raw_texts = [self.content_raw_text(row_data, plan) for row_data in chunk]
+        keys = [self.page_key(row_data, plan) for row_data in chunk]
+        ids = [content_id for content_id, part_value in keys]
+        
+        if self.text_executor is None and self.profiler is not None:
+            rendered = self.render_content_texts_profiled(raw_texts, plan)
+        elif self.text_executor is None:
+            rendered = [self.render_content_text(raw_text, plan) for raw_text in raw_texts]
+        else:
+            started = time.perf_counter()
+            # إرسال النصوص الخام فقط كـ (المعرف، النص) على أجزاء متساوية بعدد العمليات
+            pages = list(zip(ids, raw_texts))
+            part_size = max(1, -(-len(pages) // self.text_workers))
+            futures = [self.text_executor.submit(render_page_texts, pages[start:start + part_size], plan.render_html)
+                       for start in range(0, len(pages), part_size)]
+            # جمع النتائج بترتيب الإرسال حتى يبقى ترتيب الصفحات كما هو
+            rendered = [item for future in futures for item in future.result()]
+            self.profile('text_processes', started, len(pages))
+        
+        return PageBatch(ids, [part_value for content_id, part_value in keys],
+                         [text for text, html in rendered], [html for text, html in rendered])
+    
+    def start_text_processes(self, workers: int):
+        """تشغيل مجمع عمليات خاص بالمحول لمعالجة النصوص (0 لمعالجتها في خيط المحول)"""
+        self.stop_text_processes()
+        if workers > 0:
+            self.text_executor = ProcessPoolExecutor(max_workers=workers)
+            self.text_workers = workers
+            self.owns_text_executor = True
+    
+    def stop_text_processes(self):
+        """إيقاف مجمع عمليات النصوص إذا كان المحول قد أنشأه"""
+        if self.text_executor is not None and self.owns_text_executor:
+            self.text_executor.shutdown()
+        self.text_executor = None
+        self.text_workers = 1
+        self.owns_text_executor = False
+    
+    def iter_book_content_chunks(self, plan: 'ColumnPlan', chunk_size: int = None,
+                                 pipelined: bool = None, skip_rows: int = 0) -> Iterator[PageBatch]:
+        """قراءة محتوى الكتاب على دفعات بحيث لا يُحمّل الجدول كاملاً في الذاكرة
+        
+        عند تفعيل خط المعالجة تتم القراءة ومعالجة النصوص في خيوط مستقلة بالتوازي مع الكتابة
+        """
+        if pipelined is None:
+            pipelined = self.pipeline_enabled
+        
+        pipeline = None
+        if pipelined:
+            pipeline = ConversionPipeline(lambda: self.iter_raw_content_chunks(plan, chunk_size, skip_rows),
+                                          lambda chunk: self.prepare_content_chunk(chunk, plan),
+                                          self.pipeline_queue_size, self.cancel_event)
+            chunks = pipeline.chunks()
+        else:
+            chunks = (self.prepare_content_chunk(chunk, plan)
+                      for chunk in self.iter_raw_content_chunks(plan, chunk_size, skip_rows))
+        
+        total_rows = 0
+        for chunk in chunks:
+            if total_rows == 0:
+                # إظهار عينة من البيانات للتأكد
+                self.log_message(f"عينة من البيانات: النص={chunk.texts[0][:100]}...")
+            total_rows += len(chunk)
+            yield chunk
+        
+        self.log_message(f"تم استخراج {total_rows} صف من جدول {plan.table_name}")
+        if pipeline:
+            self.log_message(pipeline.timing_summary())
+    
+    def extract_content_skeleton(self, plan: 'ColumnPlan') -> PageBatch:
+        """قراءة الهيكل الخفيف للمحتوى (المعرف والجزء لكل صفحة) دون النصوص
+        
+        يكفي هذا الهيكل لإنشاء المجلدات وتحديد نطاقات الفصول قبل بدء قراءة النصوص على دفعات
+        """
+        cursor = self.access_conn.cursor()
+        skeleton_columns = plan.skeleton_columns
+        started = time.perf_counter()
+        self.execute_ordered_select(cursor, plan, skeleton_columns)
+        rows = cursor.fetchall()
+        if self.profiler is not None:
+            self.profile('access_read', started, bytes_read=sum(ConversionProfiler.estimate_bytes(row) for row in rows))
+        
+        ids = []
+        parts = []
+        for row in rows:
+            row_data = dict(zip(skeleton_columns, row))
+            self.resolve_page_and_part(row_data, None, plan.part_column)
+            ids.append(ColumnPlan.content_id(row_data))
+            parts.append(ColumnPlan.page_part(row_data))
+        return PageBatch(ids, parts)
+    
+    def open_book_content_stream(self, table_name: str) -> Optional['BookContentStream']:
+        """تجهيز قراءة محتوى الكتاب على دفعات: الهيكل الخفيف أولاً ثم النصوص عند الكتابة"""
+        try:
+            plan = self.build_column_plan(table_name)
+            skeleton = self.extract_content_skeleton(plan)
+            self.log_message(f"تم تحديد {len(skeleton)} صف في جدول {table_name}، ستتم قراءة النصوص على دفعات")
+            return BookContentStream(plan, skeleton, lambda skip_rows=0: self.iter_book_content_chunks(plan, skip_rows=skip_rows))
+        except Exception as e:
+            self.log_message(f"خطأ في استخراج محتوى الكتاب من {table_name}: {str(e)}", "ERROR")
+            return None
+    
+    def extract_book_content(self, table_name: str) -> PageBatch:
+        """استخراج محتوى الكتاب من جدول المحتوى مع معلومات الصفحات والمجلدات"""
+        try:
+            plan = self.build_column_plan(table_name)
+            return PageBatch.concat(list(self.iter_book_content_chunks(plan, pipelined=False)))
             
         except Exception as e:
             self.log_message(f"خطأ في استخراج محتوى الكتاب من {table_name}: {str(e)}", "ERROR")
-            return []
+            return PageBatch(texts=[], htmls=[])
     
     def extract_book_index(self, table_name: str) -> List[Dict]:
         """استخراج فهرس الكتاب من جدول الفهرس"""
         try:
             cursor = self.access_conn.cursor()
-            cursor.execute(f"SELECT * FROM [{table_name}] ORDER BY id")
+            
+            # قراءة أعمدة الفهرس المستخدمة فقط (المعرف والعنوان والمستوى)
+            cursor.execute(f"SELECT * FROM [{table_name}] WHERE 1=0")
+            columns = [column[0] for column in cursor.description if column[0] in ('id', 'tit', 'lvl')]
+            select_list = ", ".join(f"[{col}]" for col in columns) or "*"
+            started = time.perf_counter()
+            cursor.execute(f"SELECT {select_list} FROM [{table_name}] ORDER BY id")
+            rows = cursor.fetchall()
+            if self.profiler is not None:
+                self.profile('access_read', started, bytes_read=sum(ConversionProfiler.estimate_bytes(row) for row in rows))
             
             columns = [column[0] for column in cursor.description]
             index_data = []
             
-            for row in cursor.fetchall():
+            for row in rows:
                 row_data = dict(zip(columns, row))
                 # تنظيف العنوان
                 if 'tit' in row_data and row_data['tit']:
@@ -562,28 +2436,25 @@ class ShamelaConverter:
             self.log_message(f"خطأ في استخراج فهرس الكتاب من {table_name}: {str(e)}", "ERROR")
             return []
     
+    def dimension_has_unique_name(self, table: str) -> bool:
+        """هل يحمي فهرس فريد عمود الاسم في جدول المؤلفين أو الناشرين"""
+        schema = self.schema_snapshot or self.ensure_schema_snapshot()
+        return bool(schema and schema.has_unique_index(table, DimensionCache.DIMENSIONS[table]))
+    
+    def volumes_have_unique_key(self) -> bool:
+        """هل يحمي فهرس فريد أرقام مجلدات كل كتاب (book_id, number)"""
+        schema = self.schema_snapshot or self.ensure_schema_snapshot()
+        return bool(schema and schema.has_unique_index('volumes', 'book_id', 'number'))
+    
     def insert_author(self, author_name: str) -> int:
         """إدراج مؤلف جديد وإرجاع معرفه"""
         try:
-            cursor = self.mysql_conn.cursor()
-            
-            # التحقق من وجود المؤلف
-            cursor.execute("SELECT id FROM authors WHERE full_name = %s", (author_name,))
-            existing = cursor.fetchone()
+            cursor = self.mysql_cursor()
+            author_id, created = self.dimension_cache.get_or_create(cursor, 'authors', author_name, datetime.now(),
+                                                                    self.dimension_has_unique_name('authors'))
             
-            if existing:
-                return existing[0]
-            
-            # إدراج مؤلف جديد
-            insert_query = """
-                INSERT INTO authors (full_name, created_at, updated_at)
-                VALUES (%s, %s, %s)
-            """
-            now = datetime.now()
-            cursor.execute(insert_query, (author_name, now, now))
-            author_id = cursor.lastrowid
-            
-            self.log_message(f"تم إدراج مؤلف جديد: {author_name}")
+            if created:
+                self.log_message(f"تم إدراج مؤلف جديد: {author_name}")
             return author_id
             
         except Exception as e:
@@ -593,25 +2464,12 @@ class ShamelaConverter:
     def insert_publisher(self, publisher_name: str) -> int:
         """إدراج ناشر جديد وإرجاع معرفه"""
         try:
-            cursor = self.mysql_conn.cursor()
-            
-            # التحقق من وجود الناشر
-            cursor.execute("SELECT id FROM publishers WHERE name = %s", (publisher_name,))
-            existing = cursor.fetchone()
+            cursor = self.mysql_cursor()
+            publisher_id, created = self.dimension_cache.get_or_create(cursor, 'publishers', publisher_name, datetime.now(),
+                                                                       self.dimension_has_unique_name('publishers'))
             
-            if existing:
-                return existing[0]
-            
-            # إدراج ناشر جديد
-            insert_query = """
-                INSERT INTO publishers (name, created_at, updated_at)
-                VALUES (%s, %s, %s)
-            """
-            now = datetime.now()
-            cursor.execute(insert_query, (publisher_name, now, now))
-            publisher_id = cursor.lastrowid
-            
-            self.log_message(f"تم إدراج ناشر جديد: {publisher_name}")
+            if created:
+                self.log_message(f"تم إدراج ناشر جديد: {publisher_name}")
             return publisher_id
             
         except Exception as e:
@@ -621,7 +2479,7 @@ class ShamelaConverter:
     def insert_book(self, book_info: Dict, author_id: int, publisher_id: int) -> int:
         """إدراج كتاب جديد"""
         try:
-            cursor = self.mysql_conn.cursor()
+            cursor = self.mysql_cursor()
             
             # استخراج المعلومات المهمة
             title = book_info.get('Bk', 'كتاب بدون عنوان')
@@ -653,19 +2511,265 @@ class ShamelaConverter:
             return book_id
             
         except Exception as e:
-            self.log_message(f"خطأ في إدراج الكتاب: {str(e)}", "ERROR")
-            return 1
+            self.log_message(f"خطأ في إدراج الكتاب: {str(e)}", "ERROR")
+            return 1
+    
+    def sync_book(self, book_info: Dict, author_id: int, publisher_id: int) -> Tuple[int, bool]:
+        """إرجاع (معرف الكتاب، هل كان موجوداً) مع تحديث بيانات الكتاب الموجود بنفس shamela_id أو إدراج كتاب جديد"""
+        shamela_id = str(book_info.get('BkId', ''))
+        if shamela_id:
+            try:
+                cursor = self.mysql_cursor()
+                cursor.execute("SELECT id FROM books WHERE shamela_id = %s ORDER BY id DESC LIMIT 1", (shamela_id,))
+                row = cursor.fetchone()
+                if row:
+                    book_id = row[0]
+                    title = book_info.get('Bk', 'كتاب بدون عنوان')
+                    cursor.execute("""
+                        UPDATE books SET title = %s, description = %s, publisher_id = %s, updated_at = %s
+                        WHERE id = %s
+                    """, (title, book_info.get('Betaka', ''), publisher_id, datetime.now(), book_id))
+                    self.log_message(f"مزامنة الكتاب الموجود: {title} (المعرف {book_id})")
+                    return book_id, True
+            except Exception as e:
+                self.log_message(f"خطأ في البحث عن الكتاب الموجود: {str(e)}", "ERROR")
+        
+        return self.insert_book(book_info, author_id, publisher_id), False
+    
+    @staticmethod
+    def page_hash(content_text: str, content_html: Optional[str], part_value) -> str:
+        """بصمة محتوى الصفحة (النص و HTML والجزء) لمقارنة الصفحات عند المزامنة"""
+        digest = hashlib.sha1()
+        digest.update((content_text or '').encode('utf-8'))
+        digest.update(b'\x1f')
+        digest.update((content_html or '').encode('utf-8'))
+        digest.update(b'\x1f')
+        digest.update(str(part_value).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def load_existing_chapters(self, cursor, book_id: int) -> Dict:
+        """فصول الكتاب الموجودة: order -> قائمة (المعرف، (المجلد، العنوان، المستوى، البداية، النهاية)) بترتيب الإدراج"""
+        cursor.execute("""
+            SELECT id, `order`, volume_id, title, level, page_start, page_end
+            FROM chapters WHERE book_id = %s ORDER BY id
+        """, (book_id,))
+        existing = {}
+        for chapter_id, order, *values in cursor.fetchall():
+            existing.setdefault(order, []).append((chapter_id, tuple(values)))
+        return existing
+    
+    def load_existing_pages(self, cursor, book_id: int, with_hash: bool) -> Dict:
+        """صفحات الكتاب الموجودة: internal_index -> (page_number، chapter_id، content_hash)"""
+        hash_column = "content_hash" if with_hash else "NULL"
+        cursor.execute(f"SELECT internal_index, page_number, chapter_id, {hash_column} FROM pages WHERE book_id = %s",
+                       (book_id,))
+        return {str(internal_index): (page_number, chapter_id, content_hash)
+                for internal_index, page_number, chapter_id, content_hash in cursor.fetchall()}
+    
+    def update_synced_page(self, cursor, book_id: int, row: Tuple, page_number: int, with_html: bool,
+                           with_hash: bool, now: datetime):
+        """تحديث صفحة موجودة تغير محتواها"""
+        content_id, chapter_id, content_text, content_html, part_value, content_hash = row
+        assignments = ["chapter_id = %s", "page_number = %s", "content = %s"]
+        params = [chapter_id, page_number, content_text]
+        if with_html:
+            assignments.append("content_html = %s")
+            params.append(content_html)
+        assignments.append("part = %s")
+        params.append(part_value)
+        if with_hash:
+            assignments.append("content_hash = %s")
+            params.append(content_hash)
+        assignments.append("updated_at = %s")
+        params.append(now)
+        cursor.execute(f"UPDATE pages SET {', '.join(assignments)} WHERE book_id = %s AND internal_index = %s",
+                       (*params, book_id, str(content_id)))
+    
+    def update_page_positions(self, cursor, book_id: int, positions: Dict[str, Tuple[int, int]], now: datetime,
+                              chunk_size: int = 1000):
+        """تحديث page_number و chapter_id لصفحات لم يتغير محتواها بعبارة UPDATE واحدة تعتمد على CASE لكل مجموعة"""
+        keys = sorted(positions)
+        for offset in range(0, len(keys), chunk_size):
+            chunk = keys[offset:offset + chunk_size]
+            cases = " ".join(["WHEN %s THEN %s"] * len(chunk))
+            number_params = []
+            chapter_params = []
+            for key in chunk:
+                page_number, chapter_id = positions[key]
+                number_params.extend((key, page_number))
+                chapter_params.extend((key, chapter_id))
+            cursor.execute(f"""
+                UPDATE pages
+                SET page_number = CASE internal_index {cases} END,
+                    chapter_id = CASE internal_index {cases} END,
+                    updated_at = %s
+                WHERE book_id = %s AND internal_index IN ({", ".join(["%s"] * len(chunk))})
+            """, (*number_params, *chapter_params, now, book_id, *chunk))
+    
+    def delete_stale_rows(self, cursor, table: str, key_column: str, keys: List, book_id: int, chunk_size: int = 1000):
+        """حذف صفوف الكتاب التي لم تعد موجودة في المصدر"""
+        for offset in range(0, len(keys), chunk_size):
+            chunk = keys[offset:offset + chunk_size]
+            cursor.execute(f"DELETE FROM {table} WHERE book_id = %s AND {key_column} IN ({', '.join(['%s'] * len(chunk))})",
+                           (book_id, *chunk))
+    
+    def checkpoints_enabled(self) -> bool:
+        """نقاط الاستئناف تحتاج جدول import_progress"""
+        schema = self.schema_snapshot or self.ensure_schema_snapshot()
+        return bool(self.commit_policy.checkpoint_rows() and schema and schema.has_table('import_progress'))
+    
+    @staticmethod
+    def source_fingerprint(access_file_path: str) -> str:
+        """بصمة سريعة لملف المصدر (الحجم ووقت التعديل) للتأكد من أنه لم يتغير قبل الاستئناف"""
+        try:
+            stat = os.stat(access_file_path)
+            return f"{stat.st_size}:{int(stat.st_mtime)}"
+        except OSError:
+            return ''
+    
+    def find_resumable_import(self, shamela_id: str, source_file: str) -> Optional[Tuple]:
+        """استيراد سابق لم يكتمل لنفس الملف: (معرف الكتاب، عدد الصفحات المحفوظة، آخر internal_index، بصمة المصدر)"""
+        try:
+            cursor = self.mysql_cursor()
+            cursor.execute("""
+                SELECT p.book_id, p.pages_committed, p.last_internal_index, p.source_fingerprint
+                FROM import_progress p JOIN books b ON b.id = p.book_id
+                WHERE p.shamela_id = %s AND p.source_file = %s AND p.status = 'in_progress'
+                ORDER BY p.updated_at DESC LIMIT 1
+            """, (shamela_id, source_file))
+            return cursor.fetchone()
+        except Exception as e:
+            self.log_message(f"تحذير: تعذر البحث عن استيراد غير مكتمل: {str(e)}", "WARNING")
+            return None
+    
+    def start_import_progress(self, book_id: int, shamela_id: str, source_file: str, fingerprint: str,
+                              pages_committed: Optional[int]):
+        """تسجيل بدء استيراد الكتاب (يُحفظ مع أول نقطة استئناف)"""
+        cursor = self.mysql_cursor()
+        cursor.execute("""
+            INSERT INTO import_progress (book_id, shamela_id, source_file, source_fingerprint, pages_committed,
+                                         last_internal_index, status, updated_at)
+            VALUES (%s, %s, %s, %s, %s, NULL, 'in_progress', %s)
+            ON DUPLICATE KEY UPDATE shamela_id = VALUES(shamela_id), source_file = VALUES(source_file),
+                                    source_fingerprint = VALUES(source_fingerprint),
+                                    pages_committed = VALUES(pages_committed), last_internal_index = NULL,
+                                    status = 'in_progress', updated_at = VALUES(updated_at)
+        """, (book_id, shamela_id, source_file, fingerprint, pages_committed, datetime.now()))
+    
+    def checkpoint_import(self, cursor, book_id: int, pages_committed: Optional[int], last_internal_index):
+        """حفظ ما كُتب حتى الآن وتسجيل نقطة الاستئناف في نفس المعاملة"""
+        cursor.execute("""
+            UPDATE import_progress SET pages_committed = %s, last_internal_index = %s, updated_at = %s
+            WHERE book_id = %s
+        """, (pages_committed, None if last_internal_index is None else str(last_internal_index),
+              datetime.now(), book_id))
+        started = time.perf_counter()
+        self.mysql_conn.commit()
+        self.profile('commit', started)
+        self.dimension_cache.commit()
     
-    def insert_pages_and_chapters(self, book_id: int, content_data: List[Dict], index_data: List[Dict]):
-        """إدراج الصفحات والفصول مع ربط صحيح بناءً على ID من Access"""
+    def finish_import_progress(self, book_id: int):
+        """تعليم الاستيراد كمكتمل (يُحفظ مع بقية الكتاب)"""
+        cursor = self.mysql_cursor()
+        cursor.execute("UPDATE import_progress SET status = 'completed', updated_at = %s WHERE book_id = %s",
+                       (datetime.now(), book_id))
+    
+    def create_volumes(self, cursor, book_id: int, parts, now: datetime):
+        """إنشاء مجلدات الكتاب الناقصة بعبارة واحدة متعددة الصفوف، والموجودة مسبقاً تُستخدم كما هي
+        
+        يرجع (خريطة part -> volume_id، خريطة volume_id -> العنوان) أو (None, None) عند الفشل
+        """
+        # تحويل أرقام الأجزاء إلى أسماء عربية
+        arabic_ordinals = {
+            1: "الأول", 2: "الثاني", 3: "الثالث", 4: "الرابع", 5: "الخامس",
+            6: "السادس", 7: "السابع", 8: "الثامن", 9: "التاسع", 10: "العاشر"
+        }
+        
+        part_numbers = sorted(parts)
+        if not part_numbers:
+            return {}, {}
+        
+        def load_existing():
+            # أقدم مجلد لكل رقم، وأي نسخة مكررة قديمة تُحذف كمجلد زائد عند المزامنة
+            cursor.execute("SELECT id, number, title FROM volumes WHERE book_id = %s ORDER BY id", (book_id,))
+            volumes = {}
+            for volume_id, number, title in cursor.fetchall():
+                volumes.setdefault(number, (volume_id, title))
+            return volumes
+        
         try:
-            cursor = self.mysql_conn.cursor()
+            # البحث قبل الإدراج: عند المزامنة والاستئناف تُدرج فقط المجلدات الناقصة
+            existing = load_existing()
+            missing = [part_num for part_num in part_numbers if part_num not in existing]
+            if missing:
+                params = []
+                for part_num in missing:
+                    ordinal = arabic_ordinals.get(part_num, f"الـ{part_num}")
+                    params.extend((book_id, part_num, f"المجلد {ordinal}", now, now))
+                # القيد الفريد (book_id, number) إن وجد يحمي من إدراج متزامن لنفس المجلد
+                on_duplicate = "ON DUPLICATE KEY UPDATE id = id" if self.volumes_have_unique_key() else ""
+                cursor.execute(f"""
+                    INSERT INTO volumes (book_id, number, title, created_at, updated_at)
+                    VALUES {", ".join(["(%s, %s, %s, %s, %s)"] * len(missing))}
+                    {on_duplicate}
+                """, params)
+                existing = load_existing()
+        except Exception as vol_error:
+            self.log_message(f"خطأ في إنشاء المجلدات: {str(vol_error)}", "ERROR")
+            return None, None
+        
+        volume_map = {}  # خريطة part -> volume_id
+        volume_titles = {}  # خريطة volume_id -> عنوان المجلد (بدلاً من الاستعلام عنه لاحقاً)
+        for part_num in part_numbers:
+            if part_num not in existing:
+                self.log_message(f"خطأ في إنشاء المجلد رقم {part_num}", "ERROR")
+                return None, None
+            volume_id, volume_title = existing[part_num]
+            volume_map[part_num] = volume_id
+            volume_titles[volume_id] = volume_title
+            if part_num in missing:
+                self.log_message(f"تم إنشاء {volume_title} برقم {volume_id}")
+                self.events.publish(VolumeCreated(book_id, volume_id, part_num, volume_title))
+        if len(missing) < len(part_numbers):
+            self.log_message(f"المجلدات الموجودة مسبقاً: {len(part_numbers) - len(missing)}")
+        
+        return volume_map, volume_titles
+    
+    def insert_pages_and_chapters(self, book_id: int, content_data, index_data: List[Dict], sync: bool = False,
+                                  resume_pages: Optional[int] = None, resume_key=None, checkpoint: bool = False):
+        """إدراج الصفحات والفصول مع ربط صحيح بناءً على ID من Access
+        
+        content_data: PageBatch أو قائمة صفوف المحتوى أو BookContentStream للقراءة على دفعات
+        sync: الكتاب موجود مسبقاً، فتُكتب فقط الصفحات والفصول التي تغيرت ويُحذف ما لم يعد موجوداً
+        resume_pages/resume_key: استئناف استيراد سابق حُفظت أول resume_pages صفحة منه وآخرها resume_key
+        checkpoint: حفظ ما كُتب كل عدد من الصفحات حسب سياسة الحفظ مع تسجيل نقطة الاستئناف
+        """
+        content_rows = None
+        write_started = time.perf_counter()
+        try:
+            cursor = self.mysql_cursor()
             now = datetime.now()
             
+            # الهيكل الخفيف يكفي للمجلدات ونطاقات الفصول، والصفحات الكاملة تُقرأ عند الكتابة
+            if not isinstance(content_data, (BookContentStream, PageBatch)):
+                content_data = PageBatch.from_rows(content_data)
+            content_skeleton = content_data.skeleton if isinstance(content_data, BookContentStream) else content_data
+            
+            # الاستئناف من نقطة الحفظ ممكن فقط إذا كانت الصفحة في نفس الموقع ما زالت نفسها في المصدر
+            if resume_pages:
+                resume_ids = list(PageBatch.column_values(content_skeleton.ids[resume_pages - 1:resume_pages]))
+                if not resume_ids or str(resume_ids[0]) != str(resume_key):
+                    self.log_message("نقطة الاستئناف لا تطابق المصدر، ستتم مزامنة الكتاب بالكامل", "WARNING")
+                    resume_pages = None
+            
+            if resume_pages and isinstance(content_data, BookContentStream):
+                content_rows = content_data.pages(resume_pages)
+            else:
+                content_rows = content_data.pages()
+            
             # تحديد قيم الأجزاء الموجودة في البيانات
             parts_in_data = set()
-            for content_item in content_data:
-                part_value = content_item.get('part') or content_item.get('Part')
+            for part_value in PageBatch.column_values(content_skeleton.parts):
                 if part_value is not None:
                     try:
                         parts_in_data.add(int(part_value))
@@ -675,49 +2779,15 @@ class ShamelaConverter:
                     parts_in_data.add(1)  # قيمة افتراضية
             
             # إنشاء مجلدات حسب الأجزاء الموجودة
-            volume_map = {}  # خريطة part -> volume_id
-            
-            # تحويل أرقام الأجزاء إلى أسماء عربية
-            arabic_ordinals = {
-                1: "الأول", 2: "الثاني", 3: "الثالث", 4: "الرابع", 5: "الخامس",
-                6: "السادس", 7: "السابع", 8: "الثامن", 9: "التاسع", 10: "العاشر"
-            }
-            
-            for part_num in sorted(parts_in_data):
-                ordinal = arabic_ordinals.get(part_num, f"الـ{part_num}")
-                volume_title = f"المجلد {ordinal}"
-                
-                try:
-                    volume_query = """
-                        INSERT INTO volumes (book_id, number, title, created_at, updated_at)
-                        VALUES (%s, %s, %s, %s, %s)
-                    """
-                    cursor.execute(volume_query, (book_id, part_num, volume_title, now, now))
-                    volume_id = cursor.lastrowid
-                    volume_map[part_num] = volume_id
-                    self.log_message(f"تم إنشاء {volume_title} برقم {volume_id}")
-                    
-                except Exception as vol_error:
-                    if "Duplicate entry" in str(vol_error):
-                        # المجلد موجود مسبقاً، استخدم الموجود
-                        cursor.execute("SELECT id FROM volumes WHERE book_id = %s AND number = %s", (book_id, part_num))
-                        existing_volume = cursor.fetchone()
-                        if existing_volume:
-                            volume_id = existing_volume[0]
-                            volume_map[part_num] = volume_id
-                            self.log_message(f"استخدام {volume_title} الموجود برقم {volume_id}")
-                        else:
-                            self.log_message(f"خطأ في إنشاء {volume_title}: {str(vol_error)}", "ERROR")
-                            return
-                    else:
-                        self.log_message(f"خطأ في إنشاء {volume_title}: {str(vol_error)}", "ERROR")
-                        return
+            volume_map, volume_titles = self.create_volumes(cursor, book_id, parts_in_data, now)
+            if volume_map is None:
+                return False
             
             # استخدام المجلد الأول كافتراضي إذا لم يتم العثور على part
             default_volume_id = volume_map.get(1, list(volume_map.values())[0] if volume_map else None)
             if not default_volume_id:
                 self.log_message("خطأ: لم يتم إنشاء أي مجلد", "ERROR")
-                return
+                return False
             
             # 1. إدراج الفصول أولاً - استخدام ID من Access كنقاط بداية ونهاية
             chapter_data = {}  # خريطة لحفظ معلومات الفصول {access_id: chapter_db_id}
@@ -726,48 +2796,81 @@ class ShamelaConverter:
             
             self.log_message(f"بدء معالجة {len(sorted_index)} فصل بناءً على ID من Access")
             
+            # تحديد نطاق ID لكل فصل (هذا هو المفتاح الصحيح!) وبناء فهرس النطاقات
+            last_content_id = max(PageBatch.column_values(content_skeleton.ids)) if sorted_index else None
+            chapter_ranges = ChapterIntervalIndex()
+            for i, index_item in enumerate(sorted_index):
+                start_id = index_item.get('id')
+                if i < len(sorted_index) - 1:
+                    end_id = sorted_index[i + 1].get('id') - 1  # قبل بداية الفصل التالي
+                else:
+                    # الفصل الأخير - أخذ آخر ID من المحتوى
+                    end_id = last_content_id
+                chapter_ranges.add(start_id, end_id, i)
+            
+            # البحث عن الجزء الذي تنتمي إليه أول صفحة في كل فصل بمرور واحد على المحتوى
+            chapter_first_part = {}  # موقع الفصل في الفهرس -> رقم الجزء
+            for content_id, page_part in content_skeleton.keys():
+                position = chapter_ranges.find(content_id)
+                if position is None or position in chapter_first_part:
+                    continue
+                if page_part is not None:
+                    try:
+                        chapter_first_part[position] = int(page_part)  # نأخذ الجزء من أول صفحة فقط
+                    except:
+                        pass
+            
+            chapter_db_ids = {}  # موقع الفصل في الفهرس -> معرف الفصل في قاعدة البيانات
+            
+            # عند المزامنة: الفصول الموجودة مسبقاً مفهرسة بـ order (ID بداية الفصل في Access)
+            existing_chapters = self.load_existing_chapters(cursor, book_id) if sync else None
+            chapters_updated = 0
+            chapter_stored_ranges = {}  # عند المزامنة: معرف الفصل -> (page_start، page_end) المخزن حالياً
+            chapter_access_ranges = {}  # معرف الفصل -> نطاق ID من Access (النطاق النهائي للفصل بلا صفحات)
+            
             for i, index_item in enumerate(sorted_index):
                 chapter_start_id = index_item.get('id')  # ID من جدول الفهرس = نقطة البداية
                 chapter_title = self.clean_text(index_item.get('tit', f'فصل {chapter_start_id}'))
                 chapter_level = index_item.get('lvl', 1)
                 
-                # تحديد نطاق ID للفصل (هذا هو المفتاح الصحيح!)
                 start_id = chapter_start_id
                 if i < len(sorted_index) - 1:
-                    end_id = sorted_index[i + 1].get('id') - 1  # قبل بداية الفصل التالي
+                    end_id = sorted_index[i + 1].get('id') - 1
                 else:
-                    # الفصل الأخير - أخذ آخر ID من المحتوى
-                    end_id = max([item.get('id', 0) for item in content_data])
+                    end_id = last_content_id
                 
                 # تحديد المجلد المناسب للفصل بناءً على الجزء الذي تنتمي إليه الصفحة الأولى
                 chapter_volume_id = default_volume_id  # قيمة افتراضية
+                if i in chapter_first_part:
+                    chapter_volume_id = volume_map.get(chapter_first_part[i], default_volume_id)
                 
-                # البحث عن أول صفحة في هذا الفصل لمعرفة الجزء
-                for content_item in content_data:
-                    content_id = content_item.get('id', 0)
-                    if start_id <= content_id <= end_id:
-                        # وجدنا صفحة تنتمي لهذا الفصل
-                        page_part = content_item.get('part') or content_item.get('Part')
-                        if page_part is not None:
-                            try:
-                                page_part = int(page_part)
-                                chapter_volume_id = volume_map.get(page_part, default_volume_id)
-                                break  # نأخذ الجزء من أول صفحة فقط
-                            except:
-                                pass
-                
-                # إدراج الفصل
-                chapter_query = """
-                    INSERT INTO chapters (book_id, volume_id, title, level, page_start, page_end, 
-                                        `order`, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                cursor.execute(chapter_query, (
-                    book_id, chapter_volume_id, chapter_title, chapter_level,
-                    start_id, end_id, chapter_start_id, now, now
-                ))
-                
-                db_chapter_id = cursor.lastrowid
+                if existing_chapters is not None and existing_chapters.get(chapter_start_id):
+                    # الفصل موجود: تحديث بياناته فقط إذا تغيرت، والنطاق يُقارن بالنطاق النهائي بعد كتابة الصفحات
+                    db_chapter_id, old_values = existing_chapters[chapter_start_id].pop(0)
+                    new_values = (chapter_volume_id, chapter_title, chapter_level)
+                    if old_values[:3] != new_values:
+                        cursor.execute("""
+                            UPDATE chapters SET volume_id = %s, title = %s, level = %s, updated_at = %s
+                            WHERE id = %s
+                        """, (*new_values, now, db_chapter_id))
+                        chapters_updated += 1
+                    chapter_stored_ranges[db_chapter_id] = old_values[3:]
+                else:
+                    # إدراج الفصل
+                    chapter_query = """
+                        INSERT INTO chapters (book_id, volume_id, title, level, page_start, page_end, 
+                                            `order`, created_at, updated_at)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """
+                    cursor.execute(chapter_query, (
+                        book_id, chapter_volume_id, chapter_title, chapter_level,
+                        start_id, end_id, chapter_start_id, now, now
+                    ))
+                    
+                    db_chapter_id = cursor.lastrowid
+                    chapter_stored_ranges[db_chapter_id] = (start_id, end_id)
+                chapter_db_ids[i] = db_chapter_id
+                chapter_access_ranges[db_chapter_id] = (start_id, end_id)
                 chapter_count += 1
                 
                 # حفظ معلومات الفصل للاستخدام في ربط الصفحات
@@ -779,10 +2882,10 @@ class ShamelaConverter:
                     'volume_id': chapter_volume_id
                 }
                 
+                self.events.publish(ChapterRangeResolved(book_id, db_chapter_id, start_id, end_id, chapter_volume_id))
+                
                 # الحصول على اسم المجلد للطباعة
-                cursor.execute("SELECT title FROM volumes WHERE id = %s", (chapter_volume_id,))
-                volume_result = cursor.fetchone()
-                volume_title = volume_result[0] if volume_result else "غير معروف"
+                volume_title = volume_titles.get(chapter_volume_id, "غير معروف")
                 
                 self.log_message(f"فصل '{chapter_title}': ID من {start_id} إلى {end_id} في {volume_title}")
             
@@ -793,16 +2896,41 @@ class ShamelaConverter:
             pages_without_chapter = 0
             pages_with_chapter = 0
             part_stats = {}  # إحصائيات توزيع الصفحات حسب part
-            
-            self.log_message(f"بدء معالجة {len(content_data)} صفحة مع ربط بناءً على ID من Access")
-            
-            for content_item in content_data:
-                content_id = content_item.get('id', 0)  # ID الفعلي من Access
-                page_num = content_item.get('page', content_id)  # رقم الصفحة المطبوعة
-                content_text = content_item.get('nass', '')
+            chapter_pages = {}  # chapter_id -> [عدد الصفحات، أول page_number، آخر page_number]
+            
+            self.log_message(f"بدء معالجة {len(content_skeleton)} صفحة مع ربط بناءً على ID من Access")
+            
+            # التحقق من وجود عمود content_html في جدول pages من لقطة الهيكل
+            schema = self.schema_snapshot or self.ensure_schema_snapshot()
+            has_html_column = bool(schema and schema.has_column('pages', 'content_html'))
+            with_hash = bool(schema and schema.has_column('pages', 'content_hash'))
+            
+            # عند المزامنة: الصفحات الموجودة مفهرسة بـ internal_index (ID الصفحة في Access)
+            # وعند الاستئناف تُتجاوز الصفحات المحفوظة مسبقاً ويُكمل الإدراج بعدها
+            existing_pages = self.load_existing_pages(cursor, book_id, with_hash) if sync and resume_pages is None else None
+            resume_pages = resume_pages or 0
+            if resume_pages:
+                self.log_message(f"استئناف الاستيراد بعد {resume_pages} صفحة محفوظة مسبقاً")
+            checkpointed_pages = resume_pages
+            last_written_id = resume_key
+            sync_stats = {'inserted': 0, 'updated': 0, 'moved': 0, 'unchanged': 0}
+            page_positions = {}  # internal_index -> (page_number، chapter_id) للصفحات التي تغير موقعها فقط
+            
+            # دفعة الصفحات المنتظرة للكتابة
+            page_batch = []
+            page_batch_size = 0
+            page_batch_with_html = False
+            page_batch_start = 0  # عند المزامنة: رقم الصفحة السابق لأول صفحة في الدفعة
+            
+            # content_id: ID الفعلي من Access
+            for content_id, part_value, content_text, content_html in content_rows:
+                # نقطة استئناف: حفظ الصفحات المكتوبة حتى الآن (الدفعة المنتظرة في الذاكرة تُكتب بعدها)
+                if checkpoint and page_count - checkpointed_pages >= self.commit_policy.checkpoint_rows():
+                    self.checkpoint_import(cursor, book_id, None if existing_pages is not None else page_count,
+                                           last_written_id)
+                    checkpointed_pages = page_count
                 
                 # استخراج قيمة part من البيانات
-                part_value = content_item.get('part') or content_item.get('Part')
                 if part_value is not None:
                     part_value = int(part_value) if str(part_value).strip() != '' else None
                 
@@ -814,62 +2942,111 @@ class ShamelaConverter:
                 
                 # تحديد الفصل المناسب للصفحة بناءً على ID من Access (هذا هو التصحيح الأساسي!)
                 chapter_id_for_page = None
-                for ch_access_id, ch_info in chapter_data.items():
-                    if ch_info['start_id'] <= content_id <= ch_info['end_id']:
-                        chapter_id_for_page = ch_info['db_id']
-                        pages_with_chapter += 1
-                        break
+                position = chapter_ranges.find(content_id)
+                if position is not None:
+                    chapter_id_for_page = chapter_db_ids[position]
+                    pages_with_chapter += 1
                 
                 if not chapter_id_for_page:
                     pages_without_chapter += 1
                 
-                # إدراج الصفحة
-                try:
-                    sequential_page_number = page_count + 1
-                    
-                    # الحصول على النص المحسن بصيغة HTML إذا كان متوفراً
-                    content_html = content_item.get('nass_html', '')
-                    
-                    # التحقق من وجود عمود content_html في جدول pages
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM information_schema.COLUMNS 
-                        WHERE TABLE_SCHEMA = DATABASE() 
-                        AND TABLE_NAME = 'pages' 
-                        AND COLUMN_NAME = 'content_html'
-                    """)
-                    
-                    has_html_column = cursor.fetchone()[0] > 0
-                    
-                    if has_html_column and content_html:
-                        # إدراج مع عمود HTML
-                        page_query = """
-                            INSERT INTO pages (book_id, chapter_id, page_number, internal_index, content, content_html, part, created_at, updated_at)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        """
-                        cursor.execute(page_query, (
-                            book_id, chapter_id_for_page, sequential_page_number, 
-                            str(content_id), content_text, content_html, part_value, now, now
-                        ))
-                    else:
-                        # إدراج بدون عمود HTML (الطريقة القديمة)
-                        page_query = """
-                            INSERT INTO pages (book_id, chapter_id, page_number, internal_index, content, part, created_at, updated_at)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                        """
-                        cursor.execute(page_query, (
-                            book_id, chapter_id_for_page, sequential_page_number, 
-                            str(content_id), content_text, part_value, now, now
-                        ))
-                    
+                # صفحة محفوظة في استيراد سابق
+                if page_count < resume_pages:
                     page_count += 1
-                    
-                    # طباعة تقدم كل 100 صفحة
-                    if page_count % 100 == 0:
-                        self.log_message(f"تم معالجة {page_count} صفحة (page_number: {sequential_page_number}, access_id: {content_id})")
+                    self.track_chapter_page(chapter_pages, chapter_id_for_page, page_count)
+                    continue
+                
+                # النص المحسن بصيغة HTML يُكتب إذا كان متوفراً
+                with_html = bool(has_html_column and content_html)
+                content_hash = self.page_hash(content_text, content_html if with_html else None, part_value) if with_hash else None
+                page_row = (content_id, chapter_id_for_page, content_text,
+                            content_html if with_html else None, part_value, content_hash)
+                
+                if existing_pages is not None:
+                    # المزامنة: رقم الصفحة هو موقعها في الكتاب، وتُكتب فقط الصفحات الجديدة أو المتغيرة
+                    page_count += 1
+                    existing = existing_pages.pop(str(content_id), None)
+                    if existing is not None:
+                        if page_batch:
+                            self.flush_pages_batch(cursor, book_id, page_batch, page_batch_with_html, page_batch_start, now,
+                                                   chapter_pages, with_hash)
+                            page_batch = []
+                            page_batch_size = 0
+                        
+                        old_page_number, old_chapter_id, old_hash = existing
+                        if content_hash is None or old_hash != content_hash:
+                            self.update_synced_page(cursor, book_id, page_row, page_count, with_html, with_hash, now)
+                            sync_stats['updated'] += 1
+                        elif (old_page_number, old_chapter_id) != (page_count, chapter_id_for_page):
+                            page_positions[str(content_id)] = (page_count, chapter_id_for_page)
+                            sync_stats['moved'] += 1
+                        else:
+                            sync_stats['unchanged'] += 1
                         
-                except Exception as page_error:
-                    self.log_message(f"خطأ في إدراج الصفحة (access_id: {content_id}): {str(page_error)}", "ERROR")
+                        self.track_chapter_page(chapter_pages, chapter_id_for_page, page_count)
+                        continue
+                    
+                    # صفحة جديدة: تُضاف للدفعة إذا كانت تالية مباشرة لآخر صفحة فيها
+                    sync_stats['inserted'] += 1
+                    if page_batch and (with_html != page_batch_with_html or page_batch_start + len(page_batch) + 1 != page_count):
+                        self.flush_pages_batch(cursor, book_id, page_batch, page_batch_with_html, page_batch_start, now,
+                                               chapter_pages, with_hash)
+                        page_batch = []
+                        page_batch_size = 0
+                    if not page_batch:
+                        page_batch_start = page_count - 1
+                    page_batch_with_html = with_html
+                    page_batch.append(page_row)
+                    page_batch_size += 2 * (len(content_text or '') + (len(content_html) if with_html else 0))
+                    if len(page_batch) >= self.page_batch_rows or page_batch_size >= self.page_batch_bytes:
+                        self.flush_pages_batch(cursor, book_id, page_batch, page_batch_with_html, page_batch_start, now,
+                                               chapter_pages, with_hash)
+                        page_batch = []
+                        page_batch_size = 0
                     continue
+                
+                # الصفحات مع HTML وبدونه تُكتب بعبارات مختلفة، لذا نكتب الدفعة عند تغير النوع
+                if page_batch and with_html != page_batch_with_html:
+                    page_count = self.flush_pages_batch(cursor, book_id, page_batch, page_batch_with_html, page_count, now, chapter_pages, with_hash)
+                    last_written_id = page_batch[-1][0]
+                    page_batch = []
+                    page_batch_size = 0
+                
+                page_batch_with_html = with_html
+                page_batch.append(page_row)
+                # تقدير تقريبي لحجم الصف بترميز UTF-8 (الحرف العربي بايتان)
+                page_batch_size += 2 * (len(content_text or '') + (len(content_html) if with_html else 0))
+                
+                if len(page_batch) >= self.page_batch_rows or page_batch_size >= self.page_batch_bytes:
+                    page_count = self.flush_pages_batch(cursor, book_id, page_batch, page_batch_with_html, page_count, now, chapter_pages, with_hash)
+                    last_written_id = page_batch[-1][0]
+                    page_batch = []
+                    page_batch_size = 0
+            
+            # كتابة ما تبقى في الدفعة الأخيرة
+            if existing_pages is not None:
+                self.flush_pages_batch(cursor, book_id, page_batch, page_batch_with_html, page_batch_start, now,
+                                       chapter_pages, with_hash)
+                
+                # تحديث مواقع الصفحات التي لم يتغير محتواها، ثم حذف الصفحات والفصول التي لم تعد موجودة
+                self.update_page_positions(cursor, book_id, page_positions, now)
+                self.delete_stale_rows(cursor, 'pages', 'internal_index', sorted(existing_pages), book_id)
+                self.log_message(f"المزامنة: {sync_stats['inserted']} صفحة جديدة، {sync_stats['updated']} معدلة، "
+                                 f"{sync_stats['moved']} تغير موقعها، {sync_stats['unchanged']} بدون تغيير، "
+                                 f"{len(existing_pages)} محذوفة")
+            else:
+                page_count = self.flush_pages_batch(cursor, book_id, page_batch, page_batch_with_html, page_count, now, chapter_pages, with_hash)
+            
+            if existing_chapters is not None:
+                # حذف الفصول التي لم تعد موجودة في الفهرس، ثم المجلدات التي لم تعد أجزاؤها موجودة في المصدر
+                stale_chapters = sorted(chapter_id for chapters in existing_chapters.values() for chapter_id, values in chapters)
+                self.delete_stale_rows(cursor, 'chapters', 'id', stale_chapters, book_id)
+                cursor.execute("SELECT id FROM volumes WHERE book_id = %s", (book_id,))
+                current_volumes = set(volume_map.values())
+                stale_volumes = sorted(row[0] for row in cursor.fetchall() if row[0] not in current_volumes)
+                self.delete_stale_rows(cursor, 'volumes', 'id', stale_volumes, book_id)
+                self.log_message(f"الفصول: {chapters_updated} معدل، {len(stale_chapters)} محذوف"
+                                 f" | المجلدات: {len(stale_volumes)} محذوف")
             
             # طباعة الإحصائيات النهائية
             self.log_message("=== إحصائيات الربط ===")
@@ -881,7 +3058,8 @@ class ShamelaConverter:
             
             # طباعة إحصائيات توزيع الصفحات حسب part
             self.log_message("=== إحصائيات توزيع الصفحات حسب الأجزاء ===")
-            for part_key in sorted(part_stats.keys()):
+            # الصفحات "بدون جزء" تأتي بعد الأجزاء المرقمة (لا يمكن مقارنة النص بالأرقام)
+            for part_key in sorted(part_stats.keys(), key=lambda key: (isinstance(key, str), 0 if isinstance(key, str) else key)):
                 count = part_stats[part_key]
                 self.log_message(f"الجزء {part_key}: {count} صفحة")
             
@@ -895,55 +3073,34 @@ class ShamelaConverter:
                 volume_chapter_count[vol_id] += 1
             
             for vol_id, count in volume_chapter_count.items():
-                cursor.execute("SELECT title FROM volumes WHERE id = %s", (vol_id,))
-                vol_result = cursor.fetchone()
-                vol_title = vol_result[0] if vol_result else f"مجلد {vol_id}"
+                vol_title = volume_titles.get(vol_id, f"مجلد {vol_id}")
                 self.log_message(f"{vol_title}: {count} فصل")
             
             # طباعة ملخص نطاقات الفصول للتأكد
             self.log_message("=== ملخص نطاقات الفصول (Access ID) ===")
             for ch_access_id, ch_info in sorted(chapter_data.items()):
-                cursor.execute("""
-                    SELECT COUNT(*) FROM pages 
-                    WHERE book_id = %s AND chapter_id = %s
-                """, (book_id, ch_info['db_id']))
-                chapter_page_count = cursor.fetchone()[0]
-                
-                # الحصول على اسم المجلد
-                cursor.execute("SELECT title FROM volumes WHERE id = %s", (ch_info['volume_id'],))
-                vol_result = cursor.fetchone()
-                vol_title = vol_result[0] if vol_result else "غير معروف"
-                
+                chapter_page_count = chapter_pages.get(ch_info['db_id'], (0,))[0]
+                vol_title = volume_titles.get(ch_info['volume_id'], "غير معروف")
                 self.log_message(f"'{ch_info['title']}': ID {ch_info['start_id']}-{ch_info['end_id']} ({chapter_page_count} صفحة) - {vol_title}")
             
             self.log_message(f"تم إدراج {page_count} صفحة و {chapter_count} فصل للكتاب")
             
-            # 3. تحديث نطاقات الفصول لتستخدم page_number التسلسلي (للعرض)
+            # 3. تحديث نطاقات الفصول لتستخدم page_number التسلسلي (للعرض) بعبارة واحدة
             self.log_message("تحديث نطاقات الفصول للعرض بـ page_number التسلسلي...")
-            
-            for ch_access_id, ch_info in chapter_data.items():
-                chapter_id = ch_info['db_id']
-                try:
-                    # البحث عن أول وآخر page_number (التسلسلي) للصفحات في هذا الفصل
-                    cursor.execute("""
-                        SELECT MIN(page_number), MAX(page_number)
-                        FROM pages 
-                        WHERE book_id = %s AND chapter_id = %s
-                    """, (book_id, chapter_id))
-                    
-                    result = cursor.fetchone()
-                    if result and result[0] is not None:
-                        page_start, page_end = result
-                        
-                        # تحديث الفصل بنطاق page_number التسلسلي للعرض
-                        cursor.execute("""
-                            UPDATE chapters 
-                            SET page_start = %s, page_end = %s, updated_at = %s
-                            WHERE id = %s
-                        """, (page_start, page_end, now, chapter_id))
-                        
-                except Exception as chapter_update_error:
-                    self.log_message(f"خطأ في تحديث الفصل {chapter_id}: {str(chapter_update_error)}", "ERROR")
+            chapter_ranges_by_page = {
+                chapter_id: (first_page, last_page)
+                for chapter_id, (count, first_page, last_page) in chapter_pages.items()
+            }
+            if existing_chapters is not None:
+                # المزامنة: النطاق النهائي (صفحات الفصل أو نطاق Access للفصل الفارغ) يُكتب فقط إذا اختلف عن المخزن
+                chapter_ranges_by_page = {
+                    chapter_id: final_range
+                    for chapter_id, final_range in (
+                        (chapter_id, chapter_ranges_by_page.get(chapter_id, access_range))
+                        for chapter_id, access_range in chapter_access_ranges.items())
+                    if final_range != chapter_stored_ranges.get(chapter_id)
+                }
+            self.update_chapter_ranges(cursor, chapter_ranges_by_page, now)
             
             # 4. تحديث عدد الصفحات في جدول books
             try:
@@ -956,8 +3113,126 @@ class ShamelaConverter:
             except Exception as update_error:
                 self.log_message(f"تحذير: لم يتم تحديث معلومات الكتاب: {str(update_error)}", "WARNING")
             
+            self.last_book_stats = BookStats(len(volume_map), chapter_count, page_count)
+            return True
+            
         except Exception as e:
             self.log_message(f"خطأ في إدراج الصفحات والفصول: {str(e)}", "ERROR")
+            return False
+        
+        finally:
+            # إيقاف خيوط القراءة والمعالجة إذا توقفت الكتابة قبل نهاية المحتوى
+            if content_rows is not content_data and hasattr(content_rows, 'close'):
+                content_rows.close()
+            self.profile('pages_write', write_started)
+    
+    @staticmethod
+    def track_chapter_page(chapter_pages: Dict, chapter_id: Optional[int], page_number: int):
+        """تتبع نطاق الفصل (عدد الصفحات وأول وآخر page_number) في الذاكرة"""
+        if chapter_pages is None or not chapter_id:
+            return
+        stats = chapter_pages.get(chapter_id)
+        if stats is None:
+            chapter_pages[chapter_id] = [1, page_number, page_number]
+        else:
+            stats[0] += 1
+            stats[2] = page_number
+    
+    def flush_pages_batch(self, cursor, book_id: int, batch: List[Tuple], with_html: bool,
+                          page_count: int, now: datetime, chapter_pages: Dict = None, with_hash: bool = False) -> int:
+        """كتابة دفعة صفحات بعبارة INSERT واحدة متعددة الصفوف وإرجاع عدد الصفحات المدرجة حتى الآن
+        
+        عند فشل الدفعة يتم الرجوع للإدراج صفاً بصف لهذه الدفعة فقط، مع الحفاظ على
+        ترقيم page_number التسلسلي كما في الإدراج الفردي. يتم تحديث chapter_pages
+        بعدد الصفحات المكتوبة فعلاً وأول وآخر page_number لكل فصل
+        """
+        if not batch:
+            return page_count
+        
+        if with_html:
+            columns = "(book_id, chapter_id, page_number, internal_index, content, content_html, part, created_at, updated_at"
+            placeholders = "(%s, %s, %s, %s, %s, %s, %s, %s, %s"
+        else:
+            columns = "(book_id, chapter_id, page_number, internal_index, content, part, created_at, updated_at"
+            placeholders = "(%s, %s, %s, %s, %s, %s, %s, %s"
+        # بصمة المحتوى للمزامنة التزايدية لاحقاً
+        columns += ", content_hash)" if with_hash else ")"
+        placeholders += ", %s)" if with_hash else ")"
+        
+        def page_params(row, page_number):
+            content_id, chapter_id, content_text, content_html, part_value, content_hash = row
+            hash_params = (content_hash,) if with_hash else ()
+            if with_html:
+                return (book_id, chapter_id, page_number, str(content_id),
+                        content_text, content_html, part_value, now, now, *hash_params)
+            return (book_id, chapter_id, page_number, str(content_id),
+                    content_text, part_value, now, now, *hash_params)
+        
+        def page_written(row, page_number):
+            # تتبع نطاق الفصل في الذاكرة بدلاً من الاستعلام عنه بعد الإدراج
+            self.track_chapter_page(chapter_pages, row[1], page_number)
+            
+            # طباعة تقدم كل 100 صفحة
+            if page_number % 100 == 0:
+                self.log_message(f"تم معالجة {page_number} صفحة (page_number: {page_number}, access_id: {row[0]})")
+        
+        # محاولة كتابة الدفعة كاملة في رحلة واحدة إلى الخادم
+        try:
+            params = []
+            for offset, row in enumerate(batch, 1):
+                params.extend(page_params(row, page_count + offset))
+            
+            cursor.execute(f"INSERT INTO pages {columns} VALUES " + ", ".join([placeholders] * len(batch)), params)
+            
+            for offset, row in enumerate(batch, 1):
+                page_written(row, page_count + offset)
+            self.events.publish(PagesBatchWritten(book_id, len(batch)))
+            return page_count + len(batch)
+            
+        except Exception as batch_error:
+            self.log_message(f"تعذر إدراج دفعة من {len(batch)} صفحة، جارٍ الإدراج صفاً بصف: {str(batch_error)}", "WARNING")
+        
+        # الرجوع للإدراج الفردي لهذه الدفعة فقط
+        single_query = f"INSERT INTO pages {columns} VALUES {placeholders}"
+        written = 0
+        for row in batch:
+            try:
+                cursor.execute(single_query, page_params(row, page_count + 1))
+                page_count += 1
+                written += 1
+                page_written(row, page_count)
+            except Exception as page_error:
+                self.log_message(f"خطأ في إدراج الصفحة (access_id: {row[0]}): {str(page_error)}", "ERROR")
+        
+        if written:
+            self.events.publish(PagesBatchWritten(book_id, written))
+        return page_count
+    
+    def update_chapter_ranges(self, cursor, chapter_ranges: Dict[int, Tuple[int, int]], now: datetime,
+                              chunk_size: int = 1000):
+        """تحديث page_start و page_end لعدة فصول بعبارة UPDATE واحدة تعتمد على CASE لكل مجموعة"""
+        chapter_ids = sorted(chapter_ranges)
+        
+        for offset in range(0, len(chapter_ids), chunk_size):
+            chunk = chapter_ids[offset:offset + chunk_size]
+            cases = " ".join(["WHEN %s THEN %s"] * len(chunk))
+            start_params = []
+            end_params = []
+            for chapter_id in chunk:
+                page_start, page_end = chapter_ranges[chapter_id]
+                start_params.extend((chapter_id, page_start))
+                end_params.extend((chapter_id, page_end))
+            
+            try:
+                cursor.execute(f"""
+                    UPDATE chapters
+                    SET page_start = CASE id {cases} END,
+                        page_end = CASE id {cases} END,
+                        updated_at = %s
+                    WHERE id IN ({", ".join(["%s"] * len(chunk))})
+                """, (*start_params, *end_params, now, *chunk))
+            except Exception as chapter_update_error:
+                self.log_message(f"خطأ في تحديث نطاقات {len(chunk)} فصل: {str(chapter_update_error)}", "ERROR")
     
     def convert_access_file(self, access_file_path: str) -> bool:
         """تحويل ملف Access واحد"""
@@ -1006,9 +3281,9 @@ class ShamelaConverter:
             
             self.log_message(f"تم اختيار جدول المحتوى: {content_table}")
             
-            # استخراج البيانات
-            content_data = self.extract_book_content(content_table)
+            # استخراج الفهرس أولاً ثم تجهيز قراءة المحتوى على دفعات أثناء الكتابة
             index_data = self.extract_book_index(index_table) if index_table else []
+            content_data = self.open_book_content_stream(content_table)
             
             if not content_data:
                 self.log_message("لا يوجد محتوى للتحويل", "WARNING")
@@ -1020,9 +3295,41 @@ class ShamelaConverter:
             
             author_id = self.insert_author(author_name)
             publisher_id = self.insert_publisher(publisher_name)
-            book_id = self.insert_book(book_info, author_id, publisher_id)
             
-            self.insert_pages_and_chapters(book_id, content_data, index_data)
+            # استئناف استيراد سابق لنفس الملف توقف قبل اكتماله
+            source_file = os.path.basename(access_file_path)
+            fingerprint = self.source_fingerprint(access_file_path)
+            shamela_id = str(book_info.get('BkId', ''))
+            checkpoint = self.checkpoints_enabled()
+            resume = self.find_resumable_import(shamela_id, source_file) if checkpoint else None
+            resume_pages = resume_key = None
+            if resume:
+                book_id, resume_pages, resume_key, resume_fingerprint = resume
+                book_exists = True
+                self.log_message(f"تم العثور على استيراد غير مكتمل للكتاب (المعرف {book_id})، جارٍ الاستئناف")
+                if resume_pages is not None and resume_fingerprint != fingerprint:
+                    # الملف تغير منذ التوقف: لا يمكن الوثوق بالصفحات المحفوظة دون مقارنتها
+                    self.log_message("ملف المصدر تغير منذ آخر محاولة، ستتم مزامنة الكتاب بالكامل", "WARNING")
+                    resume_pages = None
+            elif self.sync_mode:
+                book_id, book_exists = self.sync_book(book_info, author_id, publisher_id)
+            else:
+                book_id, book_exists = self.insert_book(book_info, author_id, publisher_id), False
+            self.last_book_id = book_id
+            
+            # الاستيراد الجديد يُستأنف من آخر صفحة محفوظة، والمزامنة تُعاد كاملة
+            if checkpoint and not resume:
+                self.start_import_progress(book_id, shamela_id, source_file, fingerprint, None if book_exists else 0)
+            
+            # فشل القراءة أو الكتابة أثناء التدفق يعني أن الكتاب لم يكتمل
+            if not self.insert_pages_and_chapters(book_id, content_data, index_data, sync=book_exists,
+                                                  resume_pages=resume_pages, resume_key=resume_key,
+                                                  checkpoint=checkpoint):
+                self.access_conn.close()
+                return False
+            
+            if checkpoint:
+                self.finish_import_progress(book_id)
             
             # إغلاق الاتصال بـ Access
             self.access_conn.close()
@@ -1034,16 +3341,61 @@ class ShamelaConverter:
             self.log_message(f"خطأ في تحويل الملف: {str(e)}", "ERROR")
             return False
     
-    def convert_file(self, access_file_path: str) -> bool:
+    def convert_file(self, access_file_path: str, on_commit: Callable[[], None] = None,
+                     on_discard: Callable[[], None] = None) -> bool:
         """
         تحويل ملف واحد
         
         Args:
             access_file_path: مسار ملف Access
+            on_commit: دالة تُنفذ بعد حفظ الكتاب فعلياً في قاعدة البيانات
+            on_discard: دالة تُنفذ إذا ضاع الكتاب بعد نجاحه مع فشل الحفظ الجماعي لمجموعته
             
         Returns:
             bool: نجح التحويل أم لا
         """
+        source_file = os.path.basename(access_file_path)
+        self.last_book_id = None
+        self.last_book_stats = BookStats()
+        self.profiler = ConversionProfiler()
+        self.events.publish(BookStarted(source_file))
+        
+        # الحفظ الجماعي: BookFinished(success=True) لا يُنشر إلا بعد حفظ المجموعة فعلياً،
+        # ويُنشر بـ success=False إذا ضاع الكتاب مع فشل حفظها
+        finished = []  # الحدث بعد انتهاء التحويل
+        settled = []  # نتيجة الحفظ إذا حُسمت قبل انتهاء التحويل (حفظ المجموعة عند هذا الكتاب أو فشله)
+        
+        def settle(durable: bool, callback: Optional[Callable[[], None]]):
+            if not finished:
+                settled.append((durable, callback))
+                return
+            self.events.publish(finished[0]._replace(success=durable))
+            if callback is not None:
+                callback()
+        
+        try:
+            # الحفظ الجماعي: الكتاب داخل SAVEPOINT على اتصال الجلسة ويُحفظ مع مجموعته
+            if self.commit_session is not None:
+                success = self.convert_file_in_session(access_file_path, lambda: settle(True, on_commit),
+                                                       lambda: settle(False, on_discard))
+            else:
+                success = self.convert_file_with_commit(access_file_path, on_commit)
+            self.profiler.finish()
+            profile = self.profiler.summary()
+        finally:
+            self.profiler = None
+        
+        event = BookFinished(source_file, self.last_book_id, success, self.last_book_stats, profile)
+        if self.commit_session is None or not (success or settled):
+            self.events.publish(event)
+        else:
+            finished.append(event)
+            if settled:
+                settle(*settled[0])
+        return success
+    
+    def convert_file_with_commit(self, access_file_path: str, on_commit: Callable[[], None] = None) -> bool:
+        """تحويل ملف على اتصال من المجمع وحفظه عند نجاحه"""
         try:
             self.log_message(f"INFO: بدء معالجة الملف: {os.path.basename(access_file_path)}")
             
@@ -1064,14 +3416,19 @@ class ShamelaConverter:
                     
                     # التحقق من أن البيانات تم حفظها فعلاً
                     try:
-                        cursor = self.mysql_conn.cursor()
+                        cursor = self.mysql_cursor()
                         cursor.execute("SELECT COUNT(*) FROM books")
                         book_count = cursor.fetchone()[0]
                         self.log_message(f"INFO: عدد الكتب في قاعدة البيانات الآن: {book_count}")
                         
                         # حفظ التغييرات
+                        started = time.perf_counter()
                         self.mysql_conn.commit()
+                        self.profile('commit', started)
+                        self.dimension_cache.commit()
                         self.log_message(f"INFO: تم حفظ التغييرات في قاعدة البيانات")
+                        if on_commit is not None:
+                            on_commit()
                         
                     except Exception as e:
                         self.log_message(f"ERROR: خطأ في التحقق من البيانات: {str(e)}")
@@ -1082,48 +3439,106 @@ class ShamelaConverter:
                 
             finally:
                 if self.mysql_conn:
-                    self.mysql_conn.close()
-                    self.log_message(f"INFO: تم إغلاق اتصال MySQL")
+                    self.release_mysql()
+                    self.log_message(f"INFO: تمت إعادة اتصال MySQL إلى المجمع")
                 
         except Exception as e:
             self.log_message(f"ERROR: خطأ في تحويل الملف {os.path.basename(access_file_path)}: {str(e)}")
             return False
 
+    def convert_file_in_session(self, access_file_path: str, on_commit: Callable[[], None] = None,
+                                on_discard: Callable[[], None] = None) -> bool:
+        """تحويل ملف داخل SAVEPOINT على اتصال جلسة الحفظ الجماعي"""
+        session = self.commit_session
+        try:
+            self.log_message(f"INFO: بدء معالجة الملف: {os.path.basename(access_file_path)}")
+            self.mysql_conn = session.connection()
+            if self.schema_snapshot is None:
+                self.ensure_schema_snapshot()
+            session.begin_book()
+            
+            self.log_message(f"INFO: بدء عملية التحويل الفعلية...")
+            success = self.convert_access_file(access_file_path)
+            
+            started = time.perf_counter()
+            session.end_book(success, on_commit, on_discard)
+            self.profile('commit', started)
+            if success:
+                state = f"ينتظر الحفظ الجماعي ({session.pending_books} كتاب)" if session.pending_books else "تم حفظ المجموعة"
+                self.log_message(f"INFO: تم تحويل {os.path.basename(access_file_path)} بنجاح - {state}")
+            else:
+                self.log_message(f"ERROR: فشل تحويل {os.path.basename(access_file_path)}، تم التراجع عنه وحده")
+            return success
+            
+        except Exception as e:
+            # فقد الاتصال أو فشل الحفظ أو ألغى الخادم المعاملة (deadlock): تضيع معه الكتب المنتظرة في نفس المعاملة
+            if CommitSession.transaction_lost(e):
+                self.log_message(f"ERROR: ألغى الخادم معاملة الحفظ الجماعي أثناء {os.path.basename(access_file_path)} "
+                                 f"(deadlock)، لم تُحفظ الكتب المنتظرة معه: {str(e)}")
+            else:
+                self.log_message(f"ERROR: خطأ في الحفظ الجماعي أثناء {os.path.basename(access_file_path)}، "
+                                 f"لم تُحفظ الكتب المنتظرة: {str(e)}")
+            session.discard()
+            return False
+        
+        finally:
+            # الاتصال ملك الجلسة ولا يعاد إلى المجمع هنا
+            self.mysql_conn = None
+    
     def convert_multiple_files(self, access_files: List[str]) -> Dict[str, bool]:
-        """تحويل عدة ملفات Access"""
+        """تحويل عدة ملفات Access مع الحفظ حسب سياسة الحفظ"""
         results = {}
         
         if not self.connect_mysql():
             return results
+        if self.bulk_load:
+            self.begin_bulk_load(self.bulk_drop_indexes)
+        else:
+            self.recover_bulk_load()
+        self.release_mysql()
+        
+        if self.commit_policy.mode == CommitPolicy.GROUP:
+            self.commit_session = CommitSession(self.connection_pool, self.commit_policy, self.dimension_cache)
+            try:
+                self.dimension_cache.open_writer(self.connection_pool)
+            except Exception as e:
+                self.log_message(f"تعذر فتح اتصال أسماء المؤلفين والناشرين: {str(e)}", "WARNING")
         
         try:
-            # بدء المعاملة
-            self.mysql_conn.start_transaction()
-            
             for access_file in access_files:
                 file_name = os.path.basename(access_file)
                 self.log_message(f"معالجة الملف: {file_name}")
                 
-                success = self.convert_access_file(access_file)
-                results[file_name] = success
+                # النتيجة تصبح True فقط بعد حفظ الكتاب فعلياً (قد يتأخر مع الحفظ الجماعي أو يُلغى)
+                results[file_name] = False
+                success = self.convert_file(access_file,
+                                            lambda name=file_name: results.update({name: True}),
+                                            lambda name=file_name: results.update({name: False}))
                 
                 if success:
                     self.log_message(f"تم تحويل {file_name} بنجاح")
                 else:
                     self.log_message(f"فشل في تحويل {file_name}", "ERROR")
             
-            # تأكيد المعاملة
-            self.mysql_conn.commit()
+            if self.commit_session is not None:
+                self.commit_session.commit()
             self.log_message("تم حفظ جميع التغييرات في قاعدة البيانات")
             
         except Exception as e:
-            # التراجع عن المعاملة في حالة الخطأ
-            self.mysql_conn.rollback()
-            self.log_message(f"تم التراجع عن التغييرات بسبب خطأ: {str(e)}", "ERROR")
+            self.log_message(f"تم التراجع عن التغييرات غير المحفوظة بسبب خطأ: {str(e)}", "ERROR")
         
         finally:
-            if self.mysql_conn:
-                self.mysql_conn.close()
+            if self.commit_session is not None:
+                self.commit_session.discard()
+                self.commit_session = None
+                self.dimension_cache.close_writer()
+            if self.bulk_load and self.connect_mysql():
+                try:
+                    self.end_bulk_load()
+                except Exception as e:
+                    self.log_message(f"خطأ في إنهاء وضع التحميل الكثيف، ستُستعاد الفهارس في التشغيل التالي: {str(e)}", "ERROR")
+                finally:
+                    self.release_mysql()
         
         return results
     
@@ -1157,22 +3572,61 @@ class ShamelaGUI:
         }
         
         # قائمة انتظار الرسائل
-        self.message_queue = queue.Queue()
+        self.message_queue = TimedMessageQueue()
+        # زمن معالجة الرسائل في كل دورة (ثانية)، والباقي يُترك لرسم الواجهة
+        self.queue_drain_budget = 0.03
         
         # متغيرات حالة التحويل
         self.conversion_running = False
         self.cancel_conversion_flag = False
         self.cancel_requested = False
+        self.cancel_event = threading.Event()
         
         # متغيرات الوقت والتقدم المتقدمة
         self.start_time = None
-        self.all_log_messages = []
+        self.log_store = LogStore()
+        
+        # عرض السجل على دفعات: الرسائل تُجمع وتُكتب في الواجهة بعملية insert واحدة كل إطار
+        self.log_frame_ms = 50
+        self.pending_log_messages = []
+        self.log_flush_scheduled = False
         
         # إحصائيات التحويل المتقدمة
         self.total_files = 0
         self.current_file_index = 0
         self.books_stats = []  # قائمة إحصائيات كل كتاب
-        self.current_book_stats = None
+        
+        # عدد اتصالات MySQL المحفوظة في مجمع الجلسة
+        self.mysql_pool_size = 4
+        
+        # عدد الكتب التي تُحوّل بالتوازي
+        self.parallel_books = min(4, os.cpu_count() or 1)
+        
+        # عدد العمليات الفرعية لمعالجة النصوص (0 لمعالجتها في خيوط التحويل)
+        self.text_processes = 0
+        
+        # حفظ النص فقط دون توليد HTML
+        self.text_only = False
+        self.text_only_var = tk.BooleanVar(value=False)
+        
+        # مزامنة الكتب الموجودة مسبقاً (نفس shamela_id) بدل إنشاء نسخ جديدة
+        self.sync_mode = False
+        self.sync_mode_var = tk.BooleanVar(value=False)
+        
+        # تخطي الملفات المطابقة لاستيراد ناجح سابق حسب سجل الاستيراد
+        self.skip_imported = True
+        self.skip_imported_var = tk.BooleanVar(value=True)
+        
+        # وضع التحميل الكثيف للمكتبات الجديدة
+        self.bulk_load = False
+        self.bulk_load_var = tk.BooleanVar(value=False)
+        self.bulk_drop_indexes = False
+        self.bulk_drop_indexes_var = tk.BooleanVar(value=False)
+        self.bulk_load_stats = None  # مقارنة زمن الجلسة بالوضع العادي لتقرير الجلسة
+        
+        # سياسة الحفظ في قاعدة البيانات
+        self.commit_policy = CommitPolicy()
+        self.commit_mode_var = tk.StringVar(value=CommitPolicy.LABELS[self.commit_policy.mode])
         
         self.create_widgets()
         self.load_settings()
@@ -1279,6 +3733,64 @@ class ShamelaGUI:
                              font=("Arial", 8), bg='#f0f0f0', fg='#7f8c8d')
         note_label.grid(row=3, column=2, columnspan=2, sticky="w", padx=5)
         
+        tk.Label(db_inner_frame, text="كتب بالتوازي:", font=("Arial", 10), 
+                bg='#f0f0f0').grid(row=1, column=2, sticky="e", padx=5, pady=5)
+        self.parallel_books_spinbox = tk.Spinbox(db_inner_frame, from_=1, to=16, font=("Arial", 10), width=6)
+        self.parallel_books_spinbox.grid(row=1, column=3, sticky="w", padx=5, pady=5)
+        self.parallel_books_spinbox.delete(0, tk.END)
+        self.parallel_books_spinbox.insert(0, str(self.parallel_books))
+        
+        tk.Label(db_inner_frame, text="عمليات النصوص:", font=("Arial", 10), 
+                bg='#f0f0f0').grid(row=3, column=0, sticky="e", padx=5, pady=5)
+        self.text_processes_spinbox = tk.Spinbox(db_inner_frame, from_=0, to=64, font=("Arial", 10), width=6)
+        self.text_processes_spinbox.grid(row=3, column=1, sticky="w", padx=5, pady=5)
+        self.text_processes_spinbox.delete(0, tk.END)
+        self.text_processes_spinbox.insert(0, str(self.text_processes))
+        
+        tk.Checkbutton(db_inner_frame, text="نص فقط (بدون HTML)", variable=self.text_only_var,
+                      font=("Arial", 10), bg='#f0f0f0').grid(row=4, column=1, sticky="w", padx=5, pady=5)
+        
+        tk.Checkbutton(db_inner_frame, text="مزامنة الكتب الموجودة", variable=self.sync_mode_var,
+                      font=("Arial", 10), bg='#f0f0f0').grid(row=4, column=3, sticky="w", padx=5, pady=5)
+        
+        tk.Checkbutton(db_inner_frame, text="تخطي الملفات المستوردة دون تغيير", variable=self.skip_imported_var,
+                      font=("Arial", 10), bg='#f0f0f0').grid(row=5, column=1, sticky="w", padx=5, pady=5)
+        
+        tk.Label(db_inner_frame, text="سياسة الحفظ:", font=("Arial", 10), 
+                bg='#f0f0f0').grid(row=5, column=2, sticky="e", padx=5, pady=5)
+        self.commit_mode_combo = ttk.Combobox(db_inner_frame, textvariable=self.commit_mode_var,
+                                             values=list(CommitPolicy.LABELS.values()), state="readonly", width=16)
+        self.commit_mode_combo.grid(row=5, column=3, sticky="w", padx=5, pady=5)
+        
+        tk.Label(db_inner_frame, text="صفحات لكل حفظ:", font=("Arial", 10), 
+                bg='#f0f0f0').grid(row=6, column=0, sticky="e", padx=5, pady=5)
+        self.commit_rows_spinbox = tk.Spinbox(db_inner_frame, from_=100, to=100000, increment=500,
+                                              font=("Arial", 10), width=8)
+        self.commit_rows_spinbox.grid(row=6, column=1, sticky="w", padx=5, pady=5)
+        self.commit_rows_spinbox.delete(0, tk.END)
+        self.commit_rows_spinbox.insert(0, str(self.commit_policy.rows))
+        
+        tk.Label(db_inner_frame, text="حفظ جماعي كل:", font=("Arial", 10), 
+                bg='#f0f0f0').grid(row=6, column=2, sticky="e", padx=5, pady=5)
+        group_commit_frame = tk.Frame(db_inner_frame, bg='#f0f0f0')
+        group_commit_frame.grid(row=6, column=3, sticky="w", padx=5, pady=5)
+        self.commit_books_spinbox = tk.Spinbox(group_commit_frame, from_=1, to=1000, font=("Arial", 10), width=6)
+        self.commit_books_spinbox.pack(side="left")
+        self.commit_books_spinbox.delete(0, tk.END)
+        self.commit_books_spinbox.insert(0, str(self.commit_policy.books))
+        tk.Label(group_commit_frame, text="كتاب أو", font=("Arial", 10), bg='#f0f0f0').pack(side="left", padx=3)
+        self.commit_seconds_spinbox = tk.Spinbox(group_commit_frame, from_=1, to=3600, font=("Arial", 10), width=6)
+        self.commit_seconds_spinbox.pack(side="left")
+        self.commit_seconds_spinbox.delete(0, tk.END)
+        self.commit_seconds_spinbox.insert(0, f"{self.commit_policy.seconds:g}")
+        tk.Label(group_commit_frame, text="ثانية", font=("Arial", 10), bg='#f0f0f0').pack(side="left", padx=3)
+        
+        tk.Checkbutton(db_inner_frame, text="تحميل كثيف (مكتبة جديدة)", variable=self.bulk_load_var,
+                      font=("Arial", 10), bg='#f0f0f0').grid(row=7, column=1, sticky="w", padx=5, pady=5)
+        
+        tk.Checkbutton(db_inner_frame, text="تأجيل الفهارس الثانوية", variable=self.bulk_drop_indexes_var,
+                      font=("Arial", 10), bg='#f0f0f0').grid(row=7, column=3, sticky="w", padx=5, pady=5)
+        
         # أزرار الإعدادات
         db_buttons_frame = tk.Frame(db_frame, bg='#f0f0f0')
         db_buttons_frame.pack(fill="x", padx=10, pady=(0, 10))
@@ -1543,13 +4055,14 @@ class ShamelaGUI:
         
         if messagebox.askyesno("تأكيد الإلغاء", "هل تريد إيقاف عملية التحويل؟"):
             self.cancel_requested = True
+            self.cancel_event.set()
             self.log_message("تم طلب إيقاف العملية...", "WARNING")
             self.update_status("جاري الإيقاف...")
     
     def save_log(self):
         """حفظ سجل الأحداث في ملف"""
         try:
-            if not hasattr(self, 'all_log_messages') or not self.all_log_messages:
+            if not hasattr(self, 'log_store') or not len(self.log_store):
                 messagebox.showwarning("تحذير", "لا يوجد محتوى في السجل للحفظ")
                 return
             
@@ -1585,8 +4098,8 @@ class ShamelaGUI:
                     f.write(f"تاريخ الإنشاء: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
                     f.write("="*50 + "\n\n")
                     
-                    for msg_data in self.all_log_messages:
-                        f.write(f"{msg_data['full_message']}\n")
+                    for entry in self.log_store:
+                        f.write(f"{entry.full_message}\n")
                 
                 # التحقق من نجاح الحفظ
                 if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
@@ -1611,16 +4124,12 @@ class ShamelaGUI:
         try:
             filter_type = self.filter_var.get()
             
-            # مسح السجل الحالي
+            # مسح السجل الحالي مع الرسائل المنتظرة (ستُعرض ضمن الرسائل المفلترة)
             self.log_text.delete(1.0, tk.END)
+            self.pending_log_messages = []
             
-            # إعادة عرض الرسائل المفلترة
-            for msg_data in self.all_log_messages:
-                if filter_type == "الكل" or msg_data['type'] == filter_type:
-                    self.display_log_message(msg_data)
-            
-            # التمرير للأسفل
-            self.log_text.see(tk.END)
+            # إعادة عرض آخر الرسائل المطابقة فقط دفعة واحدة (السجل الكامل يُحفظ من زر الحفظ)
+            self.display_log_messages(self.log_store.tail(None if filter_type == "الكل" else filter_type))
             
         except Exception as e:
             print(f"خطأ في التصفية: {e}")
@@ -1688,6 +4197,14 @@ class ShamelaGUI:
                                    relief='flat', padx=20, pady=8)
         save_report_btn.pack(side="left", padx=10)
         
+        # زر تصدير مقاييس الأداء
+        export_profile_btn = tk.Button(buttons_frame, text="تصدير الأداء (JSON)", 
+                                      command=self.export_performance_profile,
+                                      font=("Arial", 10),
+                                      bg='#2980b9', fg='white',
+                                      relief='flat', padx=20, pady=8)
+        export_profile_btn.pack(side="left", padx=10)
+        
         # زر إغلاق
         close_btn = tk.Button(buttons_frame, text="إغلاق", 
                              command=report_window.destroy,
@@ -1739,6 +4256,18 @@ class ShamelaGUI:
                 report_lines.append(f"   📄 {pages_per_minute:.1f} صفحة/دقيقة")
                 report_lines.append("")
         
+        bulk_load_lines = self.bulk_load_summary_lines()
+        if bulk_load_lines:
+            report_lines.extend(f"   {line}" for line in bulk_load_lines)
+            report_lines.append("")
+        
+        # توزيع زمن الجلسة على المراحل لمعرفة موضع البطء
+        session_profile = self.session_profile()
+        if session_profile:
+            report_lines.append("🔬 أداء المراحل (مجموع الكتب):")
+            report_lines.extend(f"   {line}" for line in ConversionProfiler.report_lines(session_profile))
+            report_lines.append("")
+        
         # تفاصيل كل كتاب
         report_lines.append("📋 تفاصيل الكتب:")
         report_lines.append("-" * 60)
@@ -1755,6 +4284,9 @@ class ShamelaGUI:
                 duration = book['end_time'] - book['start_time']
                 report_lines.append(f"   ⏱️ المدة: {str(duration).split('.')[0]}")
             
+            if book.get('profile'):
+                report_lines.extend(f"   {line}" for line in ConversionProfiler.report_lines(book['profile']))
+            
             report_lines.append("")
         
         report_lines.append("="*60)
@@ -1763,6 +4295,65 @@ class ShamelaGUI:
         
         return '\n'.join(report_lines)
     
+    def session_profile(self) -> Optional[Dict]:
+        """مجموع مقاييس أداء كتب الجلسة (النسب المئوية لزمن الرحلات هي الأسوأ بين الكتب)"""
+        profiles = [book['profile'] for book in self.books_stats if book.get('profile')]
+        if not profiles:
+            return None
+        
+        stages = {}
+        for profile in profiles:
+            for stage, totals in profile['stages'].items():
+                combined = stages.setdefault(stage, {'seconds': 0.0, 'count': 0})
+                combined['seconds'] += totals['seconds']
+                combined['count'] += totals['count']
+        return {
+            'wall_seconds': sum(profile['wall_seconds'] for profile in profiles),
+            'stages': stages,
+            'db': {
+                'round_trips': sum(profile['db']['round_trips'] for profile in profiles),
+                'seconds': sum(profile['db']['seconds'] for profile in profiles),
+                **{key: max(profile['db'][key] for profile in profiles) for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')},
+            },
+            'bytes_read': sum(profile['bytes_read'] for profile in profiles),
+            'bytes_written': sum(profile['bytes_written'] for profile in profiles),
+        }
+    
+    def export_performance_profile(self):
+        """تصدير مقاييس أداء الجلسة وكل كتاب بصيغة JSON"""
+        if not self.books_stats:
+            messagebox.showwarning("تحذير", "لا توجد بيانات جلسة متاحة للتصدير")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            title="تصدير أداء الجلسة",
+            defaultextension=".json",
+            filetypes=[("ملفات JSON", "*.json"), ("جميع الملفات", "*.*")],
+            initialfile=f"أداء_جلسة_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        if not file_path:
+            return
+        
+        data = {
+            'generated_at': datetime.now().isoformat(),
+            'session': self.session_profile(),
+            'books': [{
+                'name': book['name'],
+                'file_path': book['file_path'],
+                'success': book.get('success', False),
+                'volumes': book.get('volumes', 0),
+                'chapters': book.get('chapters', 0),
+                'pages': book.get('pages', 0),
+                'profile': book.get('profile'),
+            } for book in self.books_stats],
+        }
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.log_message(f"💾 تم تصدير أداء الجلسة: {os.path.basename(file_path)}", "SUCCESS")
+        except Exception as e:
+            messagebox.showerror("خطأ في الحفظ", f"فشل في تصدير أداء الجلسة:\n{str(e)}")
+    
     def save_session_report(self):
         """حفظ تقرير الجلسة في ملف"""
         try:
@@ -1848,7 +4439,8 @@ class ShamelaGUI:
         """مسح سجل الأحداث"""
         if messagebox.askyesno("تأكيد المسح", "هل تريد مسح سجل الأحداث؟"):
             self.log_text.delete(1.0, tk.END)
-            self.all_log_messages.clear()
+            self.log_store.clear()
+            self.pending_log_messages = []
             self.log_message("تم مسح سجل الأحداث", "INFO")
     
     def clear_files(self):
@@ -1949,6 +4541,27 @@ class ShamelaGUI:
         
         # تحديث وفحص إعدادات قاعدة البيانات
         self.update_db_config()
+        try:
+            self.parallel_books = max(1, int(self.parallel_books_spinbox.get()))
+        except ValueError:
+            self.parallel_books = 1
+        try:
+            self.text_processes = max(0, int(self.text_processes_spinbox.get()))
+        except ValueError:
+            self.text_processes = 0
+        self.text_only = self.text_only_var.get()
+        self.sync_mode = self.sync_mode_var.get()
+        self.skip_imported = self.skip_imported_var.get()
+        self.bulk_load = self.bulk_load_var.get()
+        self.bulk_drop_indexes = self.bulk_load and self.bulk_drop_indexes_var.get()
+        commit_mode = next((mode for mode, label in CommitPolicy.LABELS.items()
+                            if label == self.commit_mode_var.get()), CommitPolicy.ROWS)
+        try:
+            self.commit_policy = CommitPolicy(commit_mode, int(self.commit_rows_spinbox.get()),
+                                              int(self.commit_books_spinbox.get()),
+                                              float(self.commit_seconds_spinbox.get()))
+        except ValueError:
+            self.commit_policy = CommitPolicy(commit_mode)
         required_fields = ['host', 'database', 'user']
         if not all(self.db_config.get(field, '').strip() for field in required_fields):
             messagebox.showwarning("تحذير", "يرجى ملء الحقول المطلوبة: الخادم، قاعدة البيانات، اسم المستخدم")
@@ -1966,6 +4579,8 @@ class ShamelaGUI:
         # إعداد حالة التحويل
         self.conversion_running = True
         self.cancel_conversion_flag = False
+        self.cancel_requested = False
+        self.cancel_event.clear()
         self.start_time = datetime.now()
         
         # تحديث واجهة المستخدم
@@ -2010,35 +4625,127 @@ class ShamelaGUI:
                 self.message_queue.put(('error', "❌ No processable files found."))
                 return
             
-            # إنشاء دالة callback لاستقبال رسائل المحول مع تتبع التقدم
-            def message_callback(message, level):
-                if level == "ERROR":
-                    self.message_queue.put(('error', f"❌ {message}"))
-                elif level == "WARNING":
-                    self.message_queue.put(('info', f"⚠️ {message}"))
-                else:
-                    # تحليل الرسائل لاستخراج الإحصائيات
-                    self.parse_conversion_message(message)
-                    self.message_queue.put(('info', f"ℹ️ {message}"))
+            # ترتيب الكتب من الأكبر حجماً للأصغر حتى لا يتأخر كتاب ضخم إلى نهاية الطابور
+            def file_size(path):
+                try:
+                    return os.path.getsize(path)
+                except OSError:
+                    return 0
+            scheduled_files = sorted(regular_files, key=file_size, reverse=True)
+            workers = max(1, min(self.parallel_books, len(scheduled_files)))
             
-            converter = ShamelaConverter(self.db_config, message_callback)
+            # مجمع اتصالات واحد للجلسة يعاد استخدامه لكل الكتب (اتصال لكل كتاب قيد التحويل)
+            connection_pool = MySQLConnectionPool(self.db_config, max(self.mysql_pool_size, workers))
+            converter = ShamelaConverter(self.db_config, self.make_message_callback(), connection_pool)
+            converter.cancel_event = self.cancel_event
             
             # اختبار الاتصال أولاً
             self.message_queue.put(('progress', f"اختبار الاتصال بقاعدة البيانات..."))
             if not converter.connect_mysql():
                 self.message_queue.put(('error', "❌ فشل في الاتصال بقاعدة البيانات"))
+                connection_pool.close_all()
                 return
             
+            # وضع التحميل الكثيف يطبق على كل اتصالات المجمع، وإلا تُستعاد فهارس أي تحميل كثيف لم يكتمل
+            self.bulk_load_stats = None
+            normal_rate = None
+            try:
+                if self.bulk_load:
+                    normal_rate = converter.read_throughput('normal')
+                    converter.begin_bulk_load(self.bulk_drop_indexes)
+                    self.message_queue.put(('info', "⚙️ وضع التحميل الكثيف مفعل"
+                                                    + (" مع تأجيل الفهارس الثانوية" if self.bulk_drop_indexes else "")))
+                elif not converter.recover_bulk_load():
+                    self.message_queue.put(('error', "⚠️ تعذرت استعادة بعض فهارس تحميل كثيف سابق"))
+            except Exception as e:
+                self.message_queue.put(('error', f"❌ خطأ في تجهيز وضع التحميل الكثيف: {str(e)}"))
+            converter.release_mysql()
+            
             self.message_queue.put(('success', "✅ تم الاتصال بقاعدة البيانات بنجاح"))
+            if workers > 1:
+                self.message_queue.put(('info', f"⚙️ تحويل {workers} كتب بالتوازي"))
+            
+            # سجل الاستيراد المحلي: حساب بصمات الملفات في الخلفية أثناء التحويل
+            import_registry = None
+            registry_target = ImportRegistry.target_key(self.db_config)
+            try:
+                import_registry = ImportRegistry(IMPORT_REGISTRY_FILE)
+                for file_path in scheduled_files:
+                    if not (self.skip_imported and import_registry.quick_match(file_path, registry_target)):
+                        import_registry.submit_hash(file_path)
+            except Exception as e:
+                self.message_queue.put(('info', f"⚠️ تعذر فتح سجل الاستيراد: {str(e)}"))
+            
+            # مجمع عمليات مشترك لمعالجة النصوص في كل الكتب
+            text_executor = None
+            if self.text_processes > 0:
+                text_executor = ProcessPoolExecutor(max_workers=self.text_processes)
+                self.message_queue.put(('info', f"⚙️ معالجة النصوص في {self.text_processes} عملية"))
+            
+            # الحفظ الجماعي: جلسة حفظ (اتصال مع SAVEPOINT لكل كتاب) لكل خيط تحويل
+            thread_sessions = threading.local()
+            commit_sessions = []
+            if self.commit_policy.mode == CommitPolicy.GROUP:
+                self.message_queue.put(('info', f"⚙️ حفظ جماعي كل {self.commit_policy.books} كتاب "
+                                                f"أو {self.commit_policy.seconds:g} ثانية"))
+                # أسماء المؤلفين والناشرين تُثبت فوراً على اتصال خاص بدلاً من معاملات المجموعات
+                try:
+                    converter.dimension_cache.open_writer(connection_pool)
+                except Exception as e:
+                    self.message_queue.put(('info', f"⚠️ تعذر فتح اتصال أسماء المؤلفين والناشرين، "
+                                                    f"ستُكتب داخل معاملات الحفظ الجماعي: {str(e)}"))
             
-            successful_conversions = 0
+            # حالة مشتركة بين خيوط التحويل
+            conversion_started = time.monotonic()
+            progress_lock = threading.Lock()
+            progress = {'started': 0, 'completed': 0, 'successful': 0, 'skipped': 0}
             
-            for i, file_path in enumerate(regular_files, 1):
-                self.current_file_index = i
+            def convert_book(file_path):
+                if self.cancel_event.is_set():
+                    return
+                
                 book_name = os.path.basename(file_path)
+                with progress_lock:
+                    progress['started'] += 1
+                    started = progress['started']
+                    self.current_file_index = started
+                
+                # الحجم ووقت التعديل عند البدء (تُسجل مع البصمة بعد النجاح)
+                try:
+                    file_size_at_start, file_mtime_at_start = ImportRegistry.file_stat(file_path)
+                except OSError:
+                    file_size_at_start = file_mtime_at_start = None
+                
+                # تخطي الملف إذا طابق استيراداً ناجحاً سابقاً إلى نفس القاعدة
+                if self.skip_imported and import_registry is not None:
+                    try:
+                        unchanged = import_registry.is_unchanged(file_path, registry_target)
+                    except Exception as e:
+                        unchanged = False
+                        self.message_queue.put(('info', f"⚠️ تعذر فحص بصمة {book_name}: {str(e)}"))
+                    # الملف لم يتغير لكن كتابه قد يكون حُذف من قاعدة البيانات بعد استيراده
+                    imported_book_id = import_registry.lookup(file_path, registry_target)[3] if unchanged else None
+                    if imported_book_id is not None:
+                        try:
+                            if not converter.book_exists(imported_book_id):
+                                unchanged = False
+                                import_registry.forget(file_path, registry_target)
+                                self.message_queue.put(('info', f"ℹ️ كتاب {book_name} (#{imported_book_id}) لم يعد "
+                                                                f"في قاعدة البيانات، سيُستورد من جديد"))
+                        except Exception as e:
+                            unchanged = False
+                            self.message_queue.put(('info', f"⚠️ تعذر التحقق من وجود كتاب {book_name}: {str(e)}"))
+                    if unchanged:
+                        with progress_lock:
+                            progress['completed'] += 1
+                            progress['skipped'] += 1
+                            completed = progress['completed']
+                        self.message_queue.put(('update_progress', (completed, self.total_files, f"⏭️ {book_name}")))
+                        self.message_queue.put(('info', f"⏭️ تم تخطي {book_name}: لم يتغير منذ آخر استيراد ناجح"))
+                        return
                 
-                # إعداد إحصائيات الكتاب الحالي
-                self.current_book_stats = {
+                # إحصائيات هذا الكتاب
+                book_stats = {
                     'name': book_name,
                     'file_path': file_path,
                     'start_time': datetime.now(),
@@ -2050,48 +4757,119 @@ class ShamelaGUI:
                 }
                 
                 # تحديث التقدم
-                progress_msg = f"📚 الكتاب {i}/{self.total_files}: {book_name}"
+                progress_msg = f"📚 الكتاب {started}/{self.total_files}: {book_name}"
                 self.message_queue.put(('progress', progress_msg))
-                self.message_queue.put(('update_progress', (i-1, self.total_files, progress_msg)))
                 self.message_queue.put(('info', f"🔄 بدء معالجة: {book_name}"))
                 
-                try:
-                    result = converter.convert_file(file_path)
+                # محول مستقل لكل كتاب باتصال Access خاص به واتصال MySQL من المجمع المشترك
+                book_converter = ShamelaConverter(self.db_config, self.make_message_callback(), connection_pool)
+                self.track_book_events(book_converter.events, book_stats)
+                book_converter.cancel_event = self.cancel_event
+                book_converter.schema_snapshot = converter.schema_snapshot
+                book_converter.dimension_cache = converter.dimension_cache
+                book_converter.text_only = self.text_only
+                book_converter.sync_mode = self.sync_mode
+                book_converter.commit_policy = self.commit_policy
+                if self.commit_policy.mode == CommitPolicy.GROUP:
+                    session = getattr(thread_sessions, 'session', None)
+                    if session is None:
+                        session = CommitSession(connection_pool, self.commit_policy, converter.dimension_cache)
+                        thread_sessions.session = session
+                        with progress_lock:
+                            commit_sessions.append(session)
+                    book_converter.commit_session = session
+                if text_executor is not None:
+                    book_converter.text_executor = text_executor
+                    book_converter.text_workers = self.text_processes
+                
+                # الكتاب ناجح فقط بعد حفظه فعلياً (قد يتأخر مع الحفظ الجماعي أو يضيع مع فشله)
+                def book_committed():
+                    book_stats['success'] = True
+                    book_stats['status'] = 'مكتمل بنجاح'
+                    with progress_lock:
+                        progress['successful'] += 1
+                    self.message_queue.put(('success', f"✅ تم تحويل {book_name} بنجاح"))
+                    self.add_book_summary(book_stats)
                     
-                    if result:
-                        successful_conversions += 1
-                        self.current_book_stats['success'] = True
-                        self.current_book_stats['status'] = 'مكتمل بنجاح'
-                        self.current_book_stats['end_time'] = datetime.now()
-                        
-                        # تحديث التقدم لإظهار الكتاب مكتمل
-                        progress_msg = f"✅ اكتمل {i}/{self.total_files}: {book_name}"
-                        self.message_queue.put(('update_progress', (i, self.total_files, progress_msg)))
-                        self.message_queue.put(('success', f"✅ تم تحويل {book_name} بنجاح"))
-                        
-                        # إضافة ملخص الكتاب
-                        self.add_book_summary()
-                        
-                    else:
-                        self.current_book_stats['success'] = False
-                        self.current_book_stats['status'] = 'فشل'
-                        self.current_book_stats['end_time'] = datetime.now()
-                        self.message_queue.put(('error', f"❌ فشل تحويل {book_name}"))
-                        
+                    # تسجيل الملف في سجل الاستيراد
+                    if import_registry is None or file_size_at_start is None:
+                        return
+                    try:
+                        import_registry.record(file_path, registry_target, book_converter.last_book_id,
+                                               file_size_at_start, file_mtime_at_start)
+                    except Exception as e:
+                        self.message_queue.put(('info', f"⚠️ تعذر تسجيل {book_name} في سجل الاستيراد: {str(e)}"))
+                
+                def book_discarded():
+                    book_stats['success'] = False
+                    book_stats['status'] = 'فشل: أُلغي مع الحفظ الجماعي'
+                    self.message_queue.put(('error', f"❌ لم يُحفظ {book_name}: فشل الحفظ الجماعي لمجموعته"))
+                
+                try:
+                    result = book_converter.convert_file(file_path, book_committed, book_discarded)
+                    if not result:
+                        book_stats['status'] = 'فشل'
+                    elif not book_stats['success']:
+                        book_stats['status'] = 'ينتظر الحفظ الجماعي'
                 except Exception as e:
-                    self.current_book_stats['success'] = False
-                    self.current_book_stats['status'] = f'خطأ: {str(e)[:30]}'
-                    self.current_book_stats['end_time'] = datetime.now()
+                    result = False
+                    book_stats['success'] = False
+                    book_stats['status'] = f'خطأ: {str(e)[:30]}'
                     self.message_queue.put(('error', f"❌ خطأ في تحويل {book_name}: {str(e)}"))
+                book_stats['end_time'] = datetime.now()
                 
-                # حفظ إحصائيات الكتاب
-                self.books_stats.append(self.current_book_stats.copy())
+                with progress_lock:
+                    progress['completed'] += 1
+                    completed = progress['completed']
+                    # حفظ إحصائيات الكتاب (نفس القاموس، فيُحدَّث عند الحفظ الجماعي اللاحق)
+                    self.books_stats.append(book_stats)
+                
+                if result:
+                    # تحديث التقدم لإظهار الكتاب مكتمل
+                    progress_msg = f"✅ اكتمل {completed}/{self.total_files}: {book_name}"
+                    self.message_queue.put(('update_progress', (completed, self.total_files, progress_msg)))
+                    if not book_stats['success']:
+                        self.message_queue.put(('info', f"⏳ {book_name} ينتظر الحفظ الجماعي"))
+                elif 'خطأ' not in book_stats['status']:
+                    self.message_queue.put(('update_progress', (completed, self.total_files, f"❌ {book_name}")))
+                    self.message_queue.put(('error', f"❌ فشل تحويل {book_name}"))
+                else:
+                    self.message_queue.put(('update_progress', (completed, self.total_files, f"❌ {book_name}")))
+            
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for future in [executor.submit(convert_book, file_path) for file_path in scheduled_files]:
+                        future.result()
+            finally:
+                # حفظ ما تبقى في جلسات الحفظ الجماعي
+                for session in commit_sessions:
+                    try:
+                        session.close()
+                    except Exception as e:
+                        self.message_queue.put(('error', f"❌ فشل الحفظ الجماعي الأخير: {str(e)}"))
+                converter.dimension_cache.close_writer()
+                if text_executor is not None:
+                    text_executor.shutdown()
+                if import_registry is not None:
+                    import_registry.close()
+                self.finish_bulk_load(converter, conversion_started, normal_rate)
+            
+            successful_conversions = progress['successful']
+            if progress['skipped']:
+                self.message_queue.put(('info', f"⏭️ تم تخطي {progress['skipped']} ملف لم يتغير منذ آخر استيراد"))
+            if self.cancel_event.is_set() and progress['started'] < self.total_files:
+                self.message_queue.put(('info', f"⚠️ تم إيقاف التحويل بعد بدء {progress['started']}/{self.total_files} كتاب"))
+            
+            # ترتيب إحصائيات الكتب حسب ترتيب اختيار الملفات
+            file_order = {path: position for position, path in enumerate(regular_files)}
+            self.books_stats.sort(key=lambda book: file_order.get(book['file_path'], 0))
+            
             # التحقق من النتائج النهائية
             self.message_queue.put(('progress', f"التحقق من النتائج في قاعدة البيانات..."))
             
             try:
                 # فحص عدد الكتب المضافة
-                if converter.mysql_conn:
+                if converter.connect_mysql():
                     cursor = converter.mysql_conn.cursor()
                     cursor.execute("SELECT COUNT(*) FROM books")
                     book_count = cursor.fetchone()[0]
@@ -2112,6 +4890,9 @@ class ShamelaGUI:
                     
             except Exception as e:
                 self.message_queue.put(('error', f"❌ خطأ في التحقق من النتائج: {str(e)}"))
+            finally:
+                converter.release_mysql()
+                connection_pool.close_all()
             
             # رسالة الإنهاء مع الملخص الشامل
             self.message_queue.put(('finish', f"تم الانتهاء! نجح تحويل {successful_conversions}/{self.total_files} كتاب"))
@@ -2126,57 +4907,90 @@ class ShamelaGUI:
         finally:
             self.message_queue.put(('done', None))
     
-    def parse_conversion_message(self, message):
-        """تحليل رسائل التحويل لاستخراج الإحصائيات"""
-        if not self.current_book_stats:
-            return
-            
+    def finish_bulk_load(self, converter: ShamelaConverter, conversion_started: float, normal_rate: Optional[float]):
+        """إنهاء وضع التحميل الكثيف (إن كان مفعلاً) وتسجيل معدل الصفحات لمقارنة الوضعين"""
+        rebuild_seconds = 0.0
         try:
-            # استخراج إحصائيات المجلدات
-            if "تم إنشاء المجلد" in message:
-                self.current_book_stats['volumes'] += 1
-            elif "تم إدراج" in message and "فصل" in message:
-                # استخراج عدد الفصول
-                import re
-                match = re.search(r'تم إدراج (\d+) فصل', message)
-                if match:
-                    self.current_book_stats['chapters'] = int(match.group(1))
-            elif "تم إدراج" in message and "صفحة" in message and "فصل" in message:
-                # استخراج عدد الصفحات والفصول معاً
-                import re
-                # البحث عن النمط: "تم إدراج X صفحة و Y فصل"
-                match = re.search(r'تم إدراج (\d+) صفحة و (\d+) فصل', message)
-                if match:
-                    self.current_book_stats['pages'] = int(match.group(1))
-                    self.current_book_stats['chapters'] = int(match.group(2))
-            elif "إجمالي الصفحات:" in message:
-                # استخراج من رسائل الإحصائيات
-                import re
-                match = re.search(r'إجمالي الصفحات: (\d+)', message)
-                if match:
-                    self.current_book_stats['pages'] = int(match.group(1))
-            elif "إجمالي الفصول:" in message:
-                # استخراج من رسائل الإحصائيات
-                import re
-                match = re.search(r'إجمالي الفصول: (\d+)', message)
-                if match:
-                    self.current_book_stats['chapters'] = int(match.group(1))
-            elif "تم تحديث معلومات الكتاب:" in message:
-                # استخراج عدد الصفحات النهائي
-                import re
-                match = re.search(r'تم تحديث معلومات الكتاب: (\d+) صفحة', message)
-                if match:
-                    self.current_book_stats['pages'] = int(match.group(1))
+            if not converter.connect_mysql():
+                return
+            if self.bulk_load:
+                rebuild_started = time.monotonic()
+                if not converter.end_bulk_load():
+                    self.message_queue.put(('error', "⚠️ لم تُستعد كل الفهارس، ستُعاد المحاولة في التشغيل التالي"))
+                rebuild_seconds = time.monotonic() - rebuild_started
+            
+            # الزمن يشمل إعادة بناء الفهارس حتى تكون المقارنة عادلة
+            pages = sum(book.get('pages', 0) for book in self.books_stats if book.get('success'))
+            seconds = time.monotonic() - conversion_started
+            converter.record_throughput('bulk' if self.bulk_load else 'normal', pages, seconds)
+            if self.bulk_load:
+                self.bulk_load_stats = {
+                    'pages': pages,
+                    'seconds': seconds,
+                    'rebuild_seconds': rebuild_seconds,
+                    'normal_rate': normal_rate
+                }
         except Exception as e:
-            print(f"خطأ في تحليل الرسالة: {e}")
-            pass
+            self.message_queue.put(('error', f"❌ خطأ في إنهاء وضع التحميل الكثيف: {str(e)}"))
+        finally:
+            converter.release_mysql()
     
-    def add_book_summary(self):
+    def bulk_load_summary_lines(self) -> List[str]:
+        """أسطر مقارنة زمن التحميل الكثيف بالزمن المتوقع في الوضع العادي"""
+        stats = self.bulk_load_stats
+        if not stats:
+            return []
+        lines = [f"⚡ التحميل الكثيف: {stats['pages']} صفحة في {stats['seconds']:.1f} ثانية "
+                 f"(منها {stats['rebuild_seconds']:.1f} ثانية لإعادة بناء الفهارس)"]
+        if stats['normal_rate']:
+            # تقدير فقط: من متوسط معدل الجلسات السابقة بالوضع العادي، لا من قياس لهذه الجلسة
+            normal_seconds = stats['pages'] / stats['normal_rate']
+            saved = normal_seconds - stats['seconds']
+            lines.append(f"⏱️ الزمن التقديري في الوضع العادي (حسب متوسط الجلسات السابقة): {normal_seconds:.1f} ثانية "
+                         f"({'توفير' if saved >= 0 else 'زيادة'} تقديري {abs(saved):.1f} ثانية)")
+        else:
+            lines.append("⏱️ لا توجد جلسة سابقة بالوضع العادي لحساب الزمن الموفر")
+        return lines
+    
+    def make_message_callback(self):
+        """إنشاء دالة callback لاستقبال رسائل محول كتاب واحد"""
+        def message_callback(message, level):
+            if level == "ERROR":
+                self.message_queue.put(('error', f"❌ {message}"))
+            elif level == "WARNING":
+                self.message_queue.put(('info', f"⚠️ {message}"))
+            else:
+                self.message_queue.put(('info', f"ℹ️ {message}"))
+        return message_callback
+    
+    def track_book_events(self, events: EventBus, book_stats: Dict):
+        """تحديث إحصائيات الكتاب من أحداث محوله"""
+        def volume_created(event: VolumeCreated):
+            book_stats['volumes'] += 1
+        
+        def chapter_resolved(event: ChapterRangeResolved):
+            book_stats['chapters'] += 1
+        
+        def pages_written(event: PagesBatchWritten):
+            book_stats['pages'] += event.pages
+        
+        def book_finished(event: BookFinished):
+            # الأرقام النهائية تشمل الصفحات التي لم تُكتب من جديد (المزامنة والاستئناف)
+            if event.success:
+                book_stats['volumes'], book_stats['chapters'], book_stats['pages'] = event.stats
+            if event.profile is not None:
+                book_stats['profile'] = event.profile
+        
+        events.subscribe(VolumeCreated, volume_created)
+        events.subscribe(ChapterRangeResolved, chapter_resolved)
+        events.subscribe(PagesBatchWritten, pages_written)
+        events.subscribe(BookFinished, book_finished)
+    
+    def add_book_summary(self, stats: Dict):
         """إضافة ملخص للكتاب المكتمل"""
-        if not self.current_book_stats:
+        if not stats:
             return
             
-        stats = self.current_book_stats
         duration = ""
         if 'end_time' in stats and 'start_time' in stats:
             duration_delta = stats['end_time'] - stats['start_time']
@@ -2221,6 +5035,9 @@ class ShamelaGUI:
             total_session_str = str(total_session_time).split('.')[0]
             self.message_queue.put(('info', f"⏱️ إجمالي وقت الجلسة: {total_session_str}"))
         
+        for line in self.bulk_load_summary_lines():
+            self.message_queue.put(('info', line))
+        
         # تفاصيل كل كتاب
         self.message_queue.put(('info', "\n📋 تفاصيل الكتب:"))
         for i, book in enumerate(self.books_stats, 1):
@@ -2233,21 +5050,31 @@ class ShamelaGUI:
 
     def check_message_queue(self):
         """فحص ومعالجة رسائل التحويل مع دعم التقدم المحدد المتقدم"""
+        # معالجة الرسائل ضمن ميزانية زمنية بدل عدد ثابت، مع الاكتفاء بآخر تحديث للتقدم
+        deadline = time.monotonic() + self.queue_drain_budget
+        latest_progress = None
+        latest_update = None
         try:
-            messages_processed = 0
-            while messages_processed < 10:  # معالجة حتى 10 رسائل في المرة الواحدة
+            while time.monotonic() < deadline:
                 message_type, message = self.message_queue.get_nowait()
-                messages_processed += 1
                 
                 if message_type == 'progress':
-                    self.progress_var.set(message)
-                    self.update_status(message)
                     self.log_message(message, "PROGRESS")
-                elif message_type == 'update_progress':
-                    # رسالة تحديث التقدم: (current, total, message)
-                    current, total, msg = message
-                    self.update_progress(current, total, msg)
-                elif message_type == 'success':
+                    latest_progress = message
+                    continue
+                if message_type == 'update_progress':
+                    # رسالة تحديث التقدم: (current, total, message)، ونصها يحل محل رسالة تقدم أقدم
+                    latest_update = message
+                    if message[2]:
+                        latest_progress = None
+                    continue
+                
+                if message_type in ('finish', 'done'):
+                    # تطبيق آخر تقدم قبل رسائل الانتهاء حتى لا يُكتب فوقها
+                    self.apply_coalesced_progress(latest_progress, latest_update)
+                    latest_progress = latest_update = None
+                
+                if message_type == 'success':
                     self.log_message(message, "SUCCESS")
                 elif message_type == 'info':
                     self.log_message(message, "INFO")
@@ -2269,6 +5096,7 @@ class ShamelaGUI:
                     self.cancel_btn.configure(state="disabled")
                     self.progress_bar.stop()
                     self.progress_var.set("تم الانتهاء من التحويل")
+                    self.status_details_var.set("")
                     
                     # حساب الوقت الإجمالي
                     if self.start_time:
@@ -2282,9 +5110,25 @@ class ShamelaGUI:
         except queue.Empty:
             pass
         
-        # جدولة التحقق التالي
+        self.apply_coalesced_progress(latest_progress, latest_update)
+        
+        # عمق قائمة الرسائل وتأخر آخر رسالة معالجة عن وقت إرسالها، أثناء التحويل فقط
+        # (بعد انتهائه يبقى سطر الحالة ممسوحاً كما تركته رسالة 'done')
         if self.conversion_running:
-            self.root.after(100, self.check_message_queue)
+            backlog = self.message_queue.qsize()
+            self.status_details_var.set(f"📨 في الانتظار: {backlog} | تأخر: {self.message_queue.last_lag:.1f} ث")
+            
+            # جدولة التحقق التالي (أسرع إذا بقيت رسائل متراكمة)
+            self.root.after(10 if backlog else 100, self.check_message_queue)
+    
+    def apply_coalesced_progress(self, progress_message, update):
+        """تطبيق آخر رسالة تقدم وآخر تحديث لشريط التقدم فقط"""
+        if update is not None:
+            current, total, msg = update
+            self.update_progress(current, total, msg)
+        if progress_message is not None:
+            self.progress_var.set(progress_message)
+            self.update_status(progress_message)
     
     def log_message(self, message, msg_type="INFO"):
         """تسجيل رسالة في السجل مع دعم الألوان والتصفية"""
@@ -2301,26 +5145,24 @@ class ShamelaGUI:
             elif "🔄" in message or "جاري" in message or "بدء" in message:
                 msg_type = "PROGRESS"
         
-        full_message = f"[{timestamp}] {message}"
-        
         # حفظ الرسالة للتصفية
-        msg_data = {
-            'timestamp': timestamp,
-            'message': message,
-            'type': self.map_message_type(msg_type),
-            'full_message': full_message,
-            'tag': msg_type
-        }
-        self.all_log_messages.append(msg_data)
+        entry = LogEntry(timestamp, message, self.map_message_type(msg_type), msg_type)
+        self.log_store.append(entry)
         
-        # عرض الرسالة إذا كانت تطابق الفلتر الحالي
+        # عرض الرسالة إذا كانت تطابق الفلتر الحالي، مع الرسائل الأخرى في الإطار التالي
         current_filter = self.filter_var.get()
-        if current_filter == "الكل" or msg_data['type'] == current_filter:
-            self.display_log_message(msg_data)
-        
-        # التمرير للأسفل
-        self.log_text.see(tk.END)
-        self.log_text.update()
+        if current_filter == "الكل" or entry.category == current_filter:
+            self.pending_log_messages.append(entry)
+            if not self.log_flush_scheduled:
+                self.log_flush_scheduled = True
+                self.root.after(self.log_frame_ms, self.flush_log_messages)
+    
+    def flush_log_messages(self):
+        """كتابة الرسائل المنتظرة في السجل دفعة واحدة (مرة كل إطار على الأكثر)"""
+        self.log_flush_scheduled = False
+        messages, self.pending_log_messages = self.pending_log_messages, []
+        if messages:
+            self.display_log_messages(messages)
     
     def map_message_type(self, msg_type):
         """تحويل نوع الرسالة للعربية للتصفية"""
@@ -2353,13 +5195,22 @@ class ShamelaGUI:
         
         self.status_var.set(status_msg)
 
-    def display_log_message(self, msg_data):
-        """عرض رسالة واحدة في السجل مع التنسيق"""
-        # إدراج timestamp مع لون خاص
-        self.log_text.insert(tk.END, f"[{msg_data['timestamp']}] ", "timestamp")
+    def display_log_messages(self, messages: List[LogEntry]):
+        """عرض عدة رسائل في السجل بعملية insert واحدة ثم التمرير للأسفل مرة واحدة"""
+        if not messages:
+            return
+        
+        # insert يقبل أزواج (نص، وسم) متتالية: timestamp بلون خاص ثم الرسالة بلون نوعها
+        chunks = []
+        for entry in messages[-self.log_store.view_limit:]:
+            chunks.extend((f"[{entry.timestamp}] ", "timestamp", f"{entry.message}\n", entry.tag))
+        self.log_text.insert(tk.END, *chunks)
         
-        # إدراج الرسالة مع اللون المناسب
-        self.log_text.insert(tk.END, f"{msg_data['message']}\n", msg_data['tag'])
+        # إبقاء الواجهة على آخر view_limit سطر فقط، والباقي في المخزن
+        excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - self.log_store.view_limit
+        if excess > 0:
+            self.log_text.delete('1.0', f'{excess + 1}.0')
+        self.log_text.see(tk.END)
     
     def update_progress(self, current, total, message=""):
         """تحديث شريط التقدم والمعلومات"""
@@ -2392,8 +5243,6 @@ class ShamelaGUI:
                 else:
                     self.time_var.set(f"منقضي: {elapsed_str}")
             
-            self.root.update_idletasks()
-            
         except Exception as e:
             print(f"خطأ في تحديث التقدم: {e}")
     
@@ -2416,7 +5265,6 @@ class ShamelaGUI:
             status_msg = message
         
         self.status_var.set(status_msg)
-        self.root.update_idletasks()
     
     def test_database_connection(self):
         """اختبار الاتصال بقاعدة البيانات"""
@@ -2462,4 +5310,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # ضروري لمجمع عمليات النصوص في الملف التنفيذي المجمّع بـ PyInstaller
+    multiprocessing.freeze_support()
     main()
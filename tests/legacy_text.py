@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+الدوال المرجعية لتنظيف النصوص وتحويلها إلى HTML كما كانت في ShamelaConverter قبل
+TextNormalizer و HtmlFormatter، ومولد نصوص اختبار يشبه صفحات الشاملة.
+تُستخدم لمقارنة المخرجات (golden output) وقياس الأداء.
+"""
+
+import random
+import re
+
+
+def clean_text(text) -> str:
+    """clean_text القديمة"""
+    if not text:
+        return ""
+    text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', str(text))
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r'\n\s*\n', '\n\n', text)
+    return text.strip()
+
+
+def preserve_arabic_diacritics(text: str) -> str:
+    """preserve_arabic_diacritics القديمة"""
+    if not text:
+        return ""
+    arabic_pattern = r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]'
+    if not re.search(arabic_pattern, text):
+        return text
+    control_chars = r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]'
+    return re.sub(control_chars, '', text)
+
+
+def extract_arabic_text_enhanced(text: str) -> str:
+    """extract_arabic_text_enhanced القديمة"""
+    if not text:
+        return ""
+    text = preserve_arabic_diacritics(text)
+    allowed_pattern = r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF\u064B-\u065F\u0670\u06D6-\u06ED0-9\s\n\r.,;:!?()\[\]{}"\'-=«»¬_]'
+    cleaned_text = ''.join(re.findall(allowed_pattern, text))
+    cleaned_text = re.sub(r'[ \t]+', ' ', cleaned_text)
+    cleaned_text = re.sub(r'\n\s*\n\s*\n+', '\n\n', cleaned_text)
+    return cleaned_text.strip()
+
+
+def format_text_to_html(text: str) -> str:
+    """format_text_to_html القديمة (سلسلة التعابير النمطية)"""
+    if not text:
+        return ""
+
+    text = preserve_arabic_diacritics(text)
+
+    text = re.sub(r'¬_{3,}', '¬__________', text)
+    text = re.sub(r'(?<!\n)\s*¬__________\s*(?!\n)', '\n¬__________\n', text)
+    text = re.sub(r'(?<!\n)\s*===\s*(?!\n)', '\n===\n', text)
+    lines_temp = text.split('\n')
+    for i, line in enumerate(lines_temp):
+        if re.match(r'^_{3,}$', line.strip()):
+            if i > 0 and lines_temp[i-1].strip() == '¬':
+                continue
+            if i > 0 and lines_temp[i-1].strip() != '':
+                lines_temp[i] = '\n' + line
+            if i < len(lines_temp) - 1 and lines_temp[i+1].strip() != '':
+                lines_temp[i] = line + '\n'
+    text = '\n'.join(lines_temp)
+    text = re.sub(r'(?<!\n)\s*ـ{5,}\s*(?!\n)', '\n' + 'ـ' * 20 + '\n', text)
+
+    lines = text.split('\n')
+    html_content = []
+    current_paragraph = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if current_paragraph:
+                paragraph_text = '<br>\n'.join(current_paragraph)
+                html_content.append(f'<p>{paragraph_text}</p>')
+                current_paragraph = []
+        elif line == '===' or re.match(r'^_{3,}$', line) or re.match(r'^ـ{3,}$', line) or re.match(r'^¬_{3,}$', line):
+            if current_paragraph:
+                paragraph_text = '<br>\n'.join(current_paragraph)
+                html_content.append(f'<p>{paragraph_text}</p>')
+                current_paragraph = []
+            html_content.append(f'<p style="text-align: center; margin: 10px 0;">{line}</p>')
+        else:
+            current_paragraph.append(line)
+    if current_paragraph:
+        paragraph_text = '<br>\n'.join(current_paragraph)
+        html_content.append(f'<p>{paragraph_text}</p>')
+    return '\n'.join(html_content)
+
+
+# مكونات نصوص الاختبار: كلمات عربية بتشكيل، أحرف تحكم، خطوط فاصلة، ومسافات متنوعة
+WORDS = ['بِسْمِ', 'اللَّهِ', 'الرَّحْمَنِ', 'قال', 'حدثنا', 'عن', 'النبي ﷺ', 'كتاب', 'باب', '«قول»',
+         '(١٢)', '[٣]', 'ص:45', 'الإمام', 'ٱلْحَمْدُ', 'ﻻ', 'ۖ', 'ر.', 'وَ', 'Latin', 'é', '€', '—']
+NOISE = ['\x00', '\x07', '\x0b', '\x0c', '\x1b', '\x7f', '\x85', '\x9f', '\t', '  ', ' \t ', '\r']
+SEPARATORS = ['===', ' === ', '\n===\n', '¬___', '¬__________', ' ¬_____ ', '__________', '\n___\n',
+              'ـــــ', ' ـــــــــــــ ', 'ــــ', '\nـــــ\n', '=====', '¬', '_']
+BREAKS = ['\n', '\n\n', '\n \n', '\n\t\n\n', ' \n', '\n\n\n\n']
+
+
+def random_page(rng: random.Random, words: int = 200) -> str:
+    """نص صفحة عشوائي بالحجم التقريبي المطلوب بالكلمات"""
+    parts = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < 0.04:
+            parts.append(rng.choice(NOISE))
+        elif roll < 0.07:
+            parts.append(rng.choice(SEPARATORS))
+        elif roll < 0.15:
+            parts.append(rng.choice(BREAKS))
+        else:
+            parts.append(rng.choice(WORDS))
+        parts.append(rng.choice([' ', ' ', ' ', '', '  ']))
+    return ''.join(parts)
+
+
+def corpus(count: int, words: int = 200, seed: int = 0):
+    """قائمة صفحات اختبار ثابتة لنفس البذرة، تبدأ بحالات حدية"""
+    rng = random.Random(seed)
+    edge_cases = ['', ' ', '\n', 'abc', '===', '¬', '\x00\x85', 'نص\x00عربي\x9f', ' === ', '\n===\n',
+                  'a === b', 'ـــــ', 'قبل ـــــ بعد', '¬___ نص', '___', '\n___\n', '¬\n___', 'ﻻ\t\t  ﻻ']
+    return edge_cases + [random_page(rng, words) for _ in range(count)]
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار CommitSession (الحفظ الجماعي) على مجمع واتصال وهميين يسجلان العبارات المنفذة:
+التراجع عن الكتاب الفاشل وحده، وإزالة معرفات الأسماء المنتظرة له، وضياع المجموعة كاملة عند فشل الحفظ،
+وحفظ المجموعة بعد عدد الكتب أو عدد الثواني المحدد.
+
+التشغيل: python tests/test_commit_session.py
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shamela_gui
+from shamela_gui import BookFinished, CommitPolicy, CommitSession, DimensionCache, ShamelaConverter
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.lastrowid = None
+
+    def execute(self, sql: str, params=None):
+        statement = ' '.join(sql.split())
+        self.conn.statements.append(statement)
+        if statement.startswith('INSERT INTO'):
+            self.conn.next_id += 1
+            self.lastrowid = self.conn.next_id
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
+
+class FakeConnection:
+    """اتصال يسجل العبارات والحفظ، ويمكن أن يفشل عند الحفظ"""
+
+    def __init__(self, fail_commit: Exception = None):
+        self.statements = []
+        self.commits = 0
+        self.next_id = 100
+        self.fail_commit = fail_commit
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        if self.fail_commit is not None:
+            raise self.fail_commit
+        self.commits += 1
+        self.statements.append('COMMIT')
+
+
+class FakePool:
+    def __init__(self, conn: FakeConnection):
+        self.conn = conn
+        self.released = []
+
+    def acquire(self, timeout: float = None):
+        return self.conn
+
+    def release(self, conn):
+        self.released.append(conn)
+
+
+def make_session(books: int = 20, seconds: float = 3600, fail_commit: Exception = None):
+    conn = FakeConnection(fail_commit)
+    pool = FakePool(conn)
+    session = CommitSession(pool, CommitPolicy(CommitPolicy.GROUP, books=books, seconds=seconds), DimensionCache())
+    session.dimension_cache.warmed.update(DimensionCache.DIMENSIONS)
+    return session, conn, pool
+
+
+def add_book(session: CommitSession, author: str, success: bool, events: list, name: str):
+    """كتاب واحد داخل الجلسة: SAVEPOINT ثم مؤلف جديد ثم إنهاؤه بالنجاح أو الفشل"""
+    session.begin_book()
+    session.dimension_cache.get_or_create(session.connection().cursor(), 'authors', author, datetime.now())
+    session.end_book(success, on_commit=lambda: events.append(('commit', name)),
+                     on_discard=lambda: events.append(('discard', name)))
+
+
+def test_failed_book_rolled_back_alone():
+    """الكتاب الفاشل يُلغى بـ ROLLBACK TO SAVEPOINT وتبقى الكتب قبله وبعده منتظرة للحفظ نفسه"""
+    session, conn, pool = make_session()
+    events = []
+    add_book(session, 'مؤلف أ', True, events, 'أ')
+    add_book(session, 'مؤلف ب', False, events, 'ب')
+    add_book(session, 'مؤلف ج', True, events, 'ج')
+
+    assert conn.statements.count(f"ROLLBACK TO SAVEPOINT {CommitSession.SAVEPOINT}") == 1
+    assert conn.statements.count(f"RELEASE SAVEPOINT {CommitSession.SAVEPOINT}") == 2
+    assert session.pending_books == 2 and conn.commits == 0
+
+    session.close()
+    assert conn.commits == 1
+    assert events == [('commit', 'أ'), ('commit', 'ج')]
+    assert pool.released == [conn]
+
+
+def test_failed_book_dimension_ids_removed():
+    """معرف المؤلف الذي أُنشئ داخل الكتاب الفاشل يُزال من المنتظر، ولا يصل إلى المعرفات الثابتة بعد الحفظ"""
+    session, conn, pool = make_session()
+    cache = session.dimension_cache
+    events = []
+    add_book(session, 'مؤلف أ', True, events, 'أ')
+    add_book(session, 'مؤلف ب', False, events, 'ب')
+
+    pending = cache.pending[session.owner]
+    assert [key for table, key in pending] == [cache.normalize('مؤلف أ')]
+
+    session.commit()
+    assert cache.normalize('مؤلف أ') in cache.ids['authors']
+    assert cache.normalize('مؤلف ب') not in cache.ids['authors']
+    assert session.owner not in cache.pending
+
+
+def test_commit_failure_discards_every_pending_book():
+    """فشل الحفظ يضيّع كل الكتب المنتظرة: on_discard لكل كتاب، ولا on_commit، وتُزال معرفاتها المنتظرة"""
+    session, conn, pool = make_session(books=3, fail_commit=Exception('lost connection'))
+    events = []
+    add_book(session, 'مؤلف أ', True, events, 'أ')
+    add_book(session, 'مؤلف ب', True, events, 'ب')
+    try:
+        add_book(session, 'مؤلف ج', True, events, 'ج')
+    except Exception as e:
+        assert str(e) == 'lost connection'
+    else:
+        raise AssertionError('فشل الحفظ لم يُرفع')
+
+    assert events == [('discard', 'أ'), ('discard', 'ب'), ('discard', 'ج')]
+    assert pool.released == [conn] and session.conn is None
+    assert session.pending_books == 0
+    assert not session.dimension_cache.ids['authors'] and session.owner not in session.dimension_cache.pending
+
+
+def test_deadlock_is_transaction_loss():
+    """أخطاء deadlock وضياع SAVEPOINT تعني ضياع المجموعة كلها، وغيرها لا"""
+    assert CommitSession.transaction_lost(Exception(1213, 'Deadlock found when trying to get lock'))
+    assert CommitSession.transaction_lost(Exception(1305, 'SAVEPOINT shamela_book does not exist'))
+    assert not CommitSession.transaction_lost(Exception(1062, 'Duplicate entry'))
+    assert not CommitSession.transaction_lost(Exception())
+
+
+def test_commit_after_books():
+    """الحفظ بعد كل books كتاب ناجح، والكتاب الفاشل لا يُحتسب"""
+    session, conn, pool = make_session(books=2)
+    events = []
+    add_book(session, 'مؤلف أ', True, events, 'أ')
+    assert conn.commits == 0
+    add_book(session, 'مؤلف ب', False, events, 'ب')
+    assert conn.commits == 0
+    add_book(session, 'مؤلف ج', True, events, 'ج')
+    assert conn.commits == 1 and events == [('commit', 'أ'), ('commit', 'ج')]
+    add_book(session, 'مؤلف د', True, events, 'د')
+    assert conn.commits == 1 and session.pending_books == 1
+
+
+def test_commit_after_seconds():
+    """الحفظ عند مرور seconds ثانية على أول كتاب منتظر ولو لم يكتمل عدد الكتب"""
+    clock = [1000.0]
+    monotonic = shamela_gui.time.monotonic
+    shamela_gui.time.monotonic = lambda: clock[0]
+    try:
+        session, conn, pool = make_session(books=100, seconds=5)
+        events = []
+        add_book(session, 'مؤلف أ', True, events, 'أ')
+        clock[0] += 4
+        add_book(session, 'مؤلف ب', True, events, 'ب')
+        assert conn.commits == 0
+        clock[0] += 1
+        add_book(session, 'مؤلف ج', True, events, 'ج')
+        assert conn.commits == 1 and len(events) == 3
+        assert session.pending_since is None
+    finally:
+        shamela_gui.time.monotonic = monotonic
+
+
+def test_writer_connection_commits_names_immediately():
+    """مع اتصال الأسماء تُكتب الأسماء الجديدة عليه لا على اتصال الجلسة، ولا تُلغى مع الكتاب الفاشل"""
+    session, conn, pool = make_session()
+    writer = FakeConnection()
+    session.dimension_cache.writer = writer
+    events = []
+    add_book(session, 'مؤلف أ', False, events, 'أ')
+
+    assert not any(statement.startswith('INSERT INTO authors') for statement in conn.statements)
+    assert any(statement.startswith('INSERT INTO authors') for statement in writer.statements)
+    assert session.dimension_cache.normalize('مؤلف أ') in session.dimension_cache.ids['authors']
+
+
+def make_group_converter(session: CommitSession, fail_books=()) -> ShamelaConverter:
+    """محول يحول كل كتاب داخل الجلسة دون ملفات Access (الكتب في fail_books تفشل)"""
+    converter = ShamelaConverter({'database': 'test'})
+    converter.log_message = lambda *args, **kwargs: None
+    converter.commit_session = session
+
+    def convert_file_in_session(path, on_commit, on_discard):
+        success = os.path.basename(path) not in fail_books
+        session.begin_book()
+        try:
+            session.end_book(success, on_commit, on_discard)
+        except Exception:
+            return False
+        return success
+
+    converter.convert_file_in_session = convert_file_in_session
+    return converter
+
+
+def test_book_finished_published_after_group_commit():
+    """BookFinished(success=True) يُنشر عند حفظ المجموعة لا عند انتهاء التحويل، وقبل on_commit للكتاب"""
+    session, conn, pool = make_session(books=2)
+    converter = make_group_converter(session, fail_books={'b.accdb'})
+    order = []
+    converter.events.subscribe(BookFinished, lambda event: order.append((event.source_file, event.success)))
+
+    converter.convert_file('/x/a.accdb', lambda: order.append('commit a'))
+    assert order == []
+    converter.convert_file('/x/b.accdb', lambda: order.append('commit b'))
+    assert order == [('b.accdb', False)]
+    converter.convert_file('/x/c.accdb', lambda: order.append('commit c'))
+    assert order == [('b.accdb', False), ('a.accdb', True), 'commit a', ('c.accdb', True), 'commit c']
+
+
+def test_book_finished_failure_when_group_discarded():
+    """الكتب المنتظرة التي ضاعت مع فشل الحفظ الجماعي يُنشر لها BookFinished(success=False) مرة واحدة"""
+    session, conn, pool = make_session(books=2, fail_commit=Exception('lost connection'))
+    converter = make_group_converter(session)
+    order = []
+    converter.events.subscribe(BookFinished, lambda event: order.append((event.source_file, event.success)))
+
+    assert converter.convert_file('/x/a.accdb', on_discard=lambda: order.append('discard a'))
+    assert not converter.convert_file('/x/b.accdb', on_discard=lambda: order.append('discard b'))
+    assert order == [('a.accdb', False), 'discard a', ('b.accdb', False), 'discard b']
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار تطابق مخرجات HtmlFormatter مع format_text_to_html القديمة،
+وقياس زمن التحويل على صفحات كبيرة (50 KB فأكثر) للطريقتين.
+
+التشغيل: python tests/test_html_formatter.py [عدد الصفحات الكبيرة]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import legacy_text
+from shamela_gui import HtmlFormatter
+
+# أقل حجم لصفحة الاختبار الكبيرة بالبايت
+LARGE_PAGE_BYTES = 50 * 1024
+
+
+def large_pages(count: int, seed: int = 0):
+    """صفحات كبيرة: نص عشوائي عادي، ونص كثير الفواصل والمسافات (أسوأ حالة لتراجع التعابير النمطية)"""
+    rng = random.Random(seed)
+    pages = []
+    for i in range(count):
+        if i % 2:
+            parts = []
+            size = 0
+            while size < LARGE_PAGE_BYTES:
+                parts.append(rng.choice(['===', '¬___', 'ـــــــ', 'نص']) + ' ' * rng.randint(0, 40))
+                size += len(parts[-1].encode('utf-8'))
+            page = ''.join(parts)
+        else:
+            page = legacy_text.random_page(rng, words=400)
+            while len(page.encode('utf-8')) < LARGE_PAGE_BYTES:
+                page += legacy_text.random_page(rng, words=400)
+        pages.append(page)
+    return pages
+
+
+def test_formatter_matches_legacy():
+    """مخرجات HtmlFormatter مطابقة حرفياً لـ format_text_to_html القديمة"""
+    formatter = HtmlFormatter()
+    for text in legacy_text.corpus(2000, words=80, seed=2) + large_pages(4, seed=3):
+        expected = legacy_text.format_text_to_html(text)
+        actual = formatter.format(text)
+        assert actual == expected, f"{text[:200]!r}\n{actual[:300]!r}\n{expected[:300]!r}"
+
+
+def benchmark(page_count: int = 20):
+    """قياس زمن تحويل الصفحات الكبيرة إلى HTML بالطريقتين"""
+    pages = large_pages(page_count, seed=4)
+    formatter = HtmlFormatter()
+    kilobytes = [len(page.encode('utf-8')) / 1024 for page in pages]
+    print(f"=== قياس HtmlFormatter: {len(pages)} صفحة، "
+          f"{min(kilobytes):.0f}-{max(kilobytes):.0f} KB للصفحة ===")
+
+    timings = {}
+    for label, function in (('القديمة', legacy_text.format_text_to_html), ('الجديدة', formatter.format)):
+        per_page = []
+        for page in pages:
+            start = time.perf_counter()
+            function(page)
+            per_page.append(time.perf_counter() - start)
+        timings[label] = per_page
+        total = sum(per_page)
+        print(f"{label}: المجموع {total * 1000:.1f} ms | أبطأ صفحة {max(per_page) * 1000:.1f} ms | "
+              f"{sum(kilobytes) / 1024 / total:.1f} MB/s")
+    print(f"التسريع: {sum(timings['القديمة']) / sum(timings['الجديدة']):.2f}x")
+
+
+if __name__ == "__main__":
+    test_formatter_matches_legacy()
+    print("✅ مخرجات HtmlFormatter مطابقة لـ format_text_to_html القديمة")
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار LogStore في مجلد مؤقت: إخراج الأقدم من الحلقة إلى ملف JSONL، وآخر الرسائل لكل نوع،
+وترتيب المرور على السجل كاملاً، وحذف الأرشيف مع clear()، وحذف ملفات الجلسات القديمة.
+
+التشغيل: python tests/test_log_store.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shamela_gui import LogEntry, LogStore
+
+CATEGORIES = ['info', 'error', 'success']
+
+
+def entry(i: int) -> LogEntry:
+    category = CATEGORIES[i % len(CATEGORIES)]
+    return LogEntry(f"12:00:{i:02d}", f"رسالة {i}", category, category)
+
+
+def fill(store: LogStore, count: int):
+    for i in range(count):
+        store.append(entry(i))
+
+
+def test_ring_evicts_oldest_to_archive():
+    """الحلقة لا تتجاوز capacity، والأقدم يُلحق بملف JSONL بالترتيب"""
+    with tempfile.TemporaryDirectory() as archive_dir:
+        store = LogStore(capacity=5, view_limit=3, archive_dir=archive_dir)
+        fill(store, 5)
+        assert store.archive is None and not os.path.exists(store.archive_path)
+
+        fill(store, 12)
+        assert len(store.entries) == 5 and store.archived == 12 and len(store) == 17
+        assert [e.message for e in store.entries] == [f"رسالة {i}" for i in range(7, 12)]
+
+        store.close()
+        with open(store.archive_path, encoding='utf-8') as f:
+            archived = [LogEntry(*json.loads(line)) for line in f]
+        assert archived == [entry(i) for i in range(5)] + [entry(i) for i in range(7)]
+
+
+def test_tail_per_category():
+    """آخر الرسائل لكل نوع تبقى متاحة حتى بعد خروجها من الحلقة، بحد view_limit"""
+    with tempfile.TemporaryDirectory() as archive_dir:
+        store = LogStore(capacity=4, view_limit=3, archive_dir=archive_dir)
+        fill(store, 30)
+        assert store.tail('error') == [entry(i) for i in (22, 25, 28)]
+        assert store.tail('error', limit=1) == [entry(28)]
+        assert store.tail() == [entry(i) for i in (27, 28, 29)]
+        assert store.tail('warning') == []
+        store.close()
+
+
+def test_iter_archive_then_memory():
+    """المرور على السجل يعيد كل رسائل الجلسة بترتيبها: المؤرشفة ثم ما في الذاكرة"""
+    with tempfile.TemporaryDirectory() as archive_dir:
+        store = LogStore(capacity=4, archive_dir=archive_dir)
+        fill(store, 10)
+        assert list(store) == [entry(i) for i in range(10)]
+        store.append(entry(10))
+        assert list(store) == [entry(i) for i in range(11)]
+        store.close()
+
+
+def test_clear_removes_archive():
+    """clear() يفرغ الذاكرة ويحذف ملف الأرشيف، ويبدأ أرشيفاً جديداً عند الحاجة"""
+    with tempfile.TemporaryDirectory() as archive_dir:
+        store = LogStore(capacity=2, archive_dir=archive_dir)
+        fill(store, 6)
+        assert os.path.exists(store.archive_path)
+
+        store.clear()
+        assert len(store) == 0 and list(store) == [] and store.tail('info') == []
+        assert not os.path.exists(store.archive_path)
+
+        fill(store, 3)
+        assert list(store) == [entry(i) for i in range(3)]
+        store.close()
+
+
+def test_old_sessions_pruned():
+    """عند بدء أرشيف الجلسة تُحذف أقدم ملفات الجلسات فيبقى keep_sessions ملفاً، ولا تُمس الملفات الأخرى"""
+    with tempfile.TemporaryDirectory() as archive_dir:
+        old = [f"session_202601{day:02d}_120000.jsonl" for day in range(1, 6)]
+        for name in old + ['notes.txt']:
+            open(os.path.join(archive_dir, name), 'w').close()
+
+        store = LogStore(capacity=1, archive_dir=archive_dir, keep_sessions=3)
+        fill(store, 2)
+        store.close()
+        remaining = sorted(os.listdir(archive_dir))
+        assert remaining == sorted(old[-2:] + ['notes.txt', os.path.basename(store.archive_path)])
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
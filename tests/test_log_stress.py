@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار ضغط لسجل الأحداث في الواجهة: 100 ألف رسالة عبر log_message على نافذة Tk مخفية،
+مع قياس تأخر حلقة الأحداث (نبضة كل 10 ms تسجل تأخر تنفيذها عن موعدها).
+
+سيناريوهان:
+- مباشر: دفعات من الرسائل تُستدعى فيها log_message من خيط الواجهة
+- قائمة الرسائل: خيط منتج يرسل الرسائل إلى message_queue كما يفعل التحويل، و check_message_queue تفرغها
+
+يحتاج إلى شاشة (أو Xvfb على الخوادم).
+التشغيل: python tests/test_log_stress.py [عدد الرسائل]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import tkinter as tk
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shamela_gui import LogStore, ShamelaGUI
+
+# أنواع الرسائل بالتناوب: (نوع رسالة القائمة، نوع log_message)
+MESSAGE_TYPES = [('info', 'INFO'), ('success', 'SUCCESS'), ('warning', 'WARNING'), ('error', 'ERROR'),
+                 ('progress', 'PROGRESS')]
+
+
+class LoopLatencyProbe:
+    """نبضة دورية على حلقة أحداث Tk تسجل تأخر كل تنفيذ عن موعده المجدول"""
+
+    def __init__(self, root: tk.Tk, interval_ms: int = 10):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.lags = []
+        self.running = False
+        self.expected = 0.0
+
+    def start(self):
+        self.running = True
+        self.schedule()
+
+    def stop(self):
+        self.running = False
+
+    def schedule(self):
+        self.expected = time.perf_counter() + self.interval_ms / 1000
+        self.root.after(self.interval_ms, self.beat)
+
+    def beat(self):
+        self.lags.append(max(0.0, time.perf_counter() - self.expected))
+        if self.running:
+            self.schedule()
+
+    def summary(self) -> dict:
+        """التأخر بالملي ثانية: الوسيط و p99 والأقصى"""
+        lags = sorted(self.lags) or [0.0]
+        return {
+            'beats': len(self.lags),
+            'p50': lags[len(lags) // 2] * 1000,
+            'p99': lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000,
+            'max': lags[-1] * 1000,
+        }
+
+
+def make_app(archive_dir: str):
+    """نافذة Tk مخفية وواجهة المحول بمخزن سجل يؤرشف في مجلد مؤقت، أو (None, None) بدون شاشة"""
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"⚠️ لا يمكن إنشاء نافذة Tk ({e})، شغّل الاختبار مع شاشة أو Xvfb")
+        return None, None
+    root.withdraw()
+    app = ShamelaGUI(root)
+    app.log_store = LogStore(archive_dir=archive_dir)
+    return root, app
+
+
+def run_until(root: tk.Tk, done, timeout: float) -> bool:
+    """تشغيل حلقة الأحداث حتى يتحقق done() أو تنتهي المهلة"""
+    deadline = time.perf_counter() + timeout
+
+    def check():
+        if done() or time.perf_counter() > deadline:
+            root.quit()
+        else:
+            root.after(20, check)
+
+    root.after(20, check)
+    root.mainloop()
+    return done()
+
+
+def log_settled(app: ShamelaGUI, expected: int) -> bool:
+    """وصلت كل الرسائل إلى المخزن ولم يبق شيء ينتظر العرض"""
+    return len(app.log_store) >= expected and not app.pending_log_messages and not app.log_flush_scheduled
+
+
+def stress_direct(root: tk.Tk, app: ShamelaGUI, total: int, burst: int = 500, timeout: float = 600) -> dict:
+    """استدعاء log_message مباشرة من خيط الواجهة بدفعات من burst رسالة لكل دورة"""
+    expected = len(app.log_store) + total
+    sent = [0]
+
+    def feed():
+        end = min(total, sent[0] + burst)
+        for i in range(sent[0], end):
+            queue_type, log_type = MESSAGE_TYPES[i % len(MESSAGE_TYPES)]
+            app.log_message(f"رسالة اختبار مباشرة رقم {i}", log_type)
+        sent[0] = end
+        if end < total:
+            root.after(1, feed)
+
+    probe = LoopLatencyProbe(root)
+    started = time.perf_counter()
+    probe.start()
+    root.after(0, feed)
+    completed = run_until(root, lambda: log_settled(app, expected), timeout)
+    elapsed = time.perf_counter() - started
+    probe.stop()
+    return dict(probe.summary(), completed=completed, elapsed=elapsed)
+
+
+def stress_queue(root: tk.Tk, app: ShamelaGUI, total: int, timeout: float = 600) -> dict:
+    """خيط منتج يرسل الرسائل إلى message_queue و check_message_queue تعرضها"""
+    expected = len(app.log_store) + total
+    finished = threading.Event()
+
+    def produce():
+        for i in range(total):
+            queue_type, log_type = MESSAGE_TYPES[i % len(MESSAGE_TYPES)]
+            app.message_queue.put((queue_type, f"رسالة اختبار من الخيط رقم {i}"))
+        finished.set()
+
+    def settled():
+        return finished.is_set() and app.message_queue.qsize() == 0 and log_settled(app, expected)
+
+    probe = LoopLatencyProbe(root)
+    app.conversion_running = True
+    started = time.perf_counter()
+    probe.start()
+    root.after(0, app.check_message_queue)
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    completed = run_until(root, settled, timeout)
+    elapsed = time.perf_counter() - started
+    app.conversion_running = False
+    probe.stop()
+    producer.join(timeout=5)
+    return dict(probe.summary(), completed=completed, elapsed=elapsed)
+
+
+def check_widget_bounded(app: ShamelaGUI):
+    """عدد أسطر السجل في الواجهة لا يتجاوز view_limit"""
+    lines = int(app.log_text.index('end-1c').split('.')[0]) - 1
+    assert lines <= app.log_store.view_limit, lines
+
+
+def report(name: str, total: int, result: dict):
+    print(f"{name}: {total} رسالة في {result['elapsed']:.2f} ث ({total / result['elapsed']:.0f} رسالة/ث) | "
+          f"تأخر الحلقة: p50 {result['p50']:.1f} ms، p99 {result['p99']:.1f} ms، الأقصى {result['max']:.1f} ms "
+          f"({result['beats']} نبضة)")
+
+
+def run(total: int = 100000) -> bool:
+    """تشغيل السيناريوهين وطباعة النتائج، False إذا لم تتوفر شاشة"""
+    with tempfile.TemporaryDirectory() as archive_dir:
+        root, app = make_app(archive_dir)
+        if root is None:
+            return False
+        try:
+            print(f"=== اختبار ضغط السجل: {total} رسالة ===")
+            for name, scenario in (('مباشر', stress_direct), ('قائمة الرسائل', stress_queue)):
+                before = len(app.log_store)
+                result = scenario(root, app, total)
+                assert result['completed'], f"{name}: لم تكتمل الرسائل قبل انتهاء المهلة"
+                assert len(app.log_store) - before >= total
+                check_widget_bounded(app)
+                report(name, total, result)
+        finally:
+            app.log_store.close()
+            root.destroy()
+    return True
+
+
+def test_log_stress_small():
+    """نسخة مختصرة (10 آلاف رسالة) تتحقق من وصول كل الرسائل وبقاء عرض السجل محدوداً"""
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        pytest.skip(f"لا توجد شاشة لنافذة Tk: {e}")
+    assert run(10000)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
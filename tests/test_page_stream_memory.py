@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قياس ذروة الذاكرة (tracemalloc) عند قراءة كتاب كبير بثلاث طرق:
+صفوف بصيغة القواميس كما كانت قبل PageBatch، و PageBatch كاملة (extract_book_content)،
+والقراءة على دفعات عبر BookContentStream كما في التحويل.
+
+جدول Access وهمي يولّد الصفوف عند الطلب، فلا يدخل حجم المصدر في القياس.
+
+tracemalloc لا يرى إلا ما يحجزه Python، فلا تدخل فيه ذاكرة مكتبات C ولا ما بقي محجوزاً للعملية بعد تحريره.
+لذلك يقيس الـ benchmark أيضاً ذروة RSS (ru_maxrss) لكل طريقة في عملية جديدة مستقلة،
+مع عملية أساس لا تقرأ شيئاً للمقارنة (غير متاح على Windows لعدم وجود resource).
+
+التشغيل: python tests/test_page_stream_memory.py [عدد الصفحات]
+"""
+
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from itertools import islice
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shamela_gui import ShamelaConverter
+
+WORDS = ['بِسْمِ', 'اللَّهِ', 'الرَّحْمَنِ', 'قال', 'حدثنا', 'عن', 'النبي ﷺ', 'كتاب', 'باب', '«قول»', '===']
+
+
+class GeneratedAccessCursor:
+    """مؤشر يحاكي pyodbc لجدول محتوى (id, nass, page, part) يولّد صفوفه عند القراءة"""
+
+    COLUMNS = [('id', int), ('nass', str), ('page', int), ('part', int)]
+
+    def __init__(self, page_count: int, page_chars: int):
+        self.page_count = page_count
+        self.page_chars = page_chars
+        self.description = [(name, kind) for name, kind in self.COLUMNS]
+        self.rows = iter(())
+
+    def page_text(self, content_id: int) -> str:
+        rng = random.Random(content_id)
+        words = []
+        size = 0
+        while size < self.page_chars:
+            words.append(rng.choice(WORDS))
+            size += len(words[-1]) + 1
+        return ' '.join(words)
+
+    def execute(self, sql: str):
+        if 'WHERE 1=0' in sql:
+            self.rows = iter(())
+            return self
+        names = [name.strip(' []') for name in sql.split('SELECT ', 1)[1].split(' FROM ')[0].split(',')]
+        values = {
+            'id': lambda i: i,
+            'nass': self.page_text,
+            'page': lambda i: i,
+            'part': lambda i: 1 + i // 500,
+        }
+        self.rows = (tuple(values[name](i) for name in names) for i in range(1, self.page_count + 1))
+        return self
+
+    def fetchmany(self, size: int):
+        return list(islice(self.rows, size))
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def fetchone(self):
+        return next(self.rows, None)
+
+    def close(self):
+        pass
+
+
+class GeneratedAccess:
+    def __init__(self, page_count: int, page_chars: int):
+        self.page_count = page_count
+        self.page_chars = page_chars
+
+    def cursor(self):
+        return GeneratedAccessCursor(self.page_count, self.page_chars)
+
+
+def make_converter(page_count: int, page_chars: int) -> ShamelaConverter:
+    converter = ShamelaConverter({'database': 'benchmark'})
+    converter.log_message = lambda *args, **kwargs: None
+    converter.access_conn = GeneratedAccess(page_count, page_chars)
+    return converter
+
+
+def read_as_dicts(converter: ShamelaConverter) -> int:
+    """الطريقة السابقة: قائمة قواميس للكتاب كاملاً مع النص و HTML لكل صفحة"""
+    plan = converter.build_column_plan('b1')
+    rows = []
+    for chunk in converter.iter_raw_content_chunks(plan):
+        for row_data in chunk:
+            text, html = converter.render_content_text(converter.content_raw_text(row_data, plan), plan)
+            row_data['nass'] = text
+            row_data['nass_html'] = html
+            rows.append(row_data)
+    return len(rows)
+
+
+def read_as_batch(converter: ShamelaConverter) -> int:
+    """الكتاب كاملاً في PageBatch واحدة"""
+    return len(converter.extract_book_content('b1'))
+
+
+def read_as_stream(converter: ShamelaConverter) -> int:
+    """الهيكل الخفيف ثم الصفحات دفعة بعد دفعة كما في insert_pages_and_chapters"""
+    stream = converter.open_book_content_stream('b1')
+    return sum(1 for page in stream.pages())
+
+
+MODES = [
+    ('قواميس (قبل PageBatch)', read_as_dicts),
+    ('PageBatch كاملة', read_as_batch),
+    ('BookContentStream', read_as_stream),
+]
+
+
+def measure(read, page_count: int, page_chars: int) -> tuple:
+    """(عدد الصفحات، ذروة الذاكرة بالبايت، الزمن) لطريقة قراءة واحدة"""
+    converter = make_converter(page_count, page_chars)
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        pages = read(converter)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        converter.stop_text_processes()
+    return pages, peak, time.perf_counter() - started
+
+
+def test_stream_peak_below_full_read():
+    """ذروة الذاكرة للقراءة على دفعات أقل من قراءة الكتاب كاملاً"""
+    results = {name: measure(read, 5000, 400) for name, read in MODES}
+    assert all(pages == 5000 for pages, peak, elapsed in results.values())
+    assert results['BookContentStream'][1] < results['PageBatch كاملة'][1] < results['قواميس (قبل PageBatch)'][1]
+
+
+def max_rss() -> int:
+    """ذروة RSS للعملية الحالية بالبايت (ru_maxrss بالكيلوبايت على Linux وبالبايت على macOS)"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def measure_rss(mode_index: int, page_count: int, page_chars: int) -> int:
+    """ذروة RSS بالبايت لطريقة قراءة واحدة في عملية جديدة (-1: عملية الأساس دون قراءة)"""
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--rss', str(mode_index),
+                             str(page_count), str(page_chars)],
+                            capture_output=True, text=True, check=True).stdout
+    return int(output.split()[-1])
+
+
+def rss_child(mode_index: int, page_count: int, page_chars: int):
+    """العملية الفرعية: قراءة الكتاب بالطريقة المطلوبة ثم طباعة ذروة RSS"""
+    converter = make_converter(page_count, page_chars)
+    try:
+        if mode_index >= 0:
+            MODES[mode_index][1](converter)
+    finally:
+        converter.stop_text_processes()
+    print(max_rss())
+
+
+def benchmark(page_count: int = 50000, page_chars: int = 400):
+    print(f"=== ذروة الذاكرة لكتاب من {page_count} صفحة (~{page_chars} حرف للصفحة) ===")
+    baseline = measure_rss(-1, page_count, page_chars) if resource is not None else None
+    if baseline is not None:
+        print(f"عملية الأساس (دون قراءة): RSS {baseline / (1024 * 1024):.1f} MB")
+    for index, (name, read) in enumerate(MODES):
+        pages, peak, elapsed = measure(read, page_count, page_chars)
+        line = f"{name}: {peak / (1024 * 1024):.1f} MB ذروة tracemalloc | {elapsed:.1f} ث | {pages} صفحة"
+        if baseline is not None:
+            rss = measure_rss(index, page_count, page_chars)
+            line += f" | RSS {rss / (1024 * 1024):.1f} MB (+{(rss - baseline) / (1024 * 1024):.1f} MB)"
+        print(line)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--rss':
+        rss_child(*(int(arg) for arg in sys.argv[2:5]))
+    else:
+        benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبار تطابق مخرجات TextNormalizer مع دوال التنظيف القديمة،
+وقياس سرعة التنظيف بالميجابايت في الثانية للطريقتين.
+
+التشغيل: python tests/test_text_normalizer.py [عدد الصفحات]
+"""
+
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import legacy_text
+from shamela_gui import TextNormalizer
+
+# أزواج (الدالة القديمة، اسم الدالة في TextNormalizer)
+PIPELINES = [
+    (legacy_text.clean_text, 'clean_text'),
+    (legacy_text.preserve_arabic_diacritics, 'preserve_arabic_diacritics'),
+    (legacy_text.extract_arabic_text_enhanced, 'extract_arabic_text'),
+]
+
+
+def test_normalizer_matches_legacy():
+    """مخرجات TextNormalizer مطابقة حرفياً للدوال القديمة على نصوص عشوائية وحالات حدية"""
+    normalizer = TextNormalizer()
+    for text in legacy_text.corpus(2000, words=80):
+        for legacy, name in PIPELINES:
+            expected = legacy(text)
+            actual = getattr(normalizer, name)(text)
+            assert actual == expected, f"{name}: {text!r}\n{actual!r}\n{expected!r}"
+
+
+def test_disallowed_pattern_is_complement():
+    """disallowed_re يحذف بالضبط الأحرف التي لا يطابقها نمط الأحرف المسموحة، لكل نقاط الرموز في المستوى الأساسي"""
+    normalizer = TextNormalizer()
+    text = ''.join(chr(code_point) for code_point in range(0x10000) if not 0xD800 <= code_point <= 0xDFFF)
+    allowed = re.compile(TextNormalizer.ALLOWED_PATTERN)
+    assert normalizer.disallowed_re.sub('', text) == ''.join(allowed.findall(text))
+
+
+def benchmark(page_count: int = 3000, repeat: int = 3):
+    """قياس سرعة التنظيف (MB/s) للدوال القديمة و TextNormalizer على نفس الصفحات"""
+    pages = legacy_text.corpus(page_count, words=400, seed=1)
+    megabytes = sum(len(page.encode('utf-8')) for page in pages) / (1024 * 1024)
+    normalizer = TextNormalizer()
+    print(f"=== قياس سرعة التنظيف: {len(pages)} صفحة، {megabytes:.2f} MB ===")
+
+    for legacy, name in PIPELINES:
+        current = getattr(normalizer, name)
+        timings = {}
+        for label, function in (('القديمة', legacy), ('الجديدة', current)):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for page in pages:
+                    function(page)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[label] = best
+        old_speed = megabytes / timings['القديمة']
+        new_speed = megabytes / timings['الجديدة']
+        print(f"{name}: القديمة {old_speed:.1f} MB/s | الجديدة {new_speed:.1f} MB/s | "
+              f"التسريع {new_speed / old_speed:.2f}x")
+
+
+if __name__ == "__main__":
+    test_normalizer_matches_legacy()
+    test_disallowed_pattern_is_complement()
+    print("✅ مخرجات TextNormalizer مطابقة للدوال القديمة")
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)